@@ -0,0 +1,339 @@
+"""
+Latency, query count and peak memory for every task, category and auth
+endpoint, against data generated by the seed_tasks command.
+
+Run with:
+    python manage.py test benchmarks.bench_api
+
+BENCH_TASKS (default 10000) sets the seeded scale, BENCH_ROUNDS (default 20)
+the timed requests per endpoint, and BENCH_RESULTS the JSON file written
+(default bench_results.json). Actions behind the response cache are timed
+twice: with the cache expired before every request, and as `<name>_cached`
+hits. Compare two runs with:
+    python -m benchmarks.compare old.json new.json
+"""
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from tasks.models import Task, TaskAttachment, TaskCategory
+from tasks.versioning import bump_versions
+from users import throttling
+
+TASKS = int(os.environ.get('BENCH_TASKS', 10_000))
+ROUNDS = int(os.environ.get('BENCH_ROUNDS', 20))
+RESULTS = os.environ.get('BENCH_RESULTS', 'bench_results.json')
+PASSWORD = 'SeedPassword123!'
+
+MEDIA = tempfile.mkdtemp(prefix='bench-media-')
+UNLIMITED_RATES = {
+    scope: '1000000/s' for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def consume(response):
+    # Streamed bodies are only produced while they are read
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA,
+    TASK_UPLOAD_TEMP_DIR=os.path.join(MEDIA, 'upload_parts'),
+    AUTH_THROTTLE_STORE='cache',
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': UNLIMITED_RATES},
+)
+class ApiBenchmark(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        started = time.perf_counter()
+        call_command('seed_tasks', tasks=TASKS, password=PASSWORD, stdout=io.StringIO())
+        cls.seed_seconds = time.perf_counter() - started
+        # The heaviest seeded user, as the worst case for per-user endpoints
+        cls.user = User.objects.annotate(count=Count('tasks')).order_by('-count').first()
+        cls.user_tasks = cls.user.tasks.count()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA, ignore_errors=True)
+
+    def setUp(self):
+        throttling._stores.clear()
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        self.task = Task.objects.filter(user=self.user).first()
+        self.category = TaskCategory.objects.filter(user=self.user).first()
+        self.attachment = self.client.post(
+            f'/api/tasks/{self.task.id}/upload_attachment/',
+            {'file': SimpleUploadedFile('bench.txt', b'x' * 64 * 1024, 'text/plain')},
+            format='multipart'
+        ).data
+        self.results = {}
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def measure(self, name, send, setup=None):
+        """Time ROUNDS requests, then count queries and peak memory for one more"""
+        timings = []
+        for _ in range(ROUNDS):
+            args = setup() if setup else ()
+            started = time.perf_counter()
+            response = consume(send(*args))
+            timings.append(time.perf_counter() - started)
+            self.assertLess(response.status_code, 400, f'{name}: {getattr(response, "data", "")}')
+
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                consume(send(*args))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.results[name] = {
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+            'queries': len(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def expire_cached_responses(self):
+        bump_versions([self.user.id])
+        return ()
+
+    def new_task(self):
+        return Task.objects.create(user=self.user, title=self.unique('Bench task '), date=timezone.localdate())
+
+    def new_category(self):
+        return TaskCategory.objects.create(user=self.user, name=self.unique('Bench category '))
+
+    def new_attachment(self):
+        return TaskAttachment.objects.create(
+            task=self.task, file='task_attachments/bench/missing.txt',
+            file_name='missing.txt', file_size=1, file_type='text/plain'
+        )
+
+    def new_upload(self, body):
+        response = self.client.post(
+            f'/api/tasks/{self.task.id}/uploads/',
+            {'file_name': 'chunked.bin', 'file_size': len(body)},
+            format='json'
+        )
+        return (response.data['id'],)
+
+    def auth_endpoints(self):
+        self.measure('auth.register', lambda: self.client.post('/api/auth/register/', {
+            'username': self.unique('bench_register_'),
+            'email': f'{self.unique("bench")}@example.com',
+            'password': 'BenchPassword123!',
+            'password2': 'BenchPassword123!',
+            'first_name': 'Bench',
+        }, format='json'))
+        self.measure('auth.login', lambda: self.client.post(
+            '/api/auth/login/', {'username': self.user.username, 'password': PASSWORD}, format='json'
+        ))
+        self.measure('auth.refresh', lambda: self.client.post(
+            '/api/auth/refresh/', {'refresh': str(RefreshToken.for_user(self.user))}, format='json'
+        ))
+        self.measure('auth.profile', lambda: self.client.get('/api/auth/profile/'))
+        self.measure('auth.profile_update', lambda: self.client.patch(
+            '/api/auth/profile/update/', {'first_name': self.unique('Bench')}, format='json'
+        ))
+
+    def category_endpoints(self):
+        base = '/api/categories/'
+        self.measure('categories.list', lambda: self.client.get(base))
+        self.measure('categories.retrieve', lambda: self.client.get(f'{base}{self.category.id}/'))
+        self.measure('categories.create', lambda: self.client.post(
+            base, {'name': self.unique('Created ')}, format='json'
+        ))
+        self.measure('categories.partial_update', lambda: self.client.patch(
+            f'{base}{self.category.id}/', {'icon': self.unique('fa-')}, format='json'
+        ))
+        self.measure(
+            'categories.destroy',
+            lambda category: self.client.delete(f'{base}{category.id}/'),
+            setup=lambda: (self.new_category(),)
+        )
+
+    def task_read_endpoints(self):
+        base = '/api/tasks/'
+        self.measure('tasks.list', lambda: self.client.get(base))
+        self.measure('tasks.list_sparse', lambda: self.client.get(f'{base}?fields=id,title,status'))
+        self.measure('tasks.list_search', lambda: self.client.get(f'{base}?search=report'))
+        self.measure('tasks.list_stream', lambda: self.client.get(f'{base}?format=json-stream'))
+        self.measure('tasks.retrieve', lambda: self.client.get(f'{base}{self.task.id}/'))
+        for name in ('today', 'upcoming', 'overdue', 'by_priority', 'statistics'):
+            # Cached actions: a new data version each round measures the queries
+            # behind them, then the unchanged version measures cache hits
+            self.measure(
+                f'tasks.{name}',
+                lambda name=name: self.client.get(f'{base}{name}/'),
+                setup=self.expire_cached_responses
+            )
+            self.measure(f'tasks.{name}_cached', lambda name=name: self.client.get(f'{base}{name}/'))
+        self.measure('tasks.export_csv', lambda: self.client.get(f'{base}export/?format=csv'))
+        self.measure('tasks.export_ndjson', lambda: self.client.get(f'{base}export/?format=ndjson'))
+        self.measure('tasks.download_attachment', lambda: self.client.get(
+            f'{base}{self.task.id}/attachments/{self.attachment["id"]}/download/'
+        ))
+        self.measure('sync', lambda: self.client.get('/api/sync/'))
+
+    def task_write_endpoints(self):
+        base = '/api/tasks/'
+        self.measure('tasks.create', lambda: self.client.post(base, {
+            'title': self.unique('Created task '), 'date': '2025-01-01', 'priority': 'high'
+        }, format='multipart'))
+        self.measure('tasks.partial_update', lambda: self.client.patch(
+            f'{base}{self.task.id}/', {'title': self.unique('Renamed ')}, format='multipart'
+        ))
+        self.measure(
+            'tasks.destroy',
+            lambda task: self.client.delete(f'{base}{task.id}/'),
+            setup=lambda: (self.new_task(),)
+        )
+        self.measure('tasks.toggle_status', lambda: self.client.patch(f'{base}{self.task.id}/toggle_status/'))
+        self.measure('tasks.upload_attachment', lambda: self.client.post(
+            f'{base}{self.task.id}/upload_attachment/',
+            {'file': SimpleUploadedFile('upload.txt', self.unique('contents ').encode(), 'text/plain')},
+            format='multipart'
+        ))
+        self.measure(
+            'tasks.delete_attachment',
+            lambda attachment: self.client.delete(
+                f'{base}{self.task.id}/delete_attachment/?attachment_id={attachment.id}'
+            ),
+            setup=lambda: (self.new_attachment(),)
+        )
+
+        chunk = os.urandom(256 * 1024)
+        checksum = hashlib.sha256(chunk).hexdigest()
+        self.measure(
+            'tasks.uploads_start',
+            lambda: self.client.post(
+                f'{base}{self.task.id}/uploads/',
+                {'file_name': 'chunked.bin', 'file_size': len(chunk)},
+                format='json'
+            )
+        )
+        self.measure(
+            'tasks.uploads_put_chunk',
+            lambda upload_id: self.client.put(
+                f'{base}{self.task.id}/uploads/{upload_id}/?offset=0',
+                data=chunk, content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=checksum
+            ),
+            setup=lambda: self.new_upload(chunk)
+        )
+
+        def put_chunk():
+            upload_id, = self.new_upload(chunk)
+            self.client.put(
+                f'{base}{self.task.id}/uploads/{upload_id}/?offset=0',
+                data=chunk, content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=checksum
+            )
+            return (upload_id,)
+
+        self.measure(
+            'tasks.uploads_finalize',
+            lambda upload_id: self.client.post(f'{base}{self.task.id}/uploads/{upload_id}/finalize/'),
+            setup=put_chunk
+        )
+
+        items = [{'title': f'Bulk {i}', 'date': '2025-01-01'} for i in range(100)]
+        self.measure('tasks.bulk_create', lambda: self.client.post(f'{base}bulk/', items, format='json'))
+
+        def bulk_ids():
+            return ([task.id for task in Task.objects.bulk_create(
+                [Task(user=self.user, title=f'Bulk {i}', date=timezone.localdate()) for i in range(100)]
+            )],)
+
+        self.measure(
+            'tasks.bulk_update',
+            lambda ids: self.client.patch(
+                f'{base}bulk/', [{'id': pk, 'status': 'completed'} for pk in ids], format='json'
+            ),
+            setup=bulk_ids
+        )
+        self.measure(
+            'tasks.bulk_destroy',
+            lambda ids: self.client.delete(f'{base}bulk/', ids, format='json'),
+            setup=bulk_ids
+        )
+
+        rows = 'title,date,priority\n' + ''.join(f'Imported {i},2025-01-01,low\n' for i in range(500))
+        self.measure('tasks.import', lambda: self.client.post(
+            f'{base}import/',
+            {'file': SimpleUploadedFile('tasks.csv', rows.encode(), 'text/csv')},
+            format='multipart'
+        ))
+
+    def test_api_endpoints(self):
+        self.auth_endpoints()
+        self.category_endpoints()
+        self.task_read_endpoints()
+        self.task_write_endpoints()
+
+        report = {
+            'commit': git_commit(),
+            'recorded_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'seeded_tasks': TASKS,
+            'seed_seconds': round(self.seed_seconds, 2),
+            'benchmark_user_tasks': self.user_tasks,
+            'rounds': ROUNDS,
+            'results': self.results,
+        }
+        with open(RESULTS, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+        print(f'\n{TASKS} seeded tasks ({self.user_tasks} for the benchmark user), {ROUNDS} rounds')
+        print(f'{"endpoint":<28} {"p50 ms":>9} {"p95 ms":>9} {"queries":>8} {"peak KB":>9}')
+        for name, result in self.results.items():
+            print(
+                f'{name:<28} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+                f'{result["queries"]:>8} {result["peak_kb"]:>9.1f}'
+            )
+        print(f'Results written to {RESULTS}')
@@ -0,0 +1,125 @@
+"""
+Attachment download throughput: the DEBUG-only MEDIA_URL path versus
+/api/tasks/{id}/attachments/{aid}/download/.
+
+Run with:
+    python manage.py test benchmarks.bench_downloads
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from tasks.attachments import create_attachment
+from tasks.models import Task
+from tasks.views import TaskViewSet
+
+FILE_SIZE = 64 * 1024 * 1024
+ROUNDS = 5
+
+
+def drain(sock):
+    while sock.recv(1024 * 1024):
+        pass
+
+
+def send_over_socket(send):
+    """Time how long `send(sock)` takes to push the body through a local socket"""
+    writer, reader = socket.socketpair()
+    thread = threading.Thread(target=drain, args=(reader,))
+    thread.start()
+    started = time.perf_counter()
+    send(writer)
+    elapsed = time.perf_counter() - started
+    writer.close()
+    thread.join()
+    reader.close()
+    return elapsed
+
+
+def send_iterated(response):
+    # What a WSGI server does without wsgi.file_wrapper: Python reads and writes
+    def send(sock):
+        for chunk in response.streaming_content:
+            sock.sendall(chunk)
+        response.close()
+    return send
+
+
+def send_sendfile(response):
+    # What gunicorn does with wsgi.file_wrapper: one sendfile() loop, no copies into Python
+    def send(sock):
+        file = response.file_to_stream
+        offset = file.tell() if hasattr(file, 'tell') else 0
+        remaining = int(response['Content-Length'])
+        while remaining:
+            sent = os.sendfile(sock.fileno(), file.fileno(), offset, remaining)
+            offset += sent
+            remaining -= sent
+        response.close()
+    return send
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AttachmentDownloadBenchmark(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('bench')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title='Bench', date='2025-01-01')
+        upload = SimpleUploadedFile('bench.bin', os.urandom(FILE_SIZE), 'application/octet-stream')
+        self.attachment = create_attachment(self.task, upload)
+        self.url = f'/api/tasks/{self.task.id}/attachments/{self.attachment.id}/download/'
+        self.view = TaskViewSet.as_view({'get': 'download_attachment'})
+
+    def download(self, **headers):
+        # Call the view directly: the test client replaces the file_to_stream a server would use
+        request = APIRequestFactory().get(self.url, **headers)
+        force_authenticate(request, self.user)
+        return self.view(request, pk=str(self.task.id), attachment_id=str(self.attachment.id))
+
+    def measure(self, label, make_send, size=FILE_SIZE):
+        timings = []
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            send = make_send()
+            timings.append(send_over_socket(send) + time.perf_counter() - started)
+        best = min(timings)
+        print(f'{label:<48} {size / best / 1024 / 1024:>9.0f} MB/s  {best * 1000:>7.1f} ms')
+        return best
+
+    def test_download_throughput(self):
+        from django.conf import settings
+        factory = RequestFactory()
+        print(f'\n{FILE_SIZE // (1024 * 1024)}MB attachment, best of {ROUNDS}')
+
+        def media_url():
+            request = factory.get('/media/' + self.attachment.file.name)
+            return send_iterated(serve(request, self.attachment.file.name, settings.MEDIA_ROOT))
+        self.measure('MEDIA_URL static serve (DEBUG only)', media_url)
+
+        self.measure(
+            'download endpoint, iterated by the server',
+            lambda: send_iterated(self.download())
+        )
+        self.measure(
+            'download endpoint, sendfile (gunicorn)',
+            lambda: send_sendfile(self.download())
+        )
+        self.measure(
+            'download endpoint, 1MB Range request',
+            lambda: send_sendfile(self.download(HTTP_RANGE='bytes=0-1048575')),
+            size=1024 * 1024
+        )
+
+        with self.settings(TASK_ATTACHMENT_SENDFILE='x-accel-redirect'):
+            started = time.perf_counter()
+            for _ in range(ROUNDS):
+                response = self.download()
+            elapsed = (time.perf_counter() - started) / ROUNDS
+            self.assertIn('X-Accel-Redirect', response)
+            print(f'{"download endpoint, X-Accel-Redirect (Django time)":<48} {"":>14}  {elapsed * 1000:>7.1f} ms')
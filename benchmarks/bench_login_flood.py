@@ -0,0 +1,148 @@
+"""
+Latency seen by ordinary users while one address floods /api/auth/login/,
+with and without the sliding-window throttles. The flood threads run in
+the same process as the live server, so even rejected requests compete
+with real users for the CPU; a separate attacker host would not.
+
+Run with:
+    python manage.py test benchmarks.bench_login_flood
+"""
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from tasks.models import Task
+from users import throttling
+
+FLOOD_THREADS = 6
+API_REQUESTS = 30
+LOGINS = 4
+# Flood responses to wait for before measuring, enough to use up the per-IP budget
+WARMUP = 25
+ATTACKER = '203.0.113.7'
+UNLIMITED = '1000000/s'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class LoginFloodBenchmark(LiveServerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='AlicePassword123!')
+        Task.objects.bulk_create(
+            [Task(user=self.user, title=f'Task {i}', date=date(2025, 1, 1)) for i in range(50)]
+        )
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        throttling._stores.clear()
+
+    def request(self, path, data=None, client='198.51.100.1', token=None):
+        """Send one request from `client`, returning (status, seconds)"""
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.live_server_url + path, data=body)
+        request.add_header('X-Forwarded-For', client)
+        if body is not None:
+            request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f'Bearer {token}')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            code = error.code
+        return code, time.perf_counter() - started
+
+    def flood(self, stop, codes):
+        attempt = 0
+        while not stop.is_set():
+            attempt += 1
+            code, _ = self.request(
+                '/api/auth/login/',
+                {'username': f'victim{attempt % 500}', 'password': 'guess'},
+                client=ATTACKER
+            )
+            codes.append(code)
+
+    def normal_traffic(self):
+        api, logins = [], []
+        for i in range(API_REQUESTS):
+            code, elapsed = self.request('/api/tasks/', token=self.access)
+            self.assertEqual(code, 200)
+            api.append(elapsed)
+            if i % (API_REQUESTS // LOGINS) == 0:
+                code, elapsed = self.request(
+                    '/api/auth/login/',
+                    {'username': 'alice', 'password': 'AlicePassword123!'}
+                )
+                self.assertEqual(code, 200)
+                logins.append(elapsed)
+        return api, logins
+
+    def run_scenario(self, flood, throttled):
+        rates = dict(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'])
+        if not throttled:
+            rates = {scope: UNLIMITED for scope in rates}
+        rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates, 'NUM_PROXIES': 1}
+        path = os.path.join(self.directory.name, f'throttle-{flood}-{throttled}.sqlite3')
+        throttling._stores.clear()
+
+        with override_settings(REST_FRAMEWORK=rest_framework, AUTH_THROTTLE_STORE='sqlite',
+                               AUTH_THROTTLE_SQLITE_PATH=path):
+            stop, codes = threading.Event(), []
+            threads = [
+                threading.Thread(target=self.flood, args=(stop, codes))
+                for _ in range(FLOOD_THREADS if flood else 0)
+            ]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 60
+            while threads and len(codes) < WARMUP and time.monotonic() < deadline:
+                time.sleep(0.1)
+            try:
+                api, logins = self.normal_traffic()
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+        return api, logins, codes
+
+    def test_normal_user_latency_during_login_flood(self):
+        scenarios = [
+            ('no flood', False, True),
+            ('flood, unthrottled', True, False),
+            ('flood, throttled', True, True),
+        ]
+        print(f'\n{FLOOD_THREADS} flood threads from one address; times in ms')
+        print(f'{"scenario":<20} {"api p50":>8} {"api p95":>8} {"login p50":>10} {"login max":>10} {"flood 429s":>11}')
+        results = {}
+        for name, flood, throttled in scenarios:
+            api, logins, codes = self.run_scenario(flood, throttled)
+            results[name] = percentile(api, 0.95)
+            rejected = f'{codes.count(429)}/{len(codes)}' if codes else '-'
+            print(
+                f'{name:<20} {statistics.median(api) * 1000:>8.1f} {percentile(api, 0.95) * 1000:>8.1f} '
+                f'{statistics.median(logins) * 1000:>10.1f} {max(logins) * 1000:>10.1f} {rejected:>11}'
+            )
+            if name == 'flood, throttled':
+                self.assertGreater(codes.count(429), len(codes) // 2)
+            if name == 'flood, unthrottled':
+                self.assertNotIn(429, codes)
+
+        self.assertLess(results['flood, throttled'], results['flood, unthrottled'])
@@ -0,0 +1,91 @@
+"""
+TaskSerializer versus the fast values()-based serializer on 10k tasks.
+
+Run with:
+    python manage.py test benchmarks.bench_serializers
+"""
+import time
+from datetime import date, time as clock
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from tasks.fast_serializers import serialize_tasks, task_rows
+from tasks.models import Task, TaskAttachment, TaskCategory
+from tasks.serializers import TaskSerializer
+
+TASKS = 10_000
+ROUNDS = 3
+
+
+class TaskSerializationBenchmark(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bench')
+        categories = TaskCategory.objects.bulk_create(
+            [TaskCategory(user=cls.user, name=f'Category {i}') for i in range(10)]
+        )
+        tasks = Task.objects.bulk_create(
+            [
+                Task(
+                    user=cls.user,
+                    title=f'Task {i}',
+                    description='Benchmark task' if i % 2 else None,
+                    custom_category=categories[i % 10] if i % 3 else None,
+                    priority=('low', 'medium', 'high', 'urgent')[i % 4],
+                    date=date(2025, 1, 1 + i % 28),
+                    time=clock(9, i % 60) if i % 5 else None,
+                    reminder_datetime=timezone.now() if i % 7 == 0 else None,
+                )
+                for i in range(TASKS)
+            ],
+            batch_size=2000,
+        )
+        # A third of the tasks carry one or two attachments
+        TaskAttachment.objects.bulk_create(
+            [
+                TaskAttachment(
+                    task=task,
+                    file=f'task_attachments/2025/01/01/file_{task.id}_{n}.pdf',
+                    file_name=f'file_{n}.pdf',
+                    file_size=1024 * n,
+                    file_type='application/pdf',
+                )
+                for task in tasks if task.id % 3 == 0
+                for n in range(1 + task.id % 2)
+            ],
+            batch_size=2000,
+        )
+
+    def time_best(self, render):
+        best = None
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            body = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
+
+    def test_fast_serializer_speedup(self):
+        request = Request(APIRequestFactory().get('/api/tasks/'))
+        queryset = Task.objects.filter(user=self.user).prefetch_related(
+            'attachments', 'custom_category'
+        ).order_by('-created_at', '-pk')
+        renderer = JSONRenderer()
+
+        def serializer():
+            data = TaskSerializer(queryset.all(), many=True, context={'request': request}).data
+            return renderer.render(data)
+
+        def fast():
+            return renderer.render(serialize_tasks(task_rows(queryset.all()), request))
+
+        slow_time, slow_body = self.time_best(serializer)
+        fast_time, fast_body = self.time_best(fast)
+        self.assertEqual(slow_body, fast_body)
+
+        print(f'\n{TASKS} tasks, {len(fast_body) // 1024}KB of JSON, best of {ROUNDS}')
+        print(f'{"TaskSerializer (prefetch_related)":<36} {slow_time * 1000:>8.1f} ms')
+        print(f'{"serialize_tasks (values)":<36} {fast_time * 1000:>8.1f} ms')
+        print(f'{"speedup":<36} {slow_time / fast_time:>8.1f}x')
@@ -0,0 +1,239 @@
+"""
+Throughput and "database is locked" errors with several server processes
+sharing one SQLite file: once with the tuned settings (WAL, BEGIN IMMEDIATE,
+busy_timeout) and once with SQLITE_WAL=False, the previous rollback-journal
+setup. Each run gets a fresh database seeded by the seed_tasks command.
+
+Run with:
+    python manage.py test benchmarks.bench_sqlite_concurrency
+
+The servers are gunicorn with BENCH_WORKERS sync workers (default 4) when
+gunicorn is installed, otherwise one `runserver` process per worker with the
+clients spread over them. BENCH_CLIENTS client threads (default 16), one
+user each, send 50% creates, 20% status toggles and 30% list reads for
+BENCH_SECONDS (default 15).
+"""
+import importlib.util
+import json
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+WORKERS = int(os.environ.get('BENCH_WORKERS', 4))
+CLIENTS = int(os.environ.get('BENCH_CLIENTS', 16))
+SECONDS = float(os.environ.get('BENCH_SECONDS', 15))
+MANAGE = str(Path(settings.BASE_DIR) / 'manage.py')
+LOCKED = 'database is locked'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ServerGroup:
+    """WORKERS server processes on a fresh database in `directory`"""
+
+    def __init__(self, directory, wal):
+        self.directory = directory
+        self.env = {
+            key: value for key, value in os.environ.items() if key != 'DATABASE_URL'
+        }
+        self.env.update(
+            SQLITE_PATH=os.path.join(directory, 'db.sqlite3'),
+            SQLITE_WAL=str(wal),
+            AUTH_THROTTLE_SQLITE_PATH=os.path.join(directory, 'throttle.sqlite3'),
+            DEBUG='False',
+        )
+        self.log_path = os.path.join(directory, 'server.log')
+        self.processes = []
+        self.urls = []
+
+    def manage(self, *args):
+        subprocess.run(
+            [sys.executable, MANAGE, *args], env=self.env, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+
+    def prepare(self):
+        self.manage('migrate', '--noinput')
+        self.manage('seed_tasks', '--tasks', '1000', '--users', str(CLIENTS), '--prefix', 'stress')
+        with sqlite3.connect(self.env['SQLITE_PATH']) as connection:
+            rows = connection.execute(
+                "SELECT id, username FROM auth_user WHERE username LIKE 'stress_user_%' ORDER BY id"
+            ).fetchall()
+        return [str(AccessToken.for_user(User(id=pk, username=name))) for pk, name in rows]
+
+    def start(self):
+        log = open(self.log_path, 'w')
+        if importlib.util.find_spec('gunicorn'):
+            port = free_port()
+            commands = [[
+                sys.executable, '-m', 'gunicorn', 'taskflow_api.wsgi:application',
+                '--workers', str(WORKERS), '--bind', f'127.0.0.1:{port}',
+            ]]
+            self.urls = [f'http://127.0.0.1:{port}']
+        else:
+            ports = [free_port() for _ in range(WORKERS)]
+            commands = [
+                [sys.executable, MANAGE, 'runserver', '--noreload', f'127.0.0.1:{port}']
+                for port in ports
+            ]
+            self.urls = [f'http://127.0.0.1:{port}' for port in ports]
+        for command in commands:
+            self.processes.append(subprocess.Popen(
+                command, env=self.env, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT
+            ))
+        log.close()
+        for url in self.urls:
+            self.wait_until_ready(url)
+
+    def wait_until_ready(self, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f'{url}/metrics', timeout=1).read()
+                return
+            except urllib.error.HTTPError:
+                # Answering at all is enough; /metrics needs a token without DEBUG
+                return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise RuntimeError(f'Server at {url} did not start; see {self.log_path}')
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(timeout=10)
+        with open(self.log_path) as handle:
+            return handle.read().count(LOCKED)
+
+
+class Client(threading.Thread):
+    """One user sending a fixed mix of writes and reads until `deadline`"""
+
+    def __init__(self, url, token, deadline, seed):
+        super().__init__()
+        self.url = url
+        self.token = token
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.task_ids = []
+        self.latencies = {'create': [], 'toggle': [], 'list': []}
+        self.failures = 0
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode('ascii') if data is not None else None
+        request = urllib.request.Request(self.url + path, data=body, method=method)
+        request.add_header('Authorization', f'Bearer {self.token}')
+        if body is not None:
+            request.add_header('Content-Type', 'application/x-www-form-urlencoded')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            choice = self.random.random()
+            if choice < 0.5:
+                kind = 'create'
+                data = {'title': f'Stress task {self.random.randrange(10 ** 6)}',
+                        'date': date.today().isoformat()}
+                request = ('POST', '/api/tasks/', data)
+            elif choice < 0.7 and self.task_ids:
+                kind = 'toggle'
+                request = ('PATCH', f'/api/tasks/{self.random.choice(self.task_ids)}/toggle_status/', {})
+            else:
+                kind = 'list'
+                request = ('GET', '/api/tasks/?page_size=20', None)
+
+            started = time.perf_counter()
+            try:
+                status, body = self.request(*request)
+            except (urllib.error.URLError, ConnectionError):
+                status, body = None, b''
+            elapsed = time.perf_counter() - started
+
+            if status is None or status >= 400:
+                self.failures += 1
+                continue
+            self.latencies[kind].append(elapsed)
+            if kind == 'list' and status == 200:
+                # Toggle the user's own tasks; create responses carry no id
+                self.task_ids = [task['id'] for task in json.loads(body)['results']]
+
+
+class SQLiteConcurrencyBenchmark(SimpleTestCase):
+    def run_scenario(self, wal):
+        with tempfile.TemporaryDirectory(prefix='bench-sqlite-') as directory:
+            servers = ServerGroup(directory, wal)
+            tokens = servers.prepare()
+            servers.start()
+            try:
+                deadline = time.monotonic() + SECONDS
+                clients = [
+                    Client(servers.urls[n % len(servers.urls)], token, deadline, seed=n)
+                    for n, token in enumerate(tokens)
+                ]
+                for client in clients:
+                    client.start()
+                for client in clients:
+                    client.join()
+            finally:
+                locked = servers.stop()
+
+        latencies = {
+            kind: [value for client in clients for value in client.latencies[kind]]
+            for kind in ('create', 'toggle', 'list')
+        }
+        writes = len(latencies['create']) + len(latencies['toggle'])
+        return {
+            'writes_per_s': writes / SECONDS,
+            'reads_per_s': len(latencies['list']) / SECONDS,
+            'write_p95_ms': percentile(latencies['create'] + latencies['toggle'], 0.95) * 1000,
+            'read_p50_ms': statistics.median(latencies['list']) * 1000,
+            'failures': sum(client.failures for client in clients),
+            'locked': locked,
+        }
+
+    def test_concurrent_writers(self):
+        servers = 'gunicorn' if importlib.util.find_spec('gunicorn') else 'runserver'
+        print(f'\n{WORKERS} {servers} workers, {CLIENTS} clients, {SECONDS:.0f}s per run')
+        print(f'{"journal":<10} {"writes/s":>9} {"reads/s":>8} {"write p95":>10} '
+              f'{"read p50":>9} {"errors":>7} {"locked":>7}')
+        results = {}
+        for name, wal in (('delete', False), ('wal', True)):
+            result = results[name] = self.run_scenario(wal)
+            print(
+                f'{name:<10} {result["writes_per_s"]:>9.1f} {result["reads_per_s"]:>8.1f} '
+                f'{result["write_p95_ms"]:>8.1f}ms {result["read_p50_ms"]:>7.1f}ms '
+                f'{result["failures"]:>7} {result["locked"]:>7}'
+            )
+
+        self.assertEqual(results['wal']['locked'], 0)
+        self.assertEqual(results['wal']['failures'], 0)
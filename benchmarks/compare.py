@@ -0,0 +1,56 @@
+"""
+Diff two bench_api result files.
+
+    python -m benchmarks.compare old.json new.json [--threshold 10]
+
+Endpoints whose p95 grew by more than the threshold (percent), or that run
+more queries than before, are flagged; the exit status is 1 if any were.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(old, new, threshold):
+    regressions = []
+    print(f'{"endpoint":<28} {"p95 old":>9} {"p95 new":>9} {"change":>8} {"queries":>9}')
+    for name in sorted(set(old['results']) | set(new['results'])):
+        before, after = old['results'].get(name), new['results'].get(name)
+        if before is None or after is None:
+            print(f'{name:<28} {"only in " + ("new" if before is None else "old"):>37}')
+            continue
+        change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        queries = f'{before["queries"]}->{after["queries"]}'
+        flag = change > threshold or after['queries'] > before['queries']
+        if flag:
+            regressions.append(name)
+        print(
+            f'{name:<28} {before["p95_ms"]:>9.2f} {after["p95_ms"]:>9.2f} {change:>+7.1f}% '
+            f'{queries:>9}{"  <-" if flag else ""}'
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed p95 growth in percent')
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    print(f'{old.get("commit") or "?"} -> {new.get("commit") or "?"}')
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} regressions: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,346 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from .middleware import QueryRecorder
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no gunicorn workers to aggregate, so no multiprocess mode
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Registry:
+    """
+    In-process counters and histograms, exported in Prometheus text format.
+
+    With METRICS_MULTIPROC_DIR set, each process writes its values to
+    <dir>/<pid>-<start time>.json at most every METRICS_FLUSH_INTERVAL
+    seconds and /metrics adds up the files of every worker, so whichever
+    gunicorn worker answers the scrape reports the whole server. The start
+    time keeps a reused pid from overwriting an exited worker's file. Each
+    scrape folds the files of exited workers into exited.json, under a lock
+    shared by all scrapes, so counters never go backwards and the directory
+    does not grow with worker restarts. Empty it when the server (not a
+    single worker) restarts.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = {}
+        self.values = {}
+        self.last_flush = 0.0
+        self.started = time.time_ns()
+
+    def reset(self):
+        # A forked worker starts from zero; the parent's values are reported by the parent
+        self.lock = threading.Lock()
+        self.values = {}
+        self.last_flush = 0.0
+        self.started = time.time_ns()
+
+    def register(self, metric):
+        self.families[metric.name] = metric
+        return metric
+
+    def add(self, name, labels, amount):
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def add_histogram(self, name, labels, index, value):
+        key = (name, labels)
+        with self.lock:
+            buckets = self.values.get(key)
+            if buckets is None:
+                # One slot per bucket plus +Inf, then the sum
+                buckets = self.values[key] = [0] * (len(self.families[name].buckets) + 2)
+            buckets[index] += 1
+            buckets[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [name, list(labels), value if isinstance(value, (int, float)) else list(value)]
+                for (name, labels), value in self.values.items()
+            ]
+
+    # Multiprocess aggregation
+
+    def path(self):
+        return os.path.join(settings.METRICS_MULTIPROC_DIR, f'{os.getpid()}-{self.started}.json')
+
+    def flush(self, force=False):
+        directory = settings.METRICS_MULTIPROC_DIR
+        now = time.monotonic()
+        if not directory or (not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL):
+            return
+        self.last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.path()}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(temporary, self.path())
+
+    def collect(self):
+        """Values of this process plus, in multiprocess mode, every other process"""
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_MULTIPROC_DIR
+        if directory and os.path.isdir(directory):
+            with self.directory_lock(directory):
+                self.fold_exited(directory)
+                own = os.path.basename(self.path())
+                for entry in os.scandir(directory):
+                    if entry.name.endswith('.json') and entry.name != own:
+                        snapshot = _read_snapshot(entry.path)
+                        if snapshot is not None:
+                            snapshots.append(snapshot)
+        return merge_snapshots(snapshots, self.families)
+
+    def directory_lock(self, directory):
+        if fcntl is None:
+            return nullcontext()
+        return _FileLock(os.path.join(directory, 'collect.lock'))
+
+    def fold_exited(self, directory):
+        """Merge the files of exited workers into exited.json and delete them"""
+        exited = []
+        for entry in os.scandir(directory):
+            pid = _worker_pid(entry.name)
+            if pid is not None and pid != os.getpid() and not _is_running(pid):
+                exited.append(entry.path)
+        if not exited:
+            return
+
+        archive = os.path.join(directory, 'exited.json')
+        snapshots = [_read_snapshot(archive) or []]
+        snapshots.extend(filter(None, map(_read_snapshot, exited)))
+        merged = merge_snapshots(snapshots)
+        temporary = f'{archive}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump([[name, list(labels), value] for (name, labels), value in merged.items()], handle)
+        os.replace(temporary, archive)
+        for path in exited:
+            os.remove(path)
+
+    def render(self):
+        merged = self.collect()
+        lines = []
+        for name in sorted(self.families):
+            metric = self.families[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for (family, labels), value in sorted(merged.items()):
+                if family == name:
+                    lines.extend(metric.samples(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+class _FileLock:
+    """Exclusive flock() on a file, held for the duration of a with block"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.handle = open(self.path, 'a')
+        fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _worker_pid(name):
+    """The pid of a worker's <pid>-<start time>.json file, None for other files"""
+    stem, dot, extension = name.partition('.')
+    pid, dash, started = stem.partition('-')
+    if extension != 'json' or not dash or not pid.isdigit() or not started.isdigit():
+        return None
+    return int(pid)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge_snapshots(snapshots, families=None):
+    """Add up snapshots into {(name, labels): value}; only `families` when given"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot:
+            if families is not None and name not in families:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0] * len(value))
+                for index, amount in enumerate(value):
+                    current[index] += amount
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, registry):
+        self.name = name
+        self.documentation = documentation
+        self.registry = registry
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.name, tuple(sorted(labels.items())), amount)
+
+    def samples(self, labels, value):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, registry, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.registry = registry
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        index = bisect_left(self.buckets, value)
+        self.registry.add_histogram(self.name, tuple(sorted(labels.items())), index, value)
+
+    def samples(self, labels, value):
+        lines = []
+        cumulative = 0
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, value[:-1]):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(float(value[-1]))}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+os.register_at_fork(after_in_child=registry.reset)
+
+REQUEST_LATENCY = Histogram(
+    'taskflow_http_request_duration_seconds', 'Request latency by route and view action', registry
+)
+RESPONSES = Counter(
+    'taskflow_http_responses_total', 'Responses by route, view action and status code', registry
+)
+REQUEST_QUERIES = Histogram(
+    'taskflow_db_queries_per_request', 'Database queries run by each request', registry,
+    buckets=QUERY_BUCKETS
+)
+QUERIES = Counter('taskflow_db_queries_total', 'Database queries by route', registry)
+QUERY_SECONDS = Counter(
+    'taskflow_db_query_seconds_total', 'Time spent in database queries by route', registry
+)
+CACHE_REQUESTS = Counter(
+    'taskflow_response_cache_requests_total', 'Cached task action lookups by outcome (hits or misses)', registry
+)
+UPLOAD_BYTES = Counter(
+    'taskflow_upload_bytes_total', 'Bytes received by attachment, chunked upload and import endpoints', registry
+)
+
+
+def route_labels(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return {'route': 'unmatched', 'action': ''}
+    # ViewSet routes map the HTTP method to an action, e.g. {'get': 'list'}
+    actions = getattr(match.func, 'actions', None) or {}
+    return {
+        'route': match.view_name or match.route,
+        'action': actions.get(request.method.lower(), ''),
+    }
+
+
+class MetricsMiddleware:
+    """Records latency, status and query counts for every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == '/metrics':
+            return self.get_response(request)
+
+        # Share SQLInstrumentationMiddleware's recorder rather than wrapping every query twice
+        queries = getattr(request, 'query_recorder', None)
+        if queries is None:
+            queries = QueryRecorder(track_shapes=False)
+            recording = queries.installed()
+        else:
+            recording = nullcontext()
+        started = time.perf_counter()
+        with recording:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        labels = route_labels(request)
+        REQUEST_LATENCY.observe(elapsed, method=request.method, **labels)
+        RESPONSES.inc(method=request.method, status=str(response.status_code), **labels)
+        REQUEST_QUERIES.observe(queries.count, **labels)
+        if queries.count:
+            QUERIES.inc(queries.count, route=labels['route'])
+            QUERY_SECONDS.inc(queries.duration, route=labels['route'])
+        registry.flush()
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition. Requires METRICS_TOKEN as a bearer token;
+    without a token it is only served while DEBUG is on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse('Set METRICS_TOKEN to enable /metrics', status=403)
+    elif not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
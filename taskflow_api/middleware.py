@@ -0,0 +1,141 @@
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('taskflow.requests')
+
+# `IN (%s, %s, ...)` lists of any length have the same shape
+_placeholder_list = re.compile(r'\((?:%s, )*%s\)')
+
+
+def query_shape(sql):
+    return _placeholder_list.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() hook that counts and times queries, and with
+    `track_shapes` also groups them by shape
+    """
+
+    def __init__(self, track_shapes=True):
+        self.track_shapes = track_shapes
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.track_shapes:
+                shape = query_shape(sql)
+                count, total = self.shapes.get(shape, (0, 0.0))
+                self.shapes[shape] = (count + 1, total + elapsed)
+
+    @contextmanager
+    def installed(self):
+        """Record the queries of every database connection inside the block"""
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=False):
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold):
+        """Shapes run at least `threshold` times, most frequent first: likely N+1 queries"""
+        repeated = [
+            (shape, count, total) for shape, (count, total) in self.shapes.items() if count >= threshold
+        ]
+        return sorted(repeated, key=lambda item: -item[1])
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Per-request query counts and timings, reported in a Server-Timing header.
+
+    Every request gets one QueryRecorder, shared with MetricsMiddleware as
+    `request.query_recorder`. A SQL_INSTRUMENTATION_SAMPLE_RATE share of
+    requests is instrumented in detail; the rest only count queries and get
+    the total in the header. Sampled requests that repeat one query shape
+    SQL_INSTRUMENTATION_REPEAT_THRESHOLD times or more, or take longer than
+    SQL_INSTRUMENTATION_SLOW_MS, are logged as one JSON record on the
+    `taskflow.requests` logger. Queries run while a streamed body is being
+    sent happen after the middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        sampled = bool(sample_rate) and random.random() < sample_rate
+        recorder = request.query_recorder = QueryRecorder(track_shapes=sampled)
+        if sampled:
+            request._render_timing = {}
+        with recorder.installed():
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        if not sampled:
+            self.add_timing(response, [('total', total, None)])
+            return response
+        render = request._render_timing.get('duration')
+
+        metrics = [('db', recorder.duration, f'{recorder.count} queries')]
+        if render is not None:
+            metrics.append(('serialize', render, None))
+        metrics.append(('total', total, None))
+        self.add_timing(response, metrics)
+
+        repeated = recorder.repeated(settings.SQL_INSTRUMENTATION_REPEAT_THRESHOLD)
+        if repeated or total * 1000 >= settings.SQL_INSTRUMENTATION_SLOW_MS:
+            self.log(request, response, recorder, repeated, render, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that separately
+        timing = getattr(request, '_render_timing', None)
+        if timing is not None:
+            timing['started'] = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timing.update(duration=time.perf_counter() - timing['started'])
+            )
+        return response
+
+    def add_timing(self, response, metrics):
+        entries = []
+        for name, duration, description in metrics:
+            entry = f'{name};dur={duration * 1000:.1f}'
+            if description:
+                entry += f';desc="{description}"'
+            entries.append(entry)
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + entries)
+
+    def log(self, request, response, recorder, repeated, render, total):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(recorder.duration * 1000, 1),
+            'queries': recorder.count,
+        }
+        if render is not None:
+            record['serialize_ms'] = round(render * 1000, 1)
+        if repeated:
+            record['repeated'] = [
+                {'sql': shape[:200], 'count': count, 'ms': round(duration * 1000, 1)}
+                for shape, count, duration in repeated[:5]
+            ]
+        level = logging.WARNING if repeated else logging.INFO
+        logger.log(level, json.dumps(record))
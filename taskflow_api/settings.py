@@ -37,6 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers every other middleware
+    'taskflow_api.middleware.SQLInstrumentationMiddleware',
+    'taskflow_api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +53,18 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'taskflow_api.urls'
 
+# Per-request query instrumentation (Server-Timing header, N+1 and slow request logs)
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('SQL_INSTRUMENTATION_SAMPLE_RATE', '0.1'))
+SQL_INSTRUMENTATION_REPEAT_THRESHOLD = int(os.environ.get('SQL_INSTRUMENTATION_REPEAT_THRESHOLD', '10'))
+SQL_INSTRUMENTATION_SLOW_MS = int(os.environ.get('SQL_INSTRUMENTATION_SLOW_MS', '500'))
+
+# Prometheus metrics at /metrics. Under gunicorn, point METRICS_MULTIPROC_DIR at a
+# directory shared by the workers (and emptied on deploy) to report all of them
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = 1.0  # seconds between writes of a worker's values
+# Bearer token scrapers must send; without one /metrics is only served with DEBUG on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -81,13 +96,70 @@ if os.environ.get('DATABASE_URL'):
         )
     }
 else:
-    # Development database (SQLite)
+    # Development and single-node database (SQLite)
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    # WAL lets reads run while another process writes, and BEGIN IMMEDIATE
+    # takes the write lock when a transaction starts, so concurrent writers
+    # queue for up to busy_timeout instead of failing with "database is
+    # locked" when a read lock cannot be upgraded. WAL needs a local disk;
+    # set SQLITE_WAL=False on network filesystems. The journal mode is stored
+    # in the database file, so turning this off later keeps WAL until
+    # `PRAGMA journal_mode=DELETE` is run.
+    if os.environ.get('SQLITE_WAL', 'True') == 'True':
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA busy_timeout=5000;'
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=134217728;'
+                'PRAGMA cache_size=-20000;'
+            ),
+        }
+
+# Cache Configuration
+# Local memory by default; set CACHE_DIR to share entries between workers on one host
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR'),
         }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'taskflow',
+        }
+    }
+
+# Cached task action responses
+TASKS_RESPONSE_CACHE_ALIAS = 'default'
+TASKS_RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Task reminders (see the dispatch_reminders management command)
+TASK_REMINDER_BACKEND = os.environ.get(
+    'TASK_REMINDER_BACKEND', 'tasks.reminders.ConsoleReminderBackend'
+)
+TASK_REMINDER_FILE_PATH = os.environ.get(
+    'TASK_REMINDER_FILE_PATH', str(BASE_DIR / 'reminders.log')
+)
+
+# Attachment downloads: '' streams from Django (sendfile under gunicorn),
+# 'x-accel-redirect' or 'x-sendfile' delegate the transfer to the front proxy
+TASK_ATTACHMENT_SENDFILE = os.environ.get('TASK_ATTACHMENT_SENDFILE', '')
+# nginx `internal` location aliased to MEDIA_ROOT, used with x-accel-redirect
+TASK_ATTACHMENT_ACCEL_PREFIX = os.environ.get('TASK_ATTACHMENT_ACCEL_PREFIX', '/protected-media/')
+
+# Delta sync (/api/sync/)
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+SYNC_OVERLAP_SECONDS = 5
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -123,26 +195,42 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# REST Framework Settings - UPDATED TO DISABLE PAGINATION
+# REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    # DISABLE PAGINATION - Return raw arrays instead of paginated responses
-    'DEFAULT_PAGINATION_CLASS': None,
-    # Alternative: Keep pagination but increase page size
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    # 'PAGE_SIZE': 100,
+    # Keyset cursor pagination - pass ?paginate=false to get a raw array instead
+    'DEFAULT_PAGINATION_CLASS': 'tasks.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    # Proxies in front of the app (Render's load balancer); throttles take the
+    # client address from this many entries from the end of X-Forwarded-For,
+    # which the client cannot spoof. 0 uses REMOTE_ADDR only
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
+    # Sliding-window limits for views with a throttle_scope (see users.throttling)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '20/min'),
+        'login_username': os.environ.get('LOGIN_USERNAME_RATE', '5/min'),
+        'register_ip': os.environ.get('REGISTER_IP_RATE', '10/hour'),
+    },
 }
 
+# Throttle counters: 'cache', 'sqlite', or 'auto' to use SQLite only while the
+# cache is per-process (LocMemCache) and would give each worker its own budget
+AUTH_THROTTLE_STORE = os.environ.get('AUTH_THROTTLE_STORE', 'auto')
+AUTH_THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_SQLITE_PATH = os.environ.get(
+    'AUTH_THROTTLE_SQLITE_PATH', str(BASE_DIR / 'throttle.sqlite3')
+)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -152,6 +240,14 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Users resolved from access tokens (see users.authentication)
+JWT_USER_CACHE_ALIAS = 'default'
+JWT_USER_CACHE_SIZE = 1024
+# How long any cached copy of a user lives, in this process and in the cache
+JWT_USER_CACHE_LOCAL_TTL = 30  # seconds
+# Serve safe requests on views with trust_token_claims from the token alone
+JWT_TRUST_TOKEN_CLAIMS = os.environ.get('JWT_TRUST_TOKEN_CLAIMS', 'False') == 'True'
+
 # CORS Settings
 if DEBUG:
     # Development - Allow localhost
@@ -193,11 +289,37 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-match',
+    'if-none-match',
+    'if-modified-since',
+    'if-unmodified-since',
+]
+
+# Let browser clients read the validators used for conditional requests
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
 ]
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+TASK_IMPORT_MAX_UPLOAD_SIZE = 104857600  # 100MB, spooled to disk
+
+# Gzip streamed responses (?format=json-stream, exports) for clients that accept it
+TASK_STREAM_GZIP = os.environ.get('TASK_STREAM_GZIP', 'True') == 'True'
+
+# Resumable chunked attachment uploads (/api/tasks/{id}/uploads/)
+TASK_UPLOAD_TEMP_DIR = os.environ.get('TASK_UPLOAD_TEMP_DIR', str(BASE_DIR / 'upload_parts'))
+TASK_UPLOAD_MAX_SIZE = 524288000  # 500MB
+TASK_UPLOAD_MAX_CHUNK_SIZE = 8388608  # 8MB
+TASK_UPLOAD_TTL_HOURS = 24
+
+# Hash uploads while they are received so attachments can be deduplicated
+FILE_UPLOAD_HANDLERS = [
+    'tasks.attachments.HashingMemoryFileUploadHandler',
+    'tasks.attachments.HashingTemporaryFileUploadHandler',
+]
 
 # Security Settings for Production
 if not DEBUG:
@@ -238,6 +360,12 @@ LOGGING = {
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
+        # One JSON record per slow or N+1 request (see taskflow_api.middleware)
+        'taskflow.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django.db.backends': {
             'handlers': ['console'],
             'level': 'DEBUG' if DEBUG else 'INFO',
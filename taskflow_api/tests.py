@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from .metrics import Counter, Histogram, Registry, registry
+from .middleware import QueryRecorder, query_shape
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix='taskflow-metrics-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+
+    def test_exposition_format(self):
+        demo = Registry()
+        counter = Counter('demo_total', 'Demo counter', demo)
+        histogram = Histogram('demo_seconds', 'Demo latency', demo, buckets=(0.1, 1))
+        counter.inc(2, route='a"b')
+        histogram.observe(0.05, route='x')
+        histogram.observe(5, route='x')
+
+        self.assertEqual(demo.render(), '\n'.join([
+            '# HELP demo_seconds Demo latency',
+            '# TYPE demo_seconds histogram',
+            'demo_seconds_bucket{route="x",le="0.1"} 1',
+            'demo_seconds_bucket{route="x",le="1.0"} 1',
+            'demo_seconds_bucket{route="x",le="+Inf"} 2',
+            'demo_seconds_sum{route="x"} 5.05',
+            'demo_seconds_count{route="x"} 2',
+            '# HELP demo_total Demo counter',
+            '# TYPE demo_total counter',
+            'demo_total{route="a\\"b"} 2',
+        ]) + '\n')
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_requests_are_recorded_with_one_query_recorder(self):
+        self.client.force_authenticate(User.objects.create_user('metered', password='MeteredPassword123!'))
+        labels = (('action', 'list'), ('method', 'GET'), ('route', 'category-list'), ('status', '200'))
+        responses = ('taskflow_http_responses_total', labels)
+        queries = ('taskflow_db_queries_total', (('route', 'category-list'),))
+        before = registry.collect()
+
+        installed = QueryRecorder.installed
+        with mock.patch.object(QueryRecorder, 'installed', autospec=True, side_effect=installed) as install:
+            self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+        self.assertEqual(install.call_count, 1)
+
+        after = registry.collect()
+        self.assertEqual(after[responses] - before.get(responses, 0), 1)
+        self.assertGreater(after[queries] - before.get(queries, 0), 0)
+
+    def test_metrics_require_a_token_outside_debug(self):
+        with override_settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+            self.assertIn('# TYPE taskflow_http_responses_total counter', response.content.decode())
+
+    def write_worker(self, name, amount):
+        with open(os.path.join(self.directory, name), 'w') as handle:
+            json.dump([['demo_total', [['route', 'a']], amount]], handle)
+
+    def test_exited_workers_are_folded_and_never_overwritten(self):
+        exited = subprocess.Popen([sys.executable, '-c', '']).pid
+        os.waitpid(exited, 0)
+        demo = Registry()
+        counter = Counter('demo_total', 'Demo counter', demo)
+        key = ('demo_total', (('route', 'a'),))
+
+        with override_settings(METRICS_MULTIPROC_DIR=self.directory):
+            counter.inc(1, route='a')
+            demo.flush(force=True)
+            self.assertTrue(os.path.exists(demo.path()))
+            self.write_worker(f'{exited}-1.json', 3)
+            self.write_worker(f'{os.getppid()}-1.json', 2)
+
+            self.assertEqual(demo.collect()[key], 6)
+            self.assertEqual(
+                sorted(os.listdir(self.directory)),
+                sorted(['collect.lock', 'exited.json', f'{os.getppid()}-1.json', os.path.basename(demo.path())])
+            )
+            # A later worker with the same pid adds to the total instead of replacing it
+            self.write_worker(f'{exited}-2.json', 4)
+            self.assertEqual(demo.collect()[key], 10)
+            self.assertEqual(demo.collect()[key], 10)
+
+
+class SQLInstrumentationTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('timed', password='TimedPassword123!'))
+
+    def test_query_shapes_ignore_the_length_of_in_lists(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND owner IN (%s)'),
+            'SELECT * FROM t WHERE id IN (...) AND owner IN (...)'
+        )
+
+    def test_recorder_counts_and_groups_queries(self):
+        recorder = QueryRecorder()
+        with recorder.installed(), connection.cursor() as cursor:
+            for value in range(3):
+                cursor.execute('SELECT %s', [value])
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(recorder.repeated(3), [('SELECT %s', 3, recorder.shapes['SELECT %s'][1])])
+        self.assertEqual(recorder.repeated(4), [])
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_only_report_the_total(self):
+        with self.assertNoLogs('taskflow.requests'):
+            response = self.client.get('/api/categories/')
+        self.assertRegex(response['Server-Timing'], r'^total;dur=\d+\.\d$')
+
+    @override_settings(
+        SQL_INSTRUMENTATION_SAMPLE_RATE=1,
+        SQL_INSTRUMENTATION_REPEAT_THRESHOLD=1000,
+        SQL_INSTRUMENTATION_SLOW_MS=60000,
+    )
+    def test_sampled_requests_report_queries_and_serialization(self):
+        with self.assertNoLogs('taskflow.requests'):
+            response = self.client.get('/api/categories/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=\d+\.\d;desc="[1-9]\d* queries", serialize;dur=\d+\.\d, total;dur=\d+\.\d$'
+        )
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1, SQL_INSTRUMENTATION_REPEAT_THRESHOLD=1)
+    def test_repeated_query_shapes_are_logged_as_a_warning(self):
+        with self.assertLogs('taskflow.requests', 'WARNING') as logs:
+            self.client.get('/api/categories/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['method'], 'GET')
+        self.assertEqual(record['path'], '/api/categories/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertIn('serialize_ms', record)
+        self.assertTrue(all(entry['count'] >= 1 for entry in record['repeated']))
+
+    @override_settings(
+        SQL_INSTRUMENTATION_SAMPLE_RATE=1,
+        SQL_INSTRUMENTATION_REPEAT_THRESHOLD=1000,
+        SQL_INSTRUMENTATION_SLOW_MS=0,
+    )
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('taskflow.requests', 'INFO') as logs:
+            self.client.get('/api/categories/')
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertNotIn('repeated', json.loads(logs.records[0].getMessage()))
@@ -4,9 +4,10 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from tasks.views import TaskViewSet, TaskCategoryViewSet
-from users.views import UserRegistrationView, UserProfileView, UserProfileUpdateView
+from rest_framework_simplejwt.views import TokenRefreshView
+from tasks.views import TaskViewSet, TaskCategoryViewSet, ResponseCacheStatsView, SyncView
+from taskflow_api.metrics import metrics_view
+from users.views import LoginView, UserRegistrationView, UserProfileView, UserProfileUpdateView
 
 # Root view with HTML
 def api_root(request):
@@ -231,13 +232,16 @@ router.register(r'categories', TaskCategoryViewSet, basename='category')
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     
     # API routes
     path('api/', include(router.urls)),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/cache/stats/', ResponseCacheStatsView.as_view(), name='response_cache_stats'),
     
     # Authentication
     path('api/auth/register/', UserRegistrationView.as_view(), name='register'),
-    path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/auth/login/', LoginView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/profile/', UserProfileView.as_view(), name='user_profile'),
     path('api/auth/profile/update/', UserProfileUpdateView.as_view(), name='user_profile_update'),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task, TaskCategory, TaskAttachment
+from .models import Task, TaskCategory, TaskAttachment, TaskStatistics, AttachmentBlob
 
 @admin.register(TaskCategory)
 class TaskCategoryAdmin(admin.ModelAdmin):
@@ -45,4 +45,19 @@ class TaskAttachmentAdmin(admin.ModelAdmin):
     list_display = ['file_name', 'task', 'file_size', 'file_type', 'uploaded_at']
     list_filter = ['file_type', 'uploaded_at']
     search_fields = ['file_name', 'task__title']
-    readonly_fields = ['file_size', 'file_type', 'uploaded_at']
\ No newline at end of file
+    readonly_fields = ['file_size', 'file_type', 'uploaded_at']
+
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'file', 'size', 'ref_count', 'created_at']
+
+@admin.register(TaskStatistics)
+class TaskStatisticsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'total', 'pending', 'in_progress', 'completed', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = [
+        'user', 'total', 'pending', 'in_progress', 'completed',
+        'low', 'medium', 'high', 'urgent', 'updated_at'
+    ]
\ No newline at end of file
@@ -0,0 +1,138 @@
+import hashlib
+import mimetypes
+import os
+import re
+from collections import Counter
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .cleanup import enqueue_file_deletions
+from .models import AttachmentBlob, PendingFileDeletion, TaskAttachment
+
+
+class HashingUploadMixin:
+    """Computes the SHA-256 of an upload while it is received, as `file.sha256`"""
+
+    def new_file(self, *args, **kwargs):
+        # Set first: the memory handler raises StopFutureHandlers from new_file()
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # The memory handler passes chunks of files it does not keep to the next handler
+        if getattr(self, 'activated', True):
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def file_sha256(file):
+    """Hash of an upload; only files that bypassed the hashing handlers are read again"""
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    file.sha256 = hasher.hexdigest()
+    return file.sha256
+
+
+# Extensions kept on blob names; anything else falls back to the content type's
+_extension = re.compile(r'\.[a-z0-9]{1,10}')
+
+
+def blob_extension(file):
+    """The upload's extension, so media servers can still infer a Content-Type from the name"""
+    extension = os.path.splitext(file.name or '')[1].lower()
+    if _extension.fullmatch(extension):
+        return extension
+    return mimetypes.guess_extension(getattr(file, 'content_type', None) or '') or ''
+
+
+def blob_name(digest, extension=''):
+    return f'task_blobs/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def acquire_blob(file):
+    """
+    Return the blob holding the file's content, taking one reference to it.
+
+    A file whose content is already stored only increments the blob's
+    reference count; otherwise the file is written once under its hash and
+    extension. Later uploads of the same content share that name whatever
+    their own extension.
+    """
+    digest = file_sha256(file)
+    for _ in range(2):
+        with transaction.atomic():
+            if AttachmentBlob.objects.filter(sha256=digest).update(ref_count=F('ref_count') + 1):
+                return AttachmentBlob.objects.get(sha256=digest)
+
+        name = blob_name(digest, blob_extension(file))
+        try:
+            with transaction.atomic():
+                # Deleting the queued deletion claims the name: the collector only removes
+                # files whose queue row it still holds, and this waits while it holds one
+                PendingFileDeletion.objects.filter(name=name).delete()
+                # Same name means same content, so a file left behind earlier is reused as is
+                if not default_storage.exists(name):
+                    name = default_storage.save(name, file)
+                return AttachmentBlob.objects.create(
+                    sha256=digest,
+                    file=name,
+                    size=file.size,
+                    ref_count=1
+                )
+        except IntegrityError:
+            # Another upload of the same content created the blob first
+            continue
+    raise IntegrityError(f'Could not store blob {digest}')
+
+
+def release_blobs(blob_ids):
+    """Drop one reference per id; blobs left unreferenced lose their row and their file"""
+    counts = Counter(blob_id for blob_id in blob_ids if blob_id)
+    if not counts:
+        return
+    with transaction.atomic():
+        for blob_id, count in counts.items():
+            AttachmentBlob.objects.filter(sha256=blob_id).update(ref_count=F('ref_count') - count)
+        unreferenced = AttachmentBlob.objects.filter(
+            sha256__in=counts, ref_count__lte=0, attachments__isnull=True
+        )
+        names = list(unreferenced.values_list('file', flat=True))
+        if not names:
+            return
+        unreferenced.delete()
+        # The collector deletes the files, after checking nobody uploaded them again
+        enqueue_file_deletions(names)
+
+
+def create_attachment(task, file):
+    """Attach an uploaded file to a task, storing its content at most once"""
+    with transaction.atomic():
+        blob = acquire_blob(file)
+        return TaskAttachment.objects.create(
+            task=task,
+            blob=blob,
+            file=blob.file.name,
+            file_name=file.name,
+            file_size=file.size,
+            file_type=file.content_type or 'application/octet-stream'
+        )
@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from taskflow_api.metrics import CACHE_REQUESTS
+from .versioning import get_data_version
+
+# Cache alias and lifetime for responses that do not depend on the date
+CACHE_ALIAS = getattr(settings, 'TASKS_RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'TASKS_RESPONSE_CACHE_TIMEOUT', 60 * 60)
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def _record(outcome):
+    with _counters_lock:
+        _counters[outcome] += 1
+    CACHE_REQUESTS.inc(outcome=outcome)
+
+
+def cache_counters():
+    """Hit/miss counters of this process"""
+    with _counters_lock:
+        hits, misses = _counters['hits'], _counters['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+def seconds_until_midnight(now=None):
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def response_cache_key(request, action, generation, day=None):
+    # The absolute URI covers host, path and query params; pagination links depend on all three
+    uri = hashlib.sha1(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    key = f'tasks:response:{request.user.pk}:{generation}:{action}:{uri}'
+    if day is not None:
+        key += f':{day:%Y%m%d}'
+    return key
+
+
+def cached_response(view_func):
+    """
+    Cache a read-only action's response data per user and data generation.
+
+    Every write bumps the user's TaskDataVersion, so stale entries are never
+    read again and simply age out; no explicit invalidation is needed.
+    Actions listed in the view's `date_dependent_actions` expire at midnight.
+    """
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        data_version = getattr(self, 'data_version', None) or get_data_version(request.user)
+        date_dependent = self.action in getattr(self, 'date_dependent_actions', ())
+        day = date.today() if date_dependent else None
+        key = response_cache_key(request, self.action, data_version.version, day)
+
+        cache = caches[CACHE_ALIAS]
+        data = cache.get(key)
+        if data is not None:
+            _record('hits')
+            return Response(data)
+
+        _record('misses')
+        response = view_func(self, request, *args, **kwargs)
+        # Streamed responses have no data to keep
+        if response.status_code == 200 and not response.streaming:
+            timeout = CACHE_TIMEOUT
+            if date_dependent:
+                timeout = min(timeout, seconds_until_midnight())
+            cache.set(key, response.data, timeout)
+        return response
+
+    return wrapper
@@ -0,0 +1,146 @@
+import os
+import time
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import AttachmentBlob, PendingFileDeletion, TaskAttachment
+
+# Storage prefixes owned by attachments; nothing else under MEDIA_ROOT is touched
+ATTACHMENT_PREFIXES = ('task_attachments', 'task_blobs')
+
+# Files younger than this may belong to an upload whose row is not committed yet
+DEFAULT_GRACE = timedelta(hours=1)
+
+
+def enqueue_file_deletions(names):
+    """Hand files to the collector instead of deleting them inside the request"""
+    names = [name for name in names if name]
+    if names:
+        PendingFileDeletion.objects.bulk_create(
+            [PendingFileDeletion(name=name) for name in names],
+            ignore_conflicts=True
+        )
+
+
+def referenced_names(names):
+    """The subset of storage names still used by an attachment or blob"""
+    referenced = set(TaskAttachment.objects.filter(file__in=names).values_list('file', flat=True))
+    referenced.update(AttachmentBlob.objects.filter(file__in=names).values_list('file', flat=True))
+    return referenced
+
+
+def iter_storage_files(location, prefixes=ATTACHMENT_PREFIXES):
+    """Yield (name, size, mtime) for every file below the prefixes, without listing whole trees"""
+    pending = [os.path.join(location, prefix) for prefix in prefixes]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    name = os.path.relpath(entry.path, location).replace(os.sep, '/')
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _delete_file(name, dry_run):
+    try:
+        size = default_storage.size(name)
+        if not dry_run:
+            default_storage.delete(name)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+class AttachmentGarbageCollector:
+    """
+    Deletes attachment files that no row references any more.
+
+    Files queued by request-path deletes are handled first. The storage tree
+    is then walked with os.scandir and checked against the database one
+    batch of names (one IN query per table) at a time, so neither the file
+    list nor the set of referenced names is ever held in memory whole.
+
+    Every deletion goes through the queue. A batch of queue rows is locked
+    and deleted in the transaction that deletes their files, and
+    acquire_blob() deletes the row of a name before reusing its file, so
+    an upload of the same content either cancels the deletion or waits
+    for it and writes the file again. Orphans found by the sweep are
+    queued and then deleted the same way.
+    """
+
+    def __init__(self, grace=DEFAULT_GRACE, batch_size=1000, dry_run=False):
+        self.grace = grace
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.deleted = 0
+        self.scanned = 0
+        self.reclaimed = 0
+        # A dry run leaves queued files in place; keep the sweep from counting them twice
+        self.counted = set()
+
+    def process_queue(self):
+        queued = PendingFileDeletion.objects.order_by('id').values_list('id', 'name')
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(queued.select_for_update().filter(id__gt=last_id)[:self.batch_size])
+                if not batch:
+                    return
+                last_id = batch[-1][0]
+                if not self.dry_run:
+                    # Claim the rows before looking at references; see the class docstring
+                    PendingFileDeletion.objects.filter(id__in=[pk for pk, _ in batch]).delete()
+                names = [name for _, name in batch]
+                referenced = referenced_names(names)
+                for name in names:
+                    # Content uploaded again after the delete keeps its file
+                    if name not in referenced:
+                        self.reclaimed += _delete_file(name, self.dry_run)
+                        self.deleted += 1
+                        if self.dry_run:
+                            self.counted.add(name)
+
+    def sweep_storage(self):
+        cutoff = time.time() - self.grace.total_seconds()
+        files = iter_storage_files(default_storage.path(''))
+        for batch in _batches(files, self.batch_size):
+            self.scanned += len(batch)
+            referenced = referenced_names([name for name, _, _ in batch])
+            orphans = [
+                (name, size) for name, size, mtime in batch
+                if name not in referenced and mtime <= cutoff and name not in self.counted
+            ]
+            if self.dry_run:
+                self.deleted += len(orphans)
+                self.reclaimed += sum(size for _, size in orphans)
+            else:
+                enqueue_file_deletions([name for name, _ in orphans])
+
+    def run(self):
+        self.process_queue()
+        self.sweep_storage()
+        if not self.dry_run:
+            self.process_queue()
+        return {
+            'deleted': self.deleted,
+            'scanned': self.scanned,
+            'reclaimed_bytes': self.reclaimed,
+        }
@@ -0,0 +1,89 @@
+from datetime import date, datetime, time
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .models import TaskDataVersion
+from .versioning import get_data_version
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRECONDITION_HEADERS = ('HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+class _ConditionalResponse(Exception):
+    """Carries a 304/412 response out of initial() before the handler runs"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalRequestMixin:
+    """
+    Validate requests against the user's TaskDataVersion.
+
+    Responses carry ETag and Last-Modified headers. If-None-Match and
+    If-Modified-Since are answered with 304 before any queryset or serializer
+    work, and If-Match / If-Unmodified-Since guard writes against lost updates.
+    """
+    # Actions whose output changes with date.today() even without writes
+    date_dependent_actions = ()
+    # Actions that set their own validators, such as file downloads
+    unversioned_actions = ()
+
+    def get_validators(self, data_version):
+        etag = f'"v{data_version.version}'
+        last_modified = int(data_version.modified_at.timestamp())
+        if self.action in self.date_dependent_actions:
+            today = date.today()
+            etag += f'-{today:%Y%m%d}'
+            # The output changed at midnight even if no write happened since
+            last_modified = max(last_modified, int(datetime.combine(today, time.min).timestamp()))
+        etag += '"'
+        return etag, last_modified
+
+    def has_preconditions(self, request):
+        return request.method not in SAFE_METHODS and any(
+            header in request.META for header in PRECONDITION_HEADERS
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.has_preconditions(request):
+            # Check If-Match and write in one transaction, holding the version row
+            with transaction.atomic():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def set_validator_headers(self, response, data_version):
+        etag, last_modified = self.get_validators(data_version)
+        if response.get('Content-Encoding'):
+            # A compressed body is a different representation of the same version
+            etag = 'W/' + etag
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.unversioned_actions:
+            return
+        self.data_version = get_data_version(request.user, for_update=self.has_preconditions(request))
+        etag, last_modified = self.get_validators(self.data_version)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            if response.status_code == 304:
+                self.set_validator_headers(response, self.data_version)
+            raise _ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        data_version = getattr(self, 'data_version', None)
+        if data_version is None or not 200 <= response.status_code < 300:
+            return response
+        if request.method not in SAFE_METHODS:
+            # The write has advanced the version; hand back the new validators
+            data_version = TaskDataVersion.objects.filter(user=request.user).first() or data_version
+        self.set_validator_headers(response, data_version)
+        return response
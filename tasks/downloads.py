@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of a file starting at `start`.
+
+    fileno() is kept so servers with wsgi.file_wrapper (gunicorn) can still
+    use sendfile(); they send Content-Length bytes from the current offset.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def attachment_etag(attachment):
+    # Blobs are content-addressed, so their hash is a strong validator
+    if attachment.blob_id:
+        return f'"{attachment.blob_id}"'
+    return f'"a{attachment.id}-{attachment.file_size}"'
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single `bytes=` range, None to ignore the header,
+    or False when the range cannot be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        # Multipart ranges are rare enough to answer with the whole file
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                return False
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _range_applies(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    return not if_range or if_range in (etag, last_modified)
+
+
+def serve_attachment(request, attachment):
+    """Build the download response for an attachment the caller may read"""
+    etag = attachment_etag(attachment)
+    last_modified = http_date(attachment.uploaded_at.timestamp())
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # If-None-Match uses the weak comparison
+        etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        if '*' in etags or etag in etags:
+            response = HttpResponse(status=304)
+            response['ETag'] = etag
+            return _finish(response, attachment, last_modified)
+
+    # 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) hand the
+    # transfer to the front proxy instead of streaming it from Python
+    mode = settings.TASK_ATTACHMENT_SENDFILE
+    if mode == 'x-accel-redirect':
+        # nginx answers Range requests on internal redirects itself
+        response = HttpResponse(content_type=attachment.file_type)
+        response['X-Accel-Redirect'] = settings.TASK_ATTACHMENT_ACCEL_PREFIX + attachment.file.name
+        response['ETag'] = etag
+        return _finish(response, attachment, last_modified)
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=attachment.file_type)
+        response['X-Sendfile'] = attachment.file.path
+        response['ETag'] = etag
+        return _finish(response, attachment, last_modified)
+
+    try:
+        file = attachment.file.open('rb')
+    except FileNotFoundError:
+        return None
+    size = attachment.file.size
+
+    byte_range = None
+    if _range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _finish(response, attachment, last_modified)
+
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            status=206,
+            content_type=attachment.file_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(file, content_type=attachment.file_type)
+        response['Content-Length'] = str(size)
+    response['ETag'] = etag
+    return _finish(response, attachment, last_modified)
+
+
+def _finish(response, attachment, last_modified):
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, attachment.file_name)
+    # Downloads need the owner's credentials; let the browser keep them but revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
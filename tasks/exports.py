@@ -0,0 +1,91 @@
+import csv
+import json
+from datetime import date, datetime, time
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'custom_category', 'category_name',
+    'default_category', 'status', 'priority', 'date', 'time',
+    'reminder_datetime', 'reminder_sent', 'created_at', 'updated_at',
+]
+
+# Columns read from the database; category_name is resolved in Python
+QUERY_FIELDS = [field for field in EXPORT_FIELDS if field != 'category_name']
+QUERY_FIELDS[QUERY_FIELDS.index('custom_category')] = 'custom_category_id'
+
+CHUNK_SIZE = 2000
+
+
+class ExportRenderer(BaseRenderer):
+    """Only used for error bodies; exports themselves are streamed by the view"""
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def _format_value(value):
+    # Match the formats used by the API serializers
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+
+def export_rows(queryset, category_names):
+    """
+    Yield one dict per task from a server-side cursor.
+
+    Category names come from the preloaded `category_names` dict rather
+    than a join, so memory use does not grow with the number of tasks.
+    """
+    rows = queryset.values_list(*QUERY_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        values = dict(zip(QUERY_FIELDS, row))
+        category_id = values['custom_category_id']
+        values['custom_category'] = category_id
+        values['category_name'] = category_names.get(category_id) or values['default_category']
+        yield {field: _format_value(values[field]) for field in EXPORT_FIELDS}
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(records, batch_size=500):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    batch = []
+    for record in records:
+        batch.append(writer.writerow([record[field] for field in EXPORT_FIELDS]))
+        if len(batch) >= batch_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_ndjson(records, batch_size=500):
+    batch = []
+    for record in records:
+        batch.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if len(batch) >= batch_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
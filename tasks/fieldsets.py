@@ -0,0 +1,54 @@
+def _split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets (?fields=) and opt-in expansion (?expand=) for read actions.
+
+    Without either parameter responses are unchanged. With ?fields= only the
+    listed serializer fields are returned, in serializer order; unknown names
+    are ignored. Expanding a field includes it even when ?fields= leaves it out.
+    """
+    # Fields that ?expand= may name
+    expandable_fields = ()
+    # Actions whose output can be trimmed
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        """Requested field names in serializer order, or None for every field"""
+        if self.action not in self.sparse_actions:
+            return None
+        requested = _split(self.request.query_params.get('fields'))
+        if not requested:
+            return None
+        requested |= self.get_expansions()
+        fields = [name for name in self.get_serializer_class().Meta.fields if name in requested]
+        # Naming only unknown fields is the same as sending no ?fields= at all
+        return fields or None
+
+    def get_expansions(self):
+        if self.action not in self.sparse_actions:
+            return set()
+        return _split(self.request.query_params.get('expand')) & set(self.expandable_fields)
+
+    def is_sparse(self):
+        return self.get_sparse_fields() is not None or bool(self.get_expansions())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.sparse_actions:
+            context['fields'] = self.get_sparse_fields()
+            context['expand'] = self.get_expansions()
+        return context
+
+
+class SparseFieldsSerializerMixin:
+    """Drops the fields the `fields` context entry leaves out"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,266 @@
+import csv
+import io
+import json
+from itertools import islice
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from .models import Task, TaskCategory
+from .statistics import add_task_delta, apply_deltas, new_deltas
+from .versioning import bump_versions
+
+IMPORT_FORMATS = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'jsonl': 'ndjson',
+}
+
+STATUSES = {value for value, _ in Task.STATUS_CHOICES}
+PRIORITIES = {value for value, _ in Task.PRIORITY_CHOICES}
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+DEFAULT_CATEGORY_MAX_LENGTH = Task._meta.get_field('default_category').max_length
+CATEGORY_MAX_LENGTH = TaskCategory._meta.get_field('name').max_length
+
+# Columns written by insert_tasks(), in INSERT order
+INSERT_FIELDS = [field for field in Task._meta.concrete_fields if not field.primary_key]
+
+
+def detect_format(upload, requested=None):
+    """Return 'csv' or 'ndjson' from an explicit format or the file extension"""
+    if requested:
+        return IMPORT_FORMATS.get(requested.lower())
+    extension = upload.name.rsplit('.', 1)[-1].lower() if '.' in upload.name else ''
+    return IMPORT_FORMATS.get(extension)
+
+
+def read_rows(upload, file_format):
+    """Yield (row_number, dict) pairs, reading the uploaded file line by line"""
+    stream = io.TextIOWrapper(upload.open('rb'), encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+        return
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def validate_row(row):
+    """
+    Validate one import row without a serializer round trip.
+
+    Returns (values, category_name, errors); category_name is resolved to a
+    TaskCategory per chunk by the importer.
+    """
+    if row is None:
+        return None, None, {'non_field_errors': ['Row is not a JSON object.']}
+
+    errors = {}
+    values = {}
+
+    title = _text(row, 'title')
+    if not title:
+        errors['title'] = ['This field is required.']
+    elif len(title) > TITLE_MAX_LENGTH:
+        errors['title'] = [f'Ensure this field has no more than {TITLE_MAX_LENGTH} characters.']
+    values['title'] = title
+    values['description'] = _text(row, 'description') or None
+
+    for field, choices in (('status', STATUSES), ('priority', PRIORITIES)):
+        value = _text(row, field) or Task._meta.get_field(field).default
+        if value not in choices:
+            errors[field] = [f'"{value}" is not a valid choice.']
+        values[field] = value
+
+    default_category = _text(row, 'default_category') or 'other'
+    if len(default_category) > DEFAULT_CATEGORY_MAX_LENGTH:
+        errors['default_category'] = [
+            f'Ensure this field has no more than {DEFAULT_CATEGORY_MAX_LENGTH} characters.'
+        ]
+    values['default_category'] = default_category
+
+    raw_date = _text(row, 'date')
+    try:
+        values['date'] = parse_date(raw_date) if raw_date else None
+    except ValueError:
+        values['date'] = None
+    if values['date'] is None:
+        errors['date'] = ['A valid date (YYYY-MM-DD) is required.']
+
+    raw_time = _text(row, 'time')
+    values['time'] = None
+    if raw_time:
+        try:
+            values['time'] = parse_time(raw_time)
+        except ValueError:
+            pass
+        if values['time'] is None:
+            errors['time'] = ['Enter a valid time (HH:MM[:ss]).']
+
+    raw_reminder = _text(row, 'reminder_datetime')
+    values['reminder_datetime'] = None
+    if raw_reminder:
+        try:
+            reminder = parse_datetime(raw_reminder.replace('Z', '+00:00'))
+        except ValueError:
+            reminder = None
+        if reminder is None:
+            errors['reminder_datetime'] = ['Enter a valid ISO 8601 datetime.']
+        elif timezone.is_naive(reminder):
+            reminder = timezone.make_aware(reminder)
+        values['reminder_datetime'] = reminder
+
+    # An exported file names custom categories in category_name next to a custom_category id
+    category_name = _text(row, 'category')
+    if not category_name and _text(row, 'custom_category'):
+        category_name = _text(row, 'category_name')
+    if len(category_name) > CATEGORY_MAX_LENGTH:
+        errors['category'] = [f'Ensure this field has no more than {CATEGORY_MAX_LENGTH} characters.']
+
+    return values, category_name or None, errors
+
+
+def insert_tasks(rows, using):
+    """
+    Insert task rows with one executemany() call.
+
+    bulk_create() spends most of its time building Task instances and
+    compiling one parameter per field per row; import rows are already
+    validated, so only the date/time columns need adapting for the backend.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in INSERT_FIELDS)
+    placeholders = ', '.join(['%s'] * len(INSERT_FIELDS))
+    sql = f'INSERT INTO {quote(Task._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+    adapters = [
+        (index, field) for index, field in enumerate(INSERT_FIELDS)
+        if field.get_internal_type() in ('DateField', 'TimeField', 'DateTimeField')
+    ]
+    # Dates and timestamps repeat heavily within a chunk, so adapt each value once
+    adapted = {}
+    params = []
+    for row in rows:
+        values = [row[field.attname] for field in INSERT_FIELDS]
+        for index, field in adapters:
+            value = values[index]
+            if value is None:
+                continue
+            key = (index, value)
+            if key not in adapted:
+                adapted[key] = field.get_db_prep_value(value, connection)
+            values[index] = adapted[key]
+        params.append(values)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class TaskImporter:
+    """
+    Imports tasks for one user in chunks.
+
+    Each chunk resolves its category names with one query (creating missing
+    categories in bulk) and inserts its tasks with one executemany() inside its
+    own transaction, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, user, chunk_size=1000, max_errors=1000):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.categories = {}
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def resolve_categories(self, names):
+        """Map category names to ids, creating the ones the user does not have yet"""
+        missing = [name for name in names if name not in self.categories]
+        if not missing:
+            return
+        existing = TaskCategory.objects.filter(user=self.user, name__in=missing)
+        self.categories.update(existing.values_list('name', 'id'))
+
+        to_create = [name for name in missing if name not in self.categories]
+        if to_create:
+            TaskCategory.objects.bulk_create(
+                [TaskCategory(user=self.user, name=name) for name in to_create],
+                ignore_conflicts=True
+            )
+            # ignore_conflicts does not return ids; a concurrent import may also have won
+            created = TaskCategory.objects.filter(user=self.user, name__in=to_create)
+            self.categories.update(created.values_list('name', 'id'))
+
+    def import_chunk(self, rows):
+        valid = []
+        names = set()
+        for row_number, row in rows:
+            values, category_name, errors = validate_row(row)
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+            valid.append((values, category_name))
+            if category_name:
+                names.add(category_name)
+
+        if not valid:
+            return
+        self.resolve_categories(names)
+
+        now = timezone.now()
+        rows = []
+        deltas = new_deltas()
+        for values, category_name in valid:
+            values.update(
+                user_id=self.user.pk,
+                custom_category_id=self.categories.get(category_name),
+                reminder_sent=False,
+                created_at=now,
+                updated_at=now,
+            )
+            rows.append(values)
+            add_task_delta(deltas, self.user.pk, values['status'], values['priority'])
+
+        using = router.db_for_write(Task)
+        with transaction.atomic(using=using):
+            insert_tasks(rows, using)
+            apply_deltas(deltas)
+        self.created += len(rows)
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        if self.created:
+            bump_versions([self.user.pk])
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from tasks.cleanup import DEFAULT_GRACE, AttachmentGarbageCollector
+
+
+class Command(BaseCommand):
+    help = 'Delete attachment files that are no longer referenced by any attachment'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=int(DEFAULT_GRACE.total_seconds() // 60),
+            help='Leave unreferenced files younger than this alone (uploads in flight)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+
+    def handle(self, *args, **options):
+        collector = AttachmentGarbageCollector(
+            grace=timedelta(minutes=options['grace_minutes']),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        result = collector.run()
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['deleted']} files, reclaiming {result['reclaimed_bytes']} bytes "
+            f"({result['scanned']} files scanned)"
+        ))
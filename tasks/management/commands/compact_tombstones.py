@@ -0,0 +1,23 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from tasks.sync import TOMBSTONE_RETENTION, compact_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=TOMBSTONE_RETENTION.days,
+            help='Retention window in days (defaults to SYNC_TOMBSTONE_RETENTION_DAYS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = compact_tombstones(
+            retention=timedelta(days=options['days']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones'))
@@ -0,0 +1,52 @@
+import signal
+from django.core.management.base import BaseCommand
+from tasks.reminders import ReminderDispatcher, get_reminder_backend
+
+
+class Command(BaseCommand):
+    help = 'Deliver due task reminders, running until interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Deliver the reminders that are due now and exit',
+        )
+        parser.add_argument(
+            '--backend',
+            help='Dotted path of the reminder backend (defaults to TASK_REMINDER_BACKEND)',
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--poll-interval',
+            type=int,
+            default=60,
+            help='Seconds between scans for new reminders',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=int,
+            default=300,
+            help='Seconds ahead of now to keep reminders in the in-memory schedule',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_reminder_backend(options['backend'])
+        dispatcher = ReminderDispatcher(
+            backend,
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            lookahead=options['lookahead'],
+            stdout=self.stdout,
+        )
+
+        if options['once']:
+            sent = dispatcher.dispatch_due()
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminders'))
+            return
+
+        signal.signal(signal.SIGINT, dispatcher.stop)
+        signal.signal(signal.SIGTERM, dispatcher.stop)
+        self.stdout.write(f'Dispatching reminders with {backend.__class__.__name__}')
+        dispatcher.run()
+        self.stdout.write('Reminder dispatcher stopped')
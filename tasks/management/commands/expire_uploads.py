@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from tasks.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable attachment uploads past their TTL, with their part files'
+
+    def handle(self, *args, **options):
+        expired = expire_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} uploads'))
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from tasks.models import Task, TaskStatistics
+from tasks.statistics import COUNTER_FIELDS, compute_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user task statistics rollups and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report drift; exit with an error if any is found',
+        )
+        parser.add_argument(
+            '--user',
+            dest='username',
+            help='Limit the rebuild to a single user',
+        )
+
+    def handle(self, *args, verify=False, username=None, **options):
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" does not exist')
+
+        user_ids = list(users.values_list('id', flat=True))
+        zero = dict.fromkeys(COUNTER_FIELDS, 0)
+        drifted = 0
+
+        with transaction.atomic():
+            existing = set(
+                TaskStatistics.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+            )
+            missing = [user_id for user_id in user_ids if user_id not in existing]
+            if missing and not verify:
+                # Created before counting so they are locked along with the rest
+                TaskStatistics.objects.bulk_create(
+                    [TaskStatistics(user_id=user_id) for user_id in missing],
+                    batch_size=500,
+                    ignore_conflicts=True
+                )
+            # Lock first, then count: a concurrent delta either committed
+            # before the count or waits and lands on top of the rebuilt row
+            stored = {
+                stats.user_id: stats
+                for stats in TaskStatistics.objects.select_for_update().filter(user_id__in=user_ids)
+            }
+            expected = compute_statistics(Task.objects.filter(user_id__in=user_ids))
+
+            for user_id in user_ids:
+                counts = expected.get(user_id, zero)
+                stats = stored.get(user_id)
+                if stats is None:
+                    # Missing rows are built lazily on read, so they are not drift
+                    continue
+                if user_id in missing:
+                    for field, value in counts.items():
+                        setattr(stats, field, value)
+                    stats.save()
+                    continue
+
+                diff = {
+                    field: (getattr(stats, field), counts[field])
+                    for field in COUNTER_FIELDS
+                    if getattr(stats, field) != counts[field]
+                }
+                if not diff:
+                    continue
+
+                drifted += 1
+                details = ', '.join(
+                    f'{field}: {old} -> {new}' for field, (old, new) in diff.items()
+                )
+                self.stdout.write(self.style.WARNING(f'Drift for user {user_id}: {details}'))
+
+                if not verify:
+                    for field, value in counts.items():
+                        setattr(stats, field, value)
+                    stats.save()
+
+        if verify and drifted:
+            raise CommandError(f'{drifted} of {len(user_ids)} rollups have drifted')
+
+        action = 'Verified' if verify else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} statistics for {len(user_ids)} users ({drifted} drifted)'
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from tasks.seeding import MAX_TASKS, MIN_TASKS, TaskSeeder
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, categories, tasks and attachments for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10_000, help=f'{MIN_TASKS} to {MAX_TASKS}')
+        parser.add_argument('--users', type=int, help='Defaults to one user per 1000 tasks')
+        parser.add_argument('--categories-per-user', type=int, default=4)
+        parser.add_argument('--attachment-ratio', type=float, default=0.1,
+                            help='Share of tasks that get attachments')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for the generated users')
+        parser.add_argument('--password', default='SeedPassword123!')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not MIN_TASKS <= options['tasks'] <= MAX_TASKS:
+            raise CommandError(f'--tasks must be between {MIN_TASKS} and {MAX_TASKS}')
+        if User.objects.filter(username__startswith=f"{options['prefix']}_user_").exists():
+            raise CommandError(f'Users with the prefix "{options["prefix"]}" already exist; pick another --prefix')
+
+        created = TaskSeeder(
+            tasks=options['tasks'],
+            users=options['users'],
+            categories_per_user=options['categories_per_user'],
+            attachment_ratio=options['attachment_ratio'],
+            prefix=options['prefix'],
+            password=options['password'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        ).run()
+        self.stdout.write(self.style.SUCCESS(
+            'Created {users} users, {categories} categories, {tasks} tasks '
+            'and {attachments} attachments'.format(**created)
+        ))
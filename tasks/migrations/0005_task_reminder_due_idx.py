@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_taskdataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('reminder_datetime__isnull', False), ('reminder_sent', False)), fields=['reminder_datetime'], name='tasks_task_reminder_due_idx'),
+        ),
+    ]
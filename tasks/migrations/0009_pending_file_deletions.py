@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_attachment_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingFileDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('enqueued_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_pending_file_deletions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_user_id_27cbfb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_user_id_c0fce1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_user_id_13ec9e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at'], name='tasks_task_user_id_f0f56f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='tasks_task_user_id_1c090a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', 'date', 'created_at'], name='tasks_task_user_id_6228ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'priority', 'created_at'], name='tasks_task_user_id_8d0ce2_idx'),
+        ),
+    ]
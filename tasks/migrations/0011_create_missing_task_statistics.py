@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+STATUS_FIELDS = ['pending', 'in_progress', 'completed']
+PRIORITY_FIELDS = ['urgent', 'high', 'medium', 'low']
+
+
+def create_missing_rollups(apps, schema_editor):
+    """Give every existing user a rollup row; new users get one on creation"""
+    User = apps.get_model('auth', 'User')
+    Task = apps.get_model('tasks', 'Task')
+    TaskStatistics = apps.get_model('tasks', 'TaskStatistics')
+
+    user_ids = list(
+        User.objects.exclude(pk__in=TaskStatistics.objects.values('user_id'))
+        .values_list('pk', flat=True)
+    )
+    annotations = {'total': Count('id')}
+    for field in STATUS_FIELDS:
+        annotations[field] = Count('id', filter=Q(status=field))
+    for field in PRIORITY_FIELDS:
+        annotations[field] = Count('id', filter=Q(priority=field))
+
+    for start in range(0, len(user_ids), 500):
+        batch = user_ids[start:start + 500]
+        counts = {
+            row.pop('user_id'): row
+            for row in Task.objects.filter(user_id__in=batch).order_by()
+            .values('user_id').annotate(**annotations)
+        }
+        TaskStatistics.objects.bulk_create(
+            [TaskStatistics(user_id=user_id, **counts.get(user_id, {})) for user_id in batch],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0010_task_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_rollups, migrations.RunPython.noop),
+    ]
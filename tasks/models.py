@@ -1,5 +1,7 @@
 # tasks/models.py
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class TaskCategory(models.Model):
@@ -9,11 +11,15 @@ class TaskCategory(models.Model):
     color = models.CharField(max_length=7, default='#3B82F6')  # Hex color code
     icon = models.CharField(max_length=50, default='fa-folder')  # FontAwesome icon
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Task Categories'
         unique_together = ['user', 'name']
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
@@ -68,14 +74,29 @@ class Task(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'date']),
-            models.Index(fields=['user', 'status']),
-            models.Index(fields=['user', 'priority']),
+            # Each index ends in the column its queries sort on, so pages come
+            # straight off the index; walked backwards for the -created_at default
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'date', 'created_at']),
+            models.Index(fields=['user', 'status', 'date', 'created_at']),
+            models.Index(fields=['user', 'priority', 'created_at']),
+            models.Index(fields=['user', 'updated_at']),
+            # Only unsent reminders are ever scanned by the dispatcher
+            models.Index(
+                fields=['reminder_datetime'],
+                condition=models.Q(reminder_sent=False, reminder_datetime__isnull=False),
+                name='tasks_task_reminder_due_idx'
+            ),
         ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # Keep the row write and the statistics rollup in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     @property
     def category_name(self):
         """Return custom category name or default category"""
@@ -83,10 +104,95 @@ class Task(models.Model):
             return self.custom_category.name
         return self.default_category
 
+class TaskStatistics(models.Model):
+    """Per-user task counters maintained incrementally on Task writes"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_statistics'
+    )
+    
+    total = models.IntegerField(default=0)
+    
+    # Status buckets
+    pending = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    
+    # Priority buckets
+    low = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+    urgent = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Task Statistics'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.total} tasks"
+
+class TaskDataVersion(models.Model):
+    """Per-user counter bumped on every write to the user's tasks, categories or attachments"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_data_version'
+    )
+    version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.user.username} - v{self.version}"
+
+class SyncTombstone(models.Model):
+    """Records a deletion so delta sync clients can drop their local copy"""
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('category', 'Category'),
+        ('attachment', 'Attachment'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_tombstones')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.kind} {self.object_id}"
+
+class AttachmentBlob(models.Model):
+    """A stored file, shared by every attachment with the same content"""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(upload_to='task_blobs/')
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
 class TaskAttachment(models.Model):
     """File attachments for tasks"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
     file = models.FileField(upload_to='task_attachments/%Y/%m/%d/')
+    # Attachments uploaded before content-addressed storage have no blob
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='attachments'
+    )
     file_name = models.CharField(max_length=255)
     file_size = models.IntegerField()  # Size in bytes
     file_type = models.CharField(max_length=100)  # MIME type
@@ -97,8 +203,27 @@ class TaskAttachment(models.Model):
     
     def __str__(self):
         return f"{self.task.title} - {self.file_name}"
+
+class PendingFileDeletion(models.Model):
+    """A storage file whose last reference is gone, waiting for the garbage collector"""
+    name = models.CharField(max_length=255, unique=True)
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return self.name
+
+class AttachmentUpload(models.Model):
+    """A resumable upload in progress; its bytes live in a part file until finalized"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='uploads')
+    file_name = models.CharField(max_length=255)
+    file_size = models.BigIntegerField()
+    file_type = models.CharField(max_length=100)
+    received = models.BigIntegerField(default=0)
+    # Set while a chunk is being written so concurrent PUTs cannot interleave
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
     
-    def delete(self, *args, **kwargs):
-        # Delete the file from storage when the model is deleted
-        self.file.delete(save=False)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.file_size})"
@@ -0,0 +1,201 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, time
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Opaque-cursor pagination keyed on the full ordering tuple plus the primary key.
+
+    Unlike the position/offset cursors of DRF's CursorPagination, every position
+    is unique, so pages stay stable while rows are inserted concurrently and
+    each page is a single indexed range query however deep the client goes.
+    Pass ?paginate=false to get the previous bare-list response.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    paginate_query_param = 'paginate'
+    ordering = None
+
+    def get_page_size(self, request):
+        if request.query_params.get(self.paginate_query_param, '').lower() in ('false', '0'):
+            return None
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            # Fall back to an ordering already applied, e.g. search rank
+            ordering = self.ordering or queryset.query.order_by or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        ordering = [field for field in ordering if field.lstrip('-') not in ('pk', 'id')]
+        # The primary key makes every position unique
+        tiebreak = '-pk' if ordering and ordering[0].startswith('-') else 'pk'
+        return tuple(ordering) + (tiebreak,)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [self._parse_field(queryset, field) for field in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor['reverse'])
+
+        queryset = queryset.order_by(*self._order_expressions(reverse))
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(self.cursor['position'], reverse))
+
+        # Fetch one extra row to find out whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._position(self.page[-1])
+        return self.encode_cursor({'position': position, 'reverse': False})
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._position(self.page[0])
+        return self.encode_cursor({'position': position, 'reverse': True})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = payload['p']
+            reverse = bool(payload.get('r', 0))
+            signature = payload['o']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only meaningful for the ordering it was issued for
+        if signature != ','.join(self.ordering) or not isinstance(position, list) \
+                or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Positions come from the client; check each against its column
+        try:
+            position = [self._to_python(field, value) for field, value in zip(self.fields, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': reverse}
+
+    def _to_python(self, field, value):
+        if value is None:
+            if not field['nullable']:
+                raise ValueError('NULL position for a non-nullable field')
+            return None
+        if isinstance(value, (dict, list)):
+            raise TypeError('Positions are scalars')
+        return field['field'].to_python(value)
+
+    def encode_cursor(self, cursor):
+        payload = {'p': cursor['position'], 'o': ','.join(self.ordering)}
+        if cursor['reverse']:
+            payload['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _parse_field(self, queryset, ordering):
+        name = ordering.lstrip('-')
+        if name in queryset.query.annotations:
+            return {
+                'name': name,
+                'field': queryset.query.annotations[name].output_field,
+                'descending': ordering.startswith('-'),
+                'nullable': False,
+            }
+        opts = queryset.model._meta
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        return {
+            'name': field.attname,
+            'field': field,
+            'descending': ordering.startswith('-'),
+            'nullable': field.null,
+        }
+
+    def _order_expressions(self, reverse):
+        # NULLs always sort last in the forward direction, on every backend
+        expressions = []
+        for field in self.fields:
+            descending = field['descending'] != reverse
+            nulls = {}
+            if field['nullable']:
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            expression = F(field['name'])
+            expressions.append(expression.desc(**nulls) if descending else expression.asc(**nulls))
+        return expressions
+
+    def _after(self, position, reverse):
+        """Build the keyset predicate selecting rows strictly past `position`"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.fields, position):
+            name = field['name']
+            descending = field['descending'] != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+
+            if value is None:
+                # NULL is last going forward and first going backwards
+                beyond = Q(**{f'{name}__isnull': False}) if reverse else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{lookup: value})
+                if field['nullable'] and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+
+            condition |= equal & beyond
+            equal &= same
+        return condition
+
+    def _position(self, instance):
+        position = []
+        for field in self.fields:
+            if isinstance(instance, dict):
+                value = instance[field['name']]
+            else:
+                value = getattr(instance, field['name'])
+            if isinstance(value, (datetime, date, time)):
+                value = value.isoformat()
+            position.append(value)
+        return position
@@ -0,0 +1,228 @@
+import heapq
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Task
+from .versioning import bump_versions
+
+logger = logging.getLogger('taskflow.reminders')
+
+
+class BaseReminderBackend:
+    """Delivers a batch of due reminders; raising releases the batch for a later retry"""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def format_reminder(self, task):
+        when = timezone.localtime(task.reminder_datetime).strftime('%Y-%m-%d %H:%M')
+        subject = f'Reminder: {task.title}'
+        body = f'Your task "{task.title}" is due on {task.date:%Y-%m-%d} (reminder set for {when}).'
+        return subject, body
+
+    def send_reminders(self, tasks):
+        raise NotImplementedError
+
+
+class ConsoleReminderBackend(BaseReminderBackend):
+    """Writes reminders to stdout, for development"""
+
+    def send_reminders(self, tasks):
+        stream = self.options.get('stream') or sys.stdout
+        for task in tasks:
+            subject, body = self.format_reminder(task)
+            stream.write(f'[{task.user.username}] {subject} - {body}\n')
+        stream.flush()
+
+
+class FileReminderBackend(BaseReminderBackend):
+    """Appends one JSON line per reminder to TASK_REMINDER_FILE_PATH"""
+
+    def send_reminders(self, tasks):
+        path = self.options.get('path') or settings.TASK_REMINDER_FILE_PATH
+        with open(path, 'a', encoding='utf-8') as handle:
+            for task in tasks:
+                subject, body = self.format_reminder(task)
+                handle.write(json.dumps({
+                    'task_id': task.id,
+                    'user_id': task.user_id,
+                    'reminder_datetime': task.reminder_datetime.isoformat(),
+                    'subject': subject,
+                    'body': body,
+                }) + '\n')
+
+
+class EmailReminderBackend(BaseReminderBackend):
+    """Sends reminders through the configured EMAIL_BACKEND over one connection"""
+
+    def send_reminders(self, tasks):
+        messages = []
+        for task in tasks:
+            if not task.user.email:
+                continue
+            subject, body = self.format_reminder(task)
+            messages.append((subject, body, settings.DEFAULT_FROM_EMAIL, [task.user.email]))
+        if messages:
+            send_mass_mail(messages, fail_silently=False)
+
+
+def get_reminder_backend(path=None, **options):
+    backend_class = import_string(path or settings.TASK_REMINDER_BACKEND)
+    return backend_class(**options)
+
+
+class ReminderDispatcher:
+    """
+    Delivers due task reminders.
+
+    Upcoming reminders inside the lookahead window are loaded into an in-memory
+    heap on each poll, so the loop sleeps until the next one is due instead of
+    querying the table every second. Due reminders are claimed in batches with
+    SELECT ... FOR UPDATE SKIP LOCKED and marked sent in a short transaction
+    that commits before delivery, so a slow mail server never holds the
+    database write lock and several dispatchers can run side by side.
+
+    A batch whose delivery raises is released again and skipped for a backoff
+    that doubles with each failure, so later reminders keep going out. After
+    `max_attempts` failures its reminders are dropped. A dispatcher killed
+    between claiming and delivering drops that batch rather than sending it
+    twice.
+    """
+
+    def __init__(self, backend, batch_size=100, poll_interval=60, lookahead=300, stdout=None,
+                 retry_delay=30, max_retry_delay=3600, max_attempts=5):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lookahead = timedelta(seconds=lookahead)
+        self.stdout = stdout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.heap = []
+        # Task id -> (failed attempts, monotonic time before which it is not retried)
+        self.backoff = {}
+        self.stopped = threading.Event()
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def schedule_upcoming(self, now=None):
+        """Reload the heap with the reminders due within the lookahead window"""
+        now = now or timezone.now()
+        upcoming = Task.objects.filter(
+            reminder_sent=False,
+            reminder_datetime__lte=now + self.lookahead
+        ).order_by('reminder_datetime').values_list('reminder_datetime', 'id')
+        self.heap = list(upcoming[:self.batch_size * 10])
+        heapq.heapify(self.heap)
+
+    def backing_off(self):
+        clock = time.monotonic()
+        return [task_id for task_id, (_, retry_at) in self.backoff.items() if retry_at > clock]
+
+    def claim_due(self, now=None):
+        """Mark one batch of due reminders sent and commit; return its tasks"""
+        now = now or timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                Task.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('user')
+                .filter(reminder_sent=False, reminder_datetime__lte=now)
+                .exclude(id__in=self.backing_off())
+                .order_by('reminder_datetime')[:self.batch_size]
+            )
+            if tasks:
+                Task.objects.filter(id__in=[task.id for task in tasks]).update(
+                    reminder_sent=True,
+                    updated_at=timezone.now()
+                )
+                bump_versions({task.user_id for task in tasks})
+        return tasks
+
+    def deliver(self, tasks):
+        """Send a claimed batch; on failure release it for a later retry. Return how many were sent"""
+        try:
+            self.backend.send_reminders(tasks)
+        except Exception:
+            logger.exception('Delivering %d reminders failed', len(tasks))
+            self.release(tasks)
+            return 0
+        for task in tasks:
+            self.backoff.pop(task.id, None)
+        return len(tasks)
+
+    def release(self, tasks):
+        retry = []
+        for task in tasks:
+            attempts = self.backoff.get(task.id, (0, 0))[0] + 1
+            if attempts >= self.max_attempts:
+                self.backoff.pop(task.id, None)
+                logger.error('Dropping the reminder of task %s after %d failed attempts', task.id, attempts)
+                continue
+            delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+            self.backoff[task.id] = (attempts, time.monotonic() + delay)
+            retry.append(task)
+        if retry:
+            Task.objects.filter(id__in=[task.id for task in retry]).update(
+                reminder_sent=False,
+                updated_at=timezone.now()
+            )
+            bump_versions({task.user_id for task in retry})
+
+    def claim_and_send(self, now=None):
+        """Deliver one batch of due reminders; return how many were sent"""
+        tasks = self.claim_due(now)
+        return self.deliver(tasks) if tasks else 0
+
+    def dispatch_due(self, now=None):
+        """Send every reminder that is due, batch by batch"""
+        now = now or timezone.now()
+        sent = 0
+        while not self.stopped.is_set():
+            tasks = self.claim_due(now)
+            if tasks:
+                sent += self.deliver(tasks)
+            if len(tasks) < self.batch_size:
+                break
+        while self.heap and self.heap[0][0] <= now:
+            heapq.heappop(self.heap)
+        if sent:
+            self.log(f'Sent {sent} reminders')
+        return sent
+
+    def run(self, once=False):
+        next_poll = 0
+        while not self.stopped.is_set():
+            try:
+                if time.monotonic() >= next_poll:
+                    self.schedule_upcoming()
+                    next_poll = time.monotonic() + self.poll_interval
+
+                now = timezone.now()
+                if self.heap and self.heap[0][0] <= now:
+                    self.dispatch_due(now)
+            except Exception:
+                # A locked or unreachable database; try again on the next poll
+                logger.exception('Reminder dispatch failed')
+                next_poll = time.monotonic() + self.poll_interval
+                self.heap = []
+            if once:
+                break
+
+            wait = next_poll - time.monotonic()
+            if self.heap:
+                wait = min(wait, (self.heap[0][0] - timezone.now()).total_seconds())
+            self.stopped.wait(max(wait, 0.05))
+
+    def stop(self, *args):
+        self.stopped.set()
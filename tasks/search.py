@@ -0,0 +1,157 @@
+import re
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = 'tasks_task_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# SQLite: an external-content FTS5 table over tasks_task, kept in sync by triggers
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+]
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f'{FTS_TABLE}_ad': f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f'{FTS_TABLE}_au': f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+}
+
+# PostgreSQL: a GIN expression index, which the planner keeps in sync by itself
+PG_VECTOR = (
+    "to_tsvector('simple', coalesce({table}.title, '') || ' ' || coalesce({table}.description, ''))"
+)
+PG_SCHEMA = [
+    "CREATE INDEX IF NOT EXISTS tasks_task_search_idx ON tasks_task USING GIN ("
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '')))",
+]
+
+_available = {}
+
+
+def search_vendor(connection):
+    """Return the full-text backend for a connection, or None to fall back to icontains"""
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return None
+    if connection.alias not in _available:
+        _available[connection.alias] = _index_exists(connection)
+    return connection.vendor if _available[connection.alias] else None
+
+
+def _index_exists(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        else:
+            cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'tasks_task_search_idx'")
+        return cursor.fetchone() is not None
+
+
+def ensure_search_index(using='default'):
+    """
+    Create the full-text index for the configured backend if it is missing.
+
+    Runs after every migrate: SQLite table rebuilds drop the sync triggers, so
+    they are recreated here and the index is rebuilt if any had gone missing.
+    """
+    connection = connections[using]
+    _available.pop(using, None)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in PG_SCHEMA:
+                cursor.execute(statement)
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_task'")
+            if cursor.fetchone() is None:
+                return
+            try:
+                for statement in SQLITE_SCHEMA:
+                    cursor.execute(statement)
+            except Exception:
+                # SQLite built without FTS5; search falls back to icontains
+                return
+
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'tasks_task'"
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(SQLITE_TRIGGERS[name])
+            if missing:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_tasks(queryset, text):
+    """
+    Filter a Task queryset by full-text match and annotate it with `search_rank`.
+
+    Every word is matched as a prefix and all words must match. Returns None
+    when the database has no full-text index.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return queryset
+    vendor = search_vendor(connections[queryset.db])
+    table = queryset.model._meta.db_table
+
+    if vendor == 'sqlite':
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        # bm25 is lower-is-better; negate so higher ranks sort first everywhere
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+            [query],
+            output_field=FloatField(),
+        )
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+    if vendor == 'postgresql':
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        vector = PG_VECTOR.format(table=table)
+        rank = RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple', %s))::float8",
+            [query],
+            output_field=FloatField(),
+        )
+        matches = RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)",
+            [query],
+            output_field=BooleanField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    return None
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """SearchFilter backed by the full-text index, ranking results unless ?ordering is given"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        results = search_tasks(queryset, ' '.join(terms))
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        if 'search_rank' in results.query.annotations:
+            results = results.order_by('-search_rank')
+        return results
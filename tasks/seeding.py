@@ -0,0 +1,149 @@
+import random
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .models import Task, TaskAttachment, TaskCategory
+
+MIN_TASKS = 1_000
+MAX_TASKS = 1_000_000
+
+DEFAULT_CATEGORIES = ['work', 'personal', 'shopping', 'health', 'other']
+CATEGORY_NAMES = ['Work', 'Home', 'Errands', 'Fitness', 'Study', 'Finance', 'Travel', 'Side project']
+COLORS = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899']
+ICONS = ['fa-folder', 'fa-briefcase', 'fa-home', 'fa-dumbbell', 'fa-book', 'fa-plane']
+VERBS = ['Review', 'Write', 'Call', 'Plan', 'Fix', 'Book', 'Buy', 'Prepare', 'Send', 'Clean']
+OBJECTS = ['report', 'dentist', 'groceries', 'slides', 'invoice', 'flight', 'garage', 'budget', 'email', 'bug']
+ATTACHMENT_TYPES = [
+    ('pdf', 'application/pdf'),
+    ('png', 'image/png'),
+    ('jpg', 'image/jpeg'),
+    ('txt', 'text/plain'),
+]
+
+# Weights for (status, priority): most tasks are open and of medium priority
+STATUS_WEIGHTS = {'pending': 5, 'in_progress': 2, 'completed': 3}
+PRIORITY_WEIGHTS = {'low': 2, 'medium': 5, 'high': 2, 'urgent': 1}
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class TaskSeeder:
+    """
+    Generates synthetic users, categories, tasks and attachments with bulk_create.
+
+    Tasks are spread over the users with a long tail (a few heavy users,
+    many light ones) and dated around today, so the today/upcoming/overdue
+    actions all have rows to return. Attachment rows point at file names
+    that are never written; downloads of seeded attachments answer 404.
+    Rows are generated lazily and written `batch_size` at a time, so memory
+    use does not grow with the number of tasks.
+    """
+
+    def __init__(self, tasks, users=None, categories_per_user=4, attachment_ratio=0.1,
+                 prefix='seed', password='SeedPassword123!', seed=0, batch_size=5000):
+        self.tasks = tasks
+        self.users = users or max(1, tasks // 1000)
+        self.categories_per_user = categories_per_user
+        self.attachment_ratio = attachment_ratio
+        self.prefix = prefix
+        self.password = password
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.today = date.today()
+
+    def create_users(self):
+        # One hash for every user; hashing per row would dominate the run
+        password = make_password(self.password)
+        users = User.objects.bulk_create(
+            [
+                User(username=f'{self.prefix}_user_{n}', email=f'{self.prefix}_user_{n}@example.com',
+                     password=password)
+                for n in range(self.users)
+            ],
+            batch_size=self.batch_size
+        )
+        return [user.pk for user in users]
+
+    def create_categories(self, user_ids):
+        categories = TaskCategory.objects.bulk_create(
+            [
+                TaskCategory(
+                    user_id=user_id,
+                    name=name,
+                    color=self.random.choice(COLORS),
+                    icon=self.random.choice(ICONS)
+                )
+                for user_id in user_ids
+                for name in self.random.sample(CATEGORY_NAMES, min(self.categories_per_user, len(CATEGORY_NAMES)))
+            ],
+            batch_size=self.batch_size
+        )
+        by_user = {user_id: [] for user_id in user_ids}
+        for category in categories:
+            by_user[category.user_id].append(category.pk)
+        return by_user
+
+    def task_owners(self, user_ids):
+        # Pareto weights give a handful of users most of the tasks
+        weights = [self.random.paretovariate(1.2) for _ in user_ids]
+        return self.random.choices(user_ids, weights=weights, k=self.tasks)
+
+    def make_task(self, user_id, category_ids):
+        rnd = self.random
+        status = rnd.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+        task_date = self.today + timedelta(days=int(rnd.gauss(0, 20)))
+        reminder = None
+        if rnd.random() < 0.2:
+            reminder = timezone.make_aware(datetime.combine(task_date, time(9))) - timedelta(hours=1)
+        return Task(
+            user_id=user_id,
+            title=f'{rnd.choice(VERBS)} {rnd.choice(OBJECTS)}',
+            description=f'Seeded task for {rnd.choice(OBJECTS)}' if rnd.random() < 0.6 else None,
+            custom_category_id=rnd.choice(category_ids) if category_ids and rnd.random() < 0.5 else None,
+            default_category=rnd.choice(DEFAULT_CATEGORIES),
+            status=status,
+            priority=rnd.choices(list(PRIORITY_WEIGHTS), weights=list(PRIORITY_WEIGHTS.values()))[0],
+            date=task_date,
+            time=time(rnd.randrange(7, 21), rnd.choice((0, 15, 30, 45))) if rnd.random() < 0.4 else None,
+            reminder_datetime=reminder,
+            reminder_sent=reminder is not None and status == 'completed',
+        )
+
+    def make_attachments(self, task):
+        extension, file_type = self.random.choice(ATTACHMENT_TYPES)
+        return [
+            TaskAttachment(
+                task_id=task.pk,
+                file=f'task_attachments/{self.prefix}/{task.pk}_{n}.{extension}',
+                file_name=f'attachment_{n}.{extension}',
+                file_size=self.random.randrange(1024, 5 * 1024 * 1024),
+                file_type=file_type
+            )
+            for n in range(self.random.choice((1, 1, 1, 2, 3)))
+        ]
+
+    def run(self):
+        user_ids = self.create_users()
+        categories = self.create_categories(user_ids)
+        owners = self.task_owners(user_ids)
+
+        created = {'users': len(user_ids), 'categories': sum(map(len, categories.values())),
+                   'tasks': 0, 'attachments': 0}
+        tasks = (self.make_task(user_id, categories[user_id]) for user_id in owners)
+        for batch in _batched(tasks, self.batch_size):
+            batch = Task.objects.bulk_create(batch)
+            attachments = [
+                attachment
+                for task in batch if self.random.random() < self.attachment_ratio
+                for attachment in self.make_attachments(task)
+            ]
+            TaskAttachment.objects.bulk_create(attachments)
+            created['tasks'] += len(batch)
+            created['attachments'] += len(attachments)
+        return created
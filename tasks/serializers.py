@@ -1,7 +1,10 @@
 from rest_framework import serializers
-from .models import Task, TaskCategory, TaskAttachment
+from django.conf import settings
+from .attachments import create_attachment
+from .fieldsets import SparseFieldsSerializerMixin
+from .models import Task, TaskCategory, TaskAttachment, AttachmentUpload
 
-class TaskCategorySerializer(serializers.ModelSerializer):
+class TaskCategorySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     task_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -10,6 +13,10 @@ class TaskCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_task_count(self, obj):
+        # Use the annotated count from the viewset queryset when available
+        task_count = getattr(obj, 'task_count', None)
+        if task_count is not None:
+            return task_count
         return obj.tasks.count()
     
     def validate_color(self, value):
@@ -32,7 +39,32 @@ class TaskAttachmentSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.file.url)
         return None
 
-class TaskSerializer(serializers.ModelSerializer):
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    file_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    
+    class Meta:
+        model = AttachmentUpload
+        fields = ['id', 'file_name', 'file_size', 'file_type', 'received', 'expires_at']
+        read_only_fields = ['id', 'received', 'expires_at']
+    
+    def validate_file_size(self, value):
+        max_size = settings.TASK_UPLOAD_MAX_SIZE
+        if value <= 0:
+            raise serializers.ValidationError("File size must be positive")
+        if value > max_size:
+            raise serializers.ValidationError(
+                f"File size must be less than {max_size // (1024 * 1024)}MB"
+            )
+        return value
+
+class TaskCategorySummarySerializer(serializers.ModelSerializer):
+    """Category nested in a task with ?expand=custom_category"""
+    
+    class Meta:
+        model = TaskCategory
+        fields = ['id', 'name', 'color', 'icon']
+
+class TaskSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     attachments = TaskAttachmentSerializer(many=True, read_only=True)
     category_name = serializers.ReadOnlyField()
     custom_category_name = serializers.CharField(
@@ -50,22 +82,59 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'reminder_sent']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'custom_category' in self.context.get('expand', ()) and 'custom_category' in self.fields:
+            self.fields['custom_category'] = TaskCategorySummarySerializer(read_only=True)
+    
     def validate_title(self, value):
         if len(value.strip()) == 0:
             raise serializers.ValidationError("Title cannot be empty")
         return value
     
+    def update(self, instance, validated_data):
+        # A moved reminder has to fire again
+        if 'reminder_datetime' in validated_data \
+                and validated_data['reminder_datetime'] != instance.reminder_datetime:
+            validated_data['reminder_sent'] = False
+        return super().update(instance, validated_data)
+    
     def validate(self, attrs):
         # If custom_category is provided, ensure it belongs to the user
         custom_category = attrs.get('custom_category')
         if custom_category:
             request = self.context.get('request')
-            if request and custom_category.user != request.user:
+            if request and custom_category.user_id != request.user.id:
                 raise serializers.ValidationError({
                     'custom_category': 'You can only use your own categories'
                 })
         return attrs
 
+class PreloadedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Resolves custom_category from the `categories` dict in the serializer context"""
+    
+    def to_internal_value(self, data):
+        categories = self.context.get('categories')
+        if categories is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            category = categories.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
+
+class TaskBulkSerializer(TaskSerializer):
+    """Validates one item of a bulk payload without querying per item"""
+    custom_category = PreloadedCategoryField(
+        queryset=TaskCategory.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
 class TaskCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating tasks with file uploads"""
     attachment_files = serializers.ListField(
@@ -88,12 +157,6 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         
         # Create attachments
         for file in attachment_files:
-            TaskAttachment.objects.create(
-                task=task,
-                file=file,
-                file_name=file.name,
-                file_size=file.size,
-                file_type=file.content_type
-            )
+            create_attachment(task, file)
         
         return task
\ No newline at end of file
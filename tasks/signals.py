@@ -0,0 +1,142 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.utils import timezone
+from django.dispatch import receiver
+from .models import Task, TaskCategory, TaskAttachment, AttachmentUpload, TaskStatistics
+from .attachments import release_blobs
+from .cleanup import enqueue_file_deletions
+from .search import ensure_search_index
+from .statistics import add_task_delta, apply_deltas, new_deltas
+from .sync import record_tombstones
+from .uploads import forget_digest, part_path, remove_part_file
+from .versioning import bump_versions
+
+
+def _snapshot(instance):
+    # Read from __dict__ so deferred fields are not fetched just to be tracked
+    values = instance.__dict__
+    return (values.get('user_id'), values.get('status'), values.get('priority'))
+
+
+@receiver(post_save, sender=User)
+def create_task_statistics(sender, instance, created, raw=False, **kwargs):
+    # Exists before the user's first task, so no counter delta has a row to miss
+    if created and not raw:
+        TaskStatistics.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Task)
+def remember_task_counters(sender, instance, **kwargs):
+    instance._statistics_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_statistics_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _snapshot(instance)
+    deltas = new_deltas()
+    if created:
+        add_task_delta(deltas, *current)
+    else:
+        # Fields missing from the snapshot were deferred and therefore unchanged
+        previous = tuple(
+            old if old is not None else new
+            for old, new in zip(instance._statistics_snapshot, current)
+        )
+        if previous != current:
+            add_task_delta(deltas, *previous, sign=-1)
+            add_task_delta(deltas, *current)
+    apply_deltas(deltas)
+    instance._statistics_snapshot = current
+
+
+@receiver(post_delete, sender=Task)
+def update_statistics_on_delete(sender, instance, **kwargs):
+    previous = tuple(
+        old if old is not None else new
+        for old, new in zip(instance._statistics_snapshot, _snapshot(instance))
+    )
+    deltas = new_deltas()
+    add_task_delta(deltas, *previous, sign=-1)
+    apply_deltas(deltas)
+
+
+def _cascaded_from(origin, *models):
+    # origin is the instance or queryset whose delete() started the cascade
+    if origin is None:
+        return False
+    return isinstance(origin, models) or getattr(origin, 'model', None) in models
+
+
+def _attachment_user_id(instance):
+    if TaskAttachment.task.is_cached(instance):
+        return instance.task.user_id
+    return Task.objects.filter(pk=instance.task_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=TaskCategory)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=TaskCategory)
+def bump_version_on_write(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or _cascaded_from(origin, User):
+        return
+    bump_versions([instance.user_id])
+
+
+@receiver(post_save, sender=TaskAttachment)
+@receiver(post_delete, sender=TaskAttachment)
+def bump_version_on_attachment_write(sender, instance, raw=False, origin=None, **kwargs):
+    # The task or user being deleted bumps the version itself
+    if raw or _cascaded_from(origin, User, Task):
+        return
+    bump_versions([_attachment_user_id(instance)])
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from(origin, User):
+        record_tombstones(instance.user_id, 'task', [instance.pk])
+
+
+@receiver(post_delete, sender=TaskCategory)
+def record_category_tombstone(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from(origin, User):
+        record_tombstones(instance.user_id, 'category', [instance.pk])
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def record_attachment_tombstone(sender, instance, origin=None, **kwargs):
+    # Clients drop attachments together with their task
+    if not _cascaded_from(origin, User, Task):
+        record_tombstones(_attachment_user_id(instance), 'attachment', [instance.pk])
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def release_attachment_file(sender, instance, **kwargs):
+    # Runs for cascades and queryset deletes too, so no file outlives its rows
+    if instance.blob_id:
+        release_blobs([instance.blob_id])
+    else:
+        enqueue_file_deletions([instance.file.name])
+
+
+@receiver(post_delete, sender=AttachmentUpload)
+def remove_upload_part_file(sender, instance, **kwargs):
+    # The pk is cleared once the delete returns, so resolve the path now
+    path = part_path(instance)
+    forget_digest(instance.pk)
+    transaction.on_commit(lambda: remove_part_file(path))
+
+
+@receiver(pre_delete, sender=TaskCategory)
+def touch_tasks_of_deleted_category(sender, instance, origin=None, **kwargs):
+    # SET_NULL is a plain UPDATE; touch the tasks so delta sync re-sends them
+    if not _cascaded_from(origin, User):
+        Task.objects.filter(custom_category=instance).update(updated_at=timezone.now())
+
+
+def create_search_index(sender, using='default', **kwargs):
+    ensure_search_index(using)
@@ -0,0 +1,128 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from django.db import transaction
+from django.db.models import Count, F, Q
+from .models import Task, TaskStatistics
+
+STATUS_FIELDS = ['pending', 'in_progress', 'completed']
+PRIORITY_FIELDS = ['urgent', 'high', 'medium', 'low']
+COUNTER_FIELDS = ['total'] + STATUS_FIELDS + PRIORITY_FIELDS
+
+# Statuses that still count towards the overdue bucket
+OPEN_STATUSES = ['pending', 'in_progress']
+
+# Deltas collected while a deferred_statistics() block is active
+_pending_deltas = ContextVar('pending_statistics_deltas', default=None)
+
+
+def add_task_delta(deltas, user_id, status, priority, sign=1):
+    """Accumulate the counters a single task contributes into deltas[user_id]"""
+    if user_id is None:
+        return
+    counters = deltas[user_id]
+    counters['total'] += sign
+    if status in STATUS_FIELDS:
+        counters[status] += sign
+    if priority in PRIORITY_FIELDS:
+        counters[priority] += sign
+
+
+def new_deltas():
+    return defaultdict(Counter)
+
+
+def apply_deltas(deltas):
+    """
+    Apply accumulated counter deltas with one UPDATE per user.
+
+    Every user gets a rollup row when the account is created. Users that
+    still have none (bulk-created accounts) are skipped: their row is built
+    from scratch the first time statistics are read.
+    """
+    pending = _pending_deltas.get()
+    if pending is not None:
+        for user_id, counters in deltas.items():
+            pending[user_id].update(counters)
+        return
+
+    for user_id, counters in deltas.items():
+        changes = {
+            field: F(field) + value
+            for field, value in counters.items()
+            if value
+        }
+        if changes:
+            TaskStatistics.objects.filter(user_id=user_id).update(**changes)
+
+
+@contextmanager
+def deferred_statistics():
+    """Merge every delta applied inside the block into one UPDATE per user at the end"""
+    if _pending_deltas.get() is not None:
+        yield
+        return
+    deltas = new_deltas()
+    token = _pending_deltas.set(deltas)
+    try:
+        yield
+    finally:
+        _pending_deltas.reset(token)
+    apply_deltas(deltas)
+
+
+def _counter_annotations():
+    annotations = {'total': Count('id')}
+    for field in STATUS_FIELDS:
+        annotations[field] = Count('id', filter=Q(status=field))
+    for field in PRIORITY_FIELDS:
+        annotations[field] = Count('id', filter=Q(priority=field))
+    return annotations
+
+
+def compute_statistics(queryset=None):
+    """Count every rollup bucket per user in a single grouped query"""
+    if queryset is None:
+        queryset = Task.objects.all()
+    rows = queryset.order_by().values('user_id').annotate(**_counter_annotations())
+    return {
+        row['user_id']: {field: row[field] for field in COUNTER_FIELDS}
+        for row in rows
+    }
+
+
+def rebuild_user_statistics(user_id):
+    """
+    Recompute a user's rollup row from the tasks table.
+
+    The row is created and locked before counting, so a concurrent
+    apply_deltas() either commits before the count (and is included in it)
+    or waits on the lock and applies its delta on top of the rebuilt row.
+    """
+    with transaction.atomic():
+        stats, _ = TaskStatistics.objects.select_for_update().get_or_create(user_id=user_id)
+        counts = compute_statistics(Task.objects.filter(user_id=user_id)).get(user_id)
+        if counts is None:
+            counts = dict.fromkeys(COUNTER_FIELDS, 0)
+        for field, value in counts.items():
+            setattr(stats, field, value)
+        stats.save()
+    return stats
+
+
+def get_user_statistics(user):
+    """Return the user's rollup row, building it on first access"""
+    try:
+        return TaskStatistics.objects.get(user=user)
+    except TaskStatistics.DoesNotExist:
+        return rebuild_user_statistics(user.pk)
+
+
+def date_buckets(queryset, today=None):
+    """Count the date-dependent buckets, which cannot be maintained incrementally"""
+    today = today or date.today()
+    return queryset.order_by().filter(date__lte=today).aggregate(
+        overdue=Count('id', filter=Q(date__lt=today, status__in=OPEN_STATUSES)),
+        today=Count('id', filter=Q(date=today)),
+    )
@@ -0,0 +1,95 @@
+import json
+import re
+import zlib
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from .fast_serializers import serialize_tasks
+
+# Rows fetched per database round trip and serialized per batch
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    Opt-in with ?format=json-stream on list-style actions.
+
+    The view streams the body through stream(); render() only handles
+    ordinary responses such as error bodies, exactly like JSONRenderer.
+    """
+    format = 'json-stream'
+
+    def encode_batch(self, items):
+        # The same encoding as JSONRenderer.render(), minus the enclosing brackets
+        text = json.dumps(
+            items,
+            cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        )
+        return text[1:-1].replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+    def stream(self, batches):
+        """Yield a JSON array one batch of items at a time"""
+        # Sent before the first query runs so clients see the response start at once
+        yield b'['
+        separator = b''
+        for batch in batches:
+            if batch:
+                yield separator + self.encode_batch(batch).encode('utf-8')
+                separator = b','
+        yield b']'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """A JSON array response whose memory use does not grow with its length"""
+
+    def __init__(self, batches, renderer=None, **kwargs):
+        renderer = renderer or StreamingJSONRenderer()
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(renderer.stream(batches), **kwargs)
+
+
+def batched(iterable, size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def task_batches(rows, request=None, fields=None, expand=(), batch_size=BATCH_SIZE):
+    """Serialize task_rows() from a server-side cursor, one batch at a time"""
+    for batch in batched(rows.iterator(chunk_size=CHUNK_SIZE), batch_size):
+        yield serialize_tasks(batch, request, fields, expand)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        # Flushing per chunk keeps the early first byte; chunks are whole batches
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_streaming_response(request, response):
+    """Gzip a streamed response on the fly when the client accepts it"""
+    if not settings.TASK_STREAM_GZIP or response.has_header('Content-Encoding'):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if not _accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        return response
+    response.streaming_content = _gzip_stream(response.streaming_content)
+    response['Content-Encoding'] = 'gzip'
+    return response
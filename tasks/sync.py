@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import SyncTombstone
+
+TOKEN_SALT = 'tasks.sync'
+
+# Changes are re-sent from slightly before the token so rows written by
+# transactions still in flight when the token was issued are not missed
+SYNC_OVERLAP = timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5))
+TOMBSTONE_RETENTION = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Tombstones collected while a deferred_tombstones() block is active
+_pending_tombstones = ContextVar('pending_tombstones', default=None)
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+def encode_token(moment):
+    return signing.dumps({'t': moment.isoformat()}, salt=TOKEN_SALT, compress=True)
+
+
+def decode_token(token):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+        moment = parse_datetime(payload['t'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidSyncToken(token)
+    if moment is None:
+        raise InvalidSyncToken(token)
+    return moment
+
+
+def record_tombstones(user_id, kind, object_ids):
+    """Store deletion markers, in one INSERT per call or per deferred block"""
+    tombstones = [
+        SyncTombstone(user_id=user_id, kind=kind, object_id=object_id)
+        for object_id in object_ids
+    ]
+    if not tombstones or user_id is None:
+        return
+    pending = _pending_tombstones.get()
+    if pending is not None:
+        pending.extend(tombstones)
+        return
+    SyncTombstone.objects.bulk_create(tombstones)
+
+
+@contextmanager
+def deferred_tombstones():
+    if _pending_tombstones.get() is not None:
+        yield
+        return
+    tombstones = []
+    token = _pending_tombstones.set(tombstones)
+    try:
+        yield
+    finally:
+        _pending_tombstones.reset(token)
+    if tombstones:
+        SyncTombstone.objects.bulk_create(tombstones, batch_size=500)
+
+
+def compact_tombstones(retention=None, batch_size=1000):
+    """Delete tombstones older than the retention window; return how many went"""
+    cutoff = timezone.now() - (retention or TOMBSTONE_RETENTION)
+    deleted = 0
+    while True:
+        ids = list(
+            SyncTombstone.objects.filter(deleted_at__lt=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += SyncTombstone.objects.filter(id__in=ids).delete()[0]
+
+
+def needs_reset(since):
+    """A token older than the retention window may have lost tombstones"""
+    return since < timezone.now() - TOMBSTONE_RETENTION
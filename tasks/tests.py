@@ -1,3 +1,1486 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import tracemalloc
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, time as datetime_time, timedelta
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from .attachments import create_attachment
+from .caching import cache_counters
+from .cleanup import AttachmentGarbageCollector
+from .fast_serializers import serialize_tasks, task_rows
+from .models import (
+    AttachmentBlob, AttachmentUpload, PendingFileDeletion, Task, TaskAttachment, TaskCategory,
+    TaskDataVersion, TaskStatistics
+)
+from .reminders import BaseReminderBackend, EmailReminderBackend, ReminderDispatcher
+from .search import search_tasks
+from .seeding import TaskSeeder
+from .serializers import TaskSerializer
+from .statistics import COUNTER_FIELDS, compute_statistics
+from .sync import TOMBSTONE_RETENTION, encode_token
+from .uploads import forget_digest, part_path
 
-# Create your tests here.
+
+class TaskCategoryTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('categorizer', password='CategorizerPassword123!')
+        other = User.objects.create_user('outsider', password='OutsiderPassword123!')
+        cls.work = TaskCategory.objects.create(user=cls.user, name='Work')
+        cls.home = TaskCategory.objects.create(user=cls.user, name='Home')
+        cls.empty = TaskCategory.objects.create(user=cls.user, name='Empty')
+        for n in range(3):
+            Task.objects.create(user=cls.user, title=f'Work {n}', date=date(2025, 1, 1), custom_category=cls.work)
+        Task.objects.create(user=cls.user, title='Home', date=date(2025, 1, 1), custom_category=cls.home)
+        Task.objects.create(user=cls.user, title='Uncategorized', date=date(2025, 1, 1))
+        Task.objects.create(user=other, title='Elsewhere', date=date(2025, 1, 1))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def counts(self, **params):
+        response = self.client.get('/api/categories/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(category['name'], category['task_count']) for category in response.data['results']]
+
+    def test_task_count_is_annotated(self):
+        self.assertEqual(sorted(self.counts()), [('Empty', 0), ('Home', 1), ('Work', 3)])
+        response = self.client.get(f'/api/categories/{self.work.id}/')
+        self.assertEqual(response.data['task_count'], 3)
+
+    def test_categories_can_be_ordered_by_task_count(self):
+        self.assertEqual(self.counts(ordering='-task_count'), [('Work', 3), ('Home', 1), ('Empty', 0)])
+        self.assertEqual(self.counts(ordering='task_count'), [('Empty', 0), ('Home', 1), ('Work', 3)])
+        self.assertEqual([name for name, _ in self.counts(ordering='name')], ['Empty', 'Home', 'Work'])
+
+    def test_list_query_count_does_not_grow_with_categories(self):
+        # The first read also creates the user's data version row
+        self.client.get('/api/categories/')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/categories/')
+        for n in range(10):
+            category = TaskCategory.objects.create(user=self.user, name=f'Extra {n}')
+            Task.objects.create(user=self.user, title=f'Extra {n}', date=date(2025, 1, 1), custom_category=category)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/categories/')
+        self.assertEqual(len(response.data['results']), 13)
+        self.assertEqual(len(many), len(few))
+
+
+class TaskExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', password='ExportPassword123!')
+        cls.category = TaskCategory.objects.create(user=cls.user, name='Work')
+        Task.objects.bulk_create(
+            [
+                Task(
+                    user=cls.user,
+                    title=f'Task {i}',
+                    description='Exported task',
+                    custom_category=cls.category if i % 2 else None,
+                    priority='high' if i % 3 == 0 else 'medium',
+                    date=date(2025, 1, 2) if i % 10 == 0 else date(2025, 1, 1),
+                )
+                for i in range(100_000)
+            ],
+            batch_size=5000,
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def consume(self, response):
+        """Read a streamed response, tracking peak Python memory while doing so"""
+        tracemalloc.start()
+        try:
+            rows = 0
+            first = None
+            for chunk in response.streaming_content:
+                text = chunk.decode('utf-8')
+                if first is None:
+                    first = text.splitlines()[0]
+                rows += text.count('\n')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return rows, first, peak
+
+    def test_csv_export_streams_100k_tasks_in_bounded_memory(self):
+        response = self.client.get('/api/tasks/export/?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        rows, header, peak = self.consume(response)
+        self.assertEqual(rows, 100_001)
+        self.assertTrue(header.startswith('id,title,description,custom_category,category_name'))
+        self.assertLess(peak, 8 * 1024 * 1024)
+
+    def test_ndjson_export_honors_list_filters(self):
+        response = self.client.get('/api/tasks/export/?format=ndjson&priority=high')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 33_334)
+        record = json.loads(lines[0])
+        self.assertEqual(record['priority'], 'high')
+        self.assertIn(record['category_name'], ['Work', 'other'])
+
+    def stream_peak(self, url):
+        """Stream a list response, returning its size in bytes and peak Python memory"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        tracemalloc.start()
+        try:
+            size = 0
+            for index, chunk in enumerate(response.streaming_content):
+                if index == 0:
+                    # The array opens before any rows are fetched
+                    self.assertEqual(chunk, b'[')
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return size, peak
+
+    def test_streamed_list_memory_does_not_grow_with_row_count(self):
+        small_size, small_peak = self.stream_peak('/api/tasks/?format=json-stream&date=2025-01-02')
+        large_size, large_peak = self.stream_peak('/api/tasks/?format=json-stream')
+
+        self.assertGreater(large_size, 9 * small_size)
+        self.assertLess(large_peak, 8 * 1024 * 1024)
+        self.assertLess(large_peak, small_peak * 1.5)
+
+    def test_streamed_list_matches_unpaginated_list(self):
+        streamed = self.client.get('/api/tasks/?format=json-stream&date=2025-01-02&ordering=id')
+        self.assertEqual(streamed['Content-Type'], 'application/json')
+        body = b''.join(streamed.streaming_content)
+
+        plain = self.client.get('/api/tasks/?paginate=false&date=2025-01-02&ordering=id')
+        self.assertEqual(body, plain.content)
+        self.assertEqual(len(json.loads(body)), 10_000)
+
+    def test_streamed_list_is_gzipped_when_accepted(self):
+        url = '/api/tasks/?format=json-stream&date=2025-01-02'
+        plain = b''.join(self.client.get(url).streaming_content)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Checks SQLite EXPLAIN QUERY PLAN output')
+class TaskQueryPlanTests(APITestCase):
+    """
+    EXPLAIN every query the task actions run against seeded data.
+
+    A plan that scans a whole table, or sorts task rows in a temporary
+    B-tree instead of reading them in index order, means a query no longer
+    matches the indexes on Task.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TaskSeeder(tasks=5000, users=2, prefix='plan').run()
+        cls.user = User.objects.filter(username__startswith='plan_user_').first()
+        cls.task = Task.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def capture(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def get(self, url):
+        self.queries = []
+        with connection.execute_wrapper(self.capture):
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def assertIndexedPlans(self, queries):
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                for step in plan:
+                    self.assertFalse(step.startswith('SCAN'), f'{step}\n{sql}')
+                    # Prefetches may sort their page of rows; task queries may not
+                    if 'FROM "tasks_task"' in sql:
+                        self.assertNotIn('TEMP B-TREE', step, f'{step}\n{sql}')
+
+    def test_task_actions_use_indexes(self):
+        urls = [
+            '/api/tasks/',
+            '/api/tasks/?status=pending',
+            '/api/tasks/?priority=high',
+            '/api/tasks/?date=' + date.today().isoformat(),
+            '/api/tasks/?format=json-stream',
+            f'/api/tasks/{self.task.pk}/',
+            '/api/tasks/today/',
+            '/api/tasks/upcoming/',
+            '/api/tasks/overdue/',
+            '/api/tasks/by_priority/',
+            '/api/tasks/statistics/',
+            '/api/tasks/export/?format=csv',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.get(url)
+                self.assertIndexedPlans(self.queries)
+
+    def test_later_pages_use_indexes(self):
+        for url in ['/api/tasks/', '/api/tasks/overdue/', '/api/tasks/upcoming/']:
+            with self.subTest(url=url):
+                next_page = self.get(url).data['next']
+                self.assertIsNotNone(next_page)
+                self.get(next_page)
+                self.assertIndexedPlans(self.queries)
+
+    def test_reminder_scan_uses_partial_index(self):
+        queryset = Task.objects.filter(
+            reminder_sent=False, reminder_datetime__lte=timezone.now()
+        ).order_by('reminder_datetime')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIndexedPlans([(sql, params)])
+        self.assertIn('tasks_task_reminder_due_idx', queryset.explain())
+
+
+class TaskSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher', password='SearcherPassword123!')
+        cls.other = User.objects.create_user('bystander', password='BystanderPassword123!')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.review = Task.objects.create(
+            user=self.user, title='Yearly review', description='Collect notes', date=date(2025, 1, 1)
+        )
+        self.notes = Task.objects.create(
+            user=self.user, title='Notes for the café', description='Review the menu', date=date(2025, 1, 1)
+        )
+        Task.objects.create(user=self.other, title='Review their work', date=date(2025, 1, 1))
+
+    def search(self, text):
+        response = self.client.get('/api/tasks/', {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [task['title'] for task in response.data['results']]
+
+    def test_words_match_as_prefixes_ranked_by_title(self):
+        self.assertEqual(self.search('rev'), ['Yearly review', 'Notes for the café'])
+        self.assertEqual(self.search('review menu'), ['Notes for the café'])
+        self.assertEqual(self.search('cafe'), ['Notes for the café'])
+        # Whole words only, unlike icontains
+        self.assertEqual(self.search('early'), [])
+
+    def test_updates_and_deletes_reach_the_index(self):
+        self.review.title = 'Quarterly planning'
+        self.review.save()
+        self.assertEqual(self.search('yearly'), [])
+        self.assertEqual(self.search('quarter'), ['Quarterly planning'])
+
+        Task.objects.filter(id=self.notes.id).update(description='Order supplies')
+        self.assertEqual(self.search('menu'), [])
+        self.assertEqual(self.search('supplies'), ['Notes for the café'])
+
+        self.review.delete()
+        self.assertEqual(self.search('quarter'), [])
+
+    def test_bulk_and_imported_tasks_are_searchable(self):
+        self.client.post('/api/tasks/bulk/', [
+            {'title': 'Bulk errand', 'date': '2025-01-02'},
+        ], format='json')
+        upload = SimpleUploadedFile(
+            'tasks.ndjson', b'{"title": "Imported errand", "date": "2025-01-03"}\n'
+        )
+        self.assertEqual(self.client.post('/api/tasks/import/', {'file': upload}).status_code, 201)
+        self.assertEqual(sorted(self.search('errand')), ['Bulk errand', 'Imported errand'])
+
+    def test_databases_without_an_index_fall_back_to_icontains(self):
+        with mock.patch('tasks.search.search_vendor', return_value=None):
+            self.assertIsNone(search_tasks(Task.objects.all(), 'review'))
+            self.assertEqual(self.search('early'), ['Yearly review'])
+            self.assertEqual(sorted(self.search('review')), ['Notes for the café', 'Yearly review'])
+
+
+class TaskImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('importer', password='ImporterPassword123!')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content, **data):
+        data['file'] = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post('/api/tasks/import/', data)
+
+    def test_csv_rows_are_imported_with_per_row_errors(self):
+        TaskCategory.objects.create(user=self.user, name='Work')
+        response = self.upload('tasks.csv', (
+            'title,date,time,status,priority,category\n'
+            'Report,2025-01-01,09:30,in_progress,high,Work\n'
+            'Groceries,2025-01-02,,,,Home\n'
+            ',2025-01-03,,,,\n'
+            'Bad status,2025-01-04,,later,,\n'
+            'Bad date,someday,25:00,,,\n'
+        ))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 3))
+        self.assertFalse(response.data['errors_truncated'])
+        self.assertEqual(
+            {error['row']: sorted(error['errors']) for error in response.data['errors']},
+            {3: ['title'], 4: ['status'], 5: ['date', 'time']}
+        )
+
+        report = Task.objects.get(user=self.user, title='Report')
+        self.assertEqual(
+            (report.status, report.priority, report.time, report.custom_category.name),
+            ('in_progress', 'high', datetime_time(9, 30), 'Work')
+        )
+        groceries = Task.objects.get(user=self.user, title='Groceries')
+        self.assertEqual((groceries.status, groceries.priority), ('pending', 'medium'))
+        self.assertEqual(groceries.custom_category.name, 'Home')
+        self.assertEqual(TaskCategory.objects.filter(user=self.user).count(), 2)
+
+    def test_ndjson_rows_are_imported_with_per_row_errors(self):
+        response = self.upload('tasks.jsonl', (
+            '{"title": "Call", "date": "2025-01-01", "reminder_datetime": "2025-01-01T08:00:00Z"}\n'
+            '\n'
+            '["not", "an", "object"]\n'
+            '{"title": "Broken"\n'
+            '{"title": "No date"}\n'
+        ))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 3))
+        self.assertEqual(
+            {error['row']: sorted(error['errors']) for error in response.data['errors']},
+            {3: ['non_field_errors'], 4: ['non_field_errors'], 5: ['date']}
+        )
+        self.assertEqual(
+            Task.objects.get(user=self.user).reminder_datetime.isoformat(), '2025-01-01T08:00:00+00:00'
+        )
+
+    def test_error_list_is_truncated(self):
+        rows = ['{"title": "Kept", "date": "2025-01-01"}'] + ['{}'] * 1001
+        response = self.upload('tasks.ndjson', '\n'.join(rows))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1001))
+        self.assertEqual(len(response.data['errors']), 1000)
+        self.assertTrue(response.data['errors_truncated'])
+
+    def test_files_without_valid_rows_or_format_are_rejected(self):
+        response = self.upload('tasks.csv', 'title,date\n,2025-01-01\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(self.upload('tasks.xlsx', 'title').status_code, 400)
+        # An explicit format wins over the extension
+        response = self.upload('tasks.txt', '{"title": "Typed", "date": "2025-01-01"}', format='ndjson')
+        self.assertEqual(response.status_code, 201)
+
+    def test_imported_tasks_update_statistics_versions_and_search(self):
+        statistics = self.client.get('/api/tasks/statistics/')
+        self.assertEqual(statistics.data['total'], 0)
+
+        self.upload('tasks.csv', 'title,date,priority\nPaint fence,2025-01-01,urgent\nPaint shed,2025-01-02,low\n')
+        response = self.client.get('/api/tasks/statistics/', HTTP_IF_NONE_MATCH=statistics['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['total'], response.data['by_priority']['urgent'], response.data['by_priority']['low']),
+            (2, 1, 1)
+        )
+        search = self.client.get('/api/tasks/', {'search': 'pain'})
+        self.assertEqual(len(search.data['results']), 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite connection settings')
+class SQLiteConnectionTests(APITestCase):
+    def test_file_databases_are_opened_in_wal_mode(self):
+        # The test database lives in memory, which has no WAL; open a file with the same settings
+        directory = tempfile.mkdtemp(prefix='taskflow-sqlite-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_dict = {**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}
+        wrapper = type(connections['default'])(settings_dict, alias='wal_check')
+        self.addCleanup(wrapper.close)
+
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class TaskStatisticsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counter', password='CounterPassword123!')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def rollup(self, user=None):
+        stats = TaskStatistics.objects.get(user=user or self.user)
+        return {field: getattr(stats, field) for field in COUNTER_FIELDS}
+
+    def assertRollupMatchesTasks(self, user=None):
+        user = user or self.user
+        expected = compute_statistics(Task.objects.filter(user=user)).get(
+            user.pk, dict.fromkeys(COUNTER_FIELDS, 0)
+        )
+        self.assertEqual(self.rollup(user), expected)
+
+    def test_new_users_start_with_an_empty_rollup(self):
+        self.assertEqual(self.rollup(), dict.fromkeys(COUNTER_FIELDS, 0))
+
+    def test_single_task_writes_move_the_counters(self):
+        response = self.client.post('/api/tasks/', {'title': 'Write', 'date': '2025-01-01', 'priority': 'high'})
+        self.assertEqual(response.status_code, 201)
+        task = Task.objects.get(user=self.user)
+        self.assertEqual(self.rollup()['high'], 1)
+        self.assertRollupMatchesTasks()
+
+        self.client.patch(f'/api/tasks/{task.id}/', {'status': 'in_progress', 'priority': 'low'})
+        self.assertEqual((self.rollup()['in_progress'], self.rollup()['high']), (1, 0))
+        self.assertRollupMatchesTasks()
+
+        self.client.patch(f'/api/tasks/{task.id}/toggle_status/')
+        self.assertRollupMatchesTasks()
+
+        self.client.delete(f'/api/tasks/{task.id}/')
+        self.assertEqual(self.rollup(), dict.fromkeys(COUNTER_FIELDS, 0))
+
+    def test_bulk_writes_move_the_counters(self):
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': f'Bulk {n}', 'date': '2025-01-01', 'priority': priority}
+            for n, priority in enumerate(['urgent', 'high', 'high'])
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.rollup()['total'], 3)
+        self.assertRollupMatchesTasks()
+
+        ids = list(Task.objects.filter(user=self.user).values_list('id', flat=True))
+        response = self.client.patch('/api/tasks/bulk/', [
+            {'id': ids[0], 'status': 'completed'},
+            {'id': ids[1], 'priority': 'low', 'status': 'in_progress'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertRollupMatchesTasks()
+
+        self.client.delete('/api/tasks/bulk/', ids[:2], format='json')
+        self.assertEqual(self.rollup()['total'], 1)
+        self.assertRollupMatchesTasks()
+
+    def test_missing_row_is_built_on_first_read(self):
+        Task.objects.create(user=self.user, title='Counted', date=date(2025, 1, 1))
+        TaskStatistics.objects.filter(user=self.user).delete()
+        # No row to apply this delta to; the rebuild counts the task instead
+        Task.objects.create(user=self.user, title='Also counted', date=date(2025, 1, 1), status='completed')
+
+        response = self.client.get('/api/tasks/statistics/')
+        self.assertEqual((response.data['total'], response.data['completed']), (2, 1))
+        self.assertRollupMatchesTasks()
+
+    def test_rebuild_command_repairs_drift_and_missing_rows(self):
+        Task.objects.create(user=self.user, title='Drifted', date=date(2025, 1, 1), priority='urgent')
+        TaskStatistics.objects.filter(user=self.user).update(total=99, urgent=0)
+        # Bulk-created accounts skip the signal that creates their row
+        imported, = User.objects.bulk_create([User(username='imported')])
+        Task.objects.create(user=imported, title='Imported', date=date(2025, 1, 1))
+
+        output = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_statistics', verify=True, stdout=output)
+        self.assertIn(f'Drift for user {self.user.pk}', output.getvalue())
+
+        call_command('rebuild_task_statistics', stdout=output)
+        self.assertRollupMatchesTasks()
+        self.assertRollupMatchesTasks(imported)
+        call_command('rebuild_task_statistics', verify=True, stdout=output)
+
+
+class TaskBulkTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bulk', password='BulkPassword123!')
+        cls.other = User.objects.create_user('other', password='OtherPassword123!')
+        cls.category = TaskCategory.objects.create(user=cls.user, name='Work')
+        cls.foreign_category = TaskCategory.objects.create(user=cls.other, name='Theirs')
+
+    def setUp(self):
+        # Cached statistics would outlive the previous test's data version
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.first = Task.objects.create(user=self.user, title='First', date=date(2025, 1, 1))
+        self.second = Task.objects.create(user=self.user, title='Second', date=date(2025, 1, 1))
+        self.foreign = Task.objects.create(user=self.other, title='Theirs', date=date(2025, 1, 1))
+
+    def errors(self, response):
+        return {result['index']: result.get('errors') for result in response.data['results']}
+
+    def test_create_reports_errors_per_item(self):
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': 'Created', 'date': '2025-02-01', 'custom_category': self.category.id},
+            {'date': '2025-02-01'},
+            {'title': 'Foreign', 'date': '2025-02-01', 'custom_category': self.foreign_category.id},
+            'not an object',
+        ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        errors = self.errors(response)
+        self.assertIsNone(errors[0])
+        self.assertIn('title', errors[1])
+        self.assertIn('custom_category', errors[2])
+        self.assertIsNotNone(errors[3])
+
+        created = Task.objects.get(id=response.data['results'][0]['id'])
+        self.assertEqual(created.user, self.user)
+        self.assertEqual(created.custom_category, self.category)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.client.get('/api/tasks/statistics/').data['total'], 3)
+
+    def test_create_with_only_invalid_items_is_rejected(self):
+        response = self.client.post('/api/tasks/bulk/', [{'title': 'No date'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+
+    def test_payload_must_be_a_non_empty_list(self):
+        for payload in [{'title': 'Not a list'}, []]:
+            with self.subTest(payload=payload):
+                response = self.client.post('/api/tasks/bulk/', payload, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+
+    def test_update_applies_valid_items_only(self):
+        response = self.client.patch('/api/tasks/bulk/', [
+            {'id': self.first.id, 'status': 'completed'},
+            {'id': self.foreign.id, 'title': 'Hijacked'},
+            {'id': self.second.id, 'custom_category': self.foreign_category.id},
+            {'id': self.first.id, 'title': 'Twice'},
+            {'id': [self.second.id]},
+            {'id': True},
+            'not an object',
+        ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        errors = self.errors(response)
+        self.assertIsNone(errors[0])
+        self.assertEqual(errors[1], {'id': ['Task not found.']})
+        self.assertIn('custom_category', errors[2])
+        self.assertEqual(errors[3], {'id': ['Duplicate task in request.']})
+        for index in (4, 5, 6):
+            self.assertEqual(errors[index], {'id': ['Invalid id.']})
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.title), ('completed', 'First'))
+        self.assertIsNone(self.second.custom_category)
+        self.assertEqual(self.foreign.title, 'Theirs')
+        self.assertEqual(self.client.get('/api/tasks/statistics/').data['completed'], 1)
+
+    def test_destroy_deletes_own_tasks_and_reports_the_rest(self):
+        response = self.client.delete('/api/tasks/bulk/', [
+            self.first.id,
+            {'id': self.second.id},
+            self.foreign.id,
+            999_999,
+            [[1]],
+            {'id': [1]},
+            True,
+        ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        errors = self.errors(response)
+        self.assertIsNone(errors[0])
+        self.assertIsNone(errors[1])
+        self.assertEqual(errors[2], {'id': ['Task not found.']})
+        self.assertEqual(errors[3], {'id': ['Task not found.']})
+        for index in (4, 5, 6):
+            self.assertEqual(errors[index], {'id': ['Invalid id.']})
+
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+        self.assertTrue(Task.objects.filter(id=self.foreign.id).exists())
+        self.assertEqual(self.client.get('/api/tasks/statistics/').data['total'], 0)
+
+    def test_ids_outside_the_64_bit_range_are_invalid(self):
+        huge = 10 ** 20
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': 'Created', 'date': '2025-02-01'},
+            {'title': 'Huge category', 'date': '2025-02-01', 'custom_category': huge},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertIn('custom_category', self.errors(response)[1])
+
+        response = self.client.patch('/api/tasks/bulk/', [
+            {'id': self.first.id, 'title': 'Renamed'},
+            {'id': huge, 'title': 'Huge'},
+            {'id': -huge, 'title': 'Negative'},
+            {'id': self.second.id, 'custom_category': str(huge)},
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        errors = self.errors(response)
+        self.assertEqual(errors[1], {'id': ['Invalid id.']})
+        self.assertEqual(errors[2], {'id': ['Invalid id.']})
+        self.assertIn('custom_category', errors[3])
+
+        response = self.client.delete('/api/tasks/bulk/', [self.first.id, huge, {'id': huge}], format='json')
+        self.assertEqual(response.status_code, 207)
+        errors = self.errors(response)
+        self.assertIsNone(errors[0])
+        self.assertEqual((errors[1], errors[2]), ({'id': ['Invalid id.']}, {'id': ['Invalid id.']}))
+
+    def test_destroy_with_only_invalid_ids_deletes_nothing(self):
+        response = self.client.delete('/api/tasks/bulk/', [[[1]], {'id': None}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+
+
+class TaskSerializationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('serialized', password='SerializedPassword123!')
+        category = TaskCategory.objects.create(user=cls.user, name='Work', color='#ff0000', icon='briefcase')
+        tasks = [
+            Task.objects.create(
+                user=cls.user,
+                title=f'Task {n}',
+                description='Described' if n % 2 else None,
+                custom_category=category if n % 3 else None,
+                priority=('low', 'medium', 'high', 'urgent')[n % 4],
+                date=date(2025, 1, 1 + n),
+                time=datetime_time(9, n) if n % 2 else None,
+                reminder_datetime=timezone.now() if n % 4 == 0 else None,
+            )
+            for n in range(6)
+        ]
+        for n, task in enumerate(tasks[::2]):
+            for copy in range(n + 1):
+                TaskAttachment.objects.create(
+                    task=task,
+                    file=f'task_attachments/2025/01/01/file_{task.id}_{copy}.pdf',
+                    file_name=f'file_{copy}.pdf',
+                    file_size=1024 * copy,
+                    file_type='application/pdf',
+                )
+
+    def render_both(self, fields=None, expand=()):
+        request = Request(APIRequestFactory().get('/api/tasks/'))
+        queryset = Task.objects.filter(user=self.user).order_by('-created_at', '-pk')
+        context = {'request': request, 'fields': fields, 'expand': set(expand)}
+        renderer = JSONRenderer()
+        serializer = TaskSerializer(queryset.prefetch_related('attachments'), many=True, context=context)
+        fast = serialize_tasks(task_rows(queryset, fields, expand), request, fields, expand)
+        return renderer.render(serializer.data), renderer.render(fast)
+
+    def test_values_serializer_output_is_byte_identical(self):
+        expected, rendered = self.render_both()
+        self.assertEqual(rendered, expected)
+        self.assertIn(b'"attachments":[{', rendered)
+
+    def test_sparse_and_expanded_output_is_byte_identical(self):
+        expected, rendered = self.render_both(['id', 'custom_category', 'reminder_datetime'], {'custom_category'})
+        self.assertEqual(rendered, expected)
+        self.assertIn(b'"color":"#ff0000"', rendered)
+
+
+class TaskPaginationTests(APITestCase):
+    ORDERINGS = ['', 'date', '-date', 'time', '-time', 'priority', '-priority', '-created_at']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager', password='PagerPassword123!')
+        for i in range(23):
+            Task.objects.create(
+                user=cls.user,
+                title=f'Task {i}',
+                date=date(2025, 1, 1 + i % 4),
+                # Every third task has no time, so NULLs straddle page boundaries
+                time=None if i % 3 == 0 else datetime_time(8 + i % 5),
+                priority=['low', 'medium', 'high'][i % 3],
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def ids(self, response):
+        return [task['id'] for task in response.data['results']]
+
+    def walk(self, url, link='next'):
+        """Follow `link` from `url`, returning the pages of ids and the last response"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            pages.append(self.ids(response))
+            last, url = response, response.data[link]
+        return pages, last
+
+    def expected(self, ordering):
+        """Ids in `ordering`, ties broken by id in the same direction and NULLs last"""
+        ordering = ordering or '-created_at'
+        name, descending = ordering.lstrip('-'), ordering.startswith('-')
+        rows = Task.objects.filter(user=self.user).values_list(name, 'id')
+        present = sorted((row for row in rows if row[0] is not None), reverse=descending)
+        missing = sorted((row for row in rows if row[0] is None), key=lambda row: row[1], reverse=descending)
+        return [pk for _, pk in present + missing]
+
+    def test_unpaginated_list_is_a_bare_list(self):
+        response = self.client.get('/api/tasks/?paginate=false')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 23)
+
+    def test_pages_cover_every_task_once_in_order(self):
+        for ordering in self.ORDERINGS:
+            with self.subTest(ordering=ordering):
+                pages, _ = self.walk(f'/api/tasks/?page_size=5&ordering={ordering}')
+                self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+                self.assertEqual(sum(pages, []), self.expected(ordering))
+
+    def test_previous_links_walk_back_to_the_first_page(self):
+        for ordering in self.ORDERINGS:
+            with self.subTest(ordering=ordering):
+                forward, last = self.walk(f'/api/tasks/?page_size=5&ordering={ordering}')
+                backward, first = self.walk(last.data['previous'], link='previous')
+                self.assertEqual(backward, forward[-2::-1])
+                self.assertIsNone(first.data['previous'])
+
+    def cursor(self, ordering='date'):
+        """The decoded cursor of the second page for `ordering`"""
+        url = self.client.get(f'/api/tasks/?page_size=5&ordering={ordering}').data['next']
+        encoded = parse_qs(urlparse(url).query)['cursor'][0]
+        return json.loads(urlsafe_b64decode(encoded))
+
+    def get_with_cursor(self, payload, ordering='date'):
+        encoded = urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+        return self.client.get(f'/api/tasks/?page_size=5&ordering={ordering}&cursor={encoded}')
+
+    def test_nullable_positions_are_accepted(self):
+        payload = self.cursor('time')
+        payload['p'][0] = None
+        response = self.get_with_cursor(payload, 'time')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(task['time'] is None for task in response.data['results']))
+
+    def test_tampered_cursors_are_not_found(self):
+        valid = self.cursor()
+        self.assertEqual(self.get_with_cursor(valid).status_code, 200)
+        tampered = [
+            {**valid, 'p': ['notadate', valid['p'][1]]},
+            {**valid, 'p': [None, valid['p'][1]]},
+            {**valid, 'p': [valid['p'][0], 'one']},
+            {**valid, 'p': [[valid['p'][0]], {'id': 1}]},
+            {**valid, 'p': valid['p'][:1]},
+            {**valid, 'p': 'notalist'},
+            {'p': valid['p']},
+        ]
+        for payload in tampered:
+            with self.subTest(payload=payload):
+                self.assertEqual(self.get_with_cursor(payload).status_code, 404)
+
+        # A cursor issued for another ordering
+        self.assertEqual(self.get_with_cursor(valid, ordering='time').status_code, 404)
+        response = self.client.get('/api/tasks/?cursor=not-base64!')
+        self.assertEqual(response.status_code, 404)
+
+
+class MediaTestCase(APITestCase):
+    """Runs with MEDIA_ROOT in a temporary directory"""
+
+    def setUp(self):
+        media = tempfile.mkdtemp(prefix='taskflow-media-')
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media, TASK_UPLOAD_TEMP_DIR=f'{media}/upload_parts'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, task, content, name='notes.txt', content_type='text/plain'):
+        return create_attachment(task, SimpleUploadedFile(name, content, content_type))
+
+
+class AttachmentDownloadTests(MediaTestCase):
+    content = b'0123456789' * 10
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('downloader', password='DownloaderPassword123!')
+        self.task = Task.objects.create(user=self.user, title='Files', date=date(2025, 1, 1))
+        self.client.force_authenticate(self.user)
+        attachment = self.upload(self.task, self.content)
+        self.url = f'/api/tasks/{self.task.id}/attachments/{attachment.id}/download/'
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+
+    def test_range_requests(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        # A stale If-Range gets the whole file
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+
+class SparseFieldsTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user('sparse', password='SparsePassword123!')
+        self.category = TaskCategory.objects.create(user=self.user, name='Work', color='#00ff00')
+        self.task = Task.objects.create(
+            user=self.user, title='Sparse', date=date(2025, 1, 1), custom_category=self.category
+        )
+        self.upload(self.task, b'attached')
+        self.client.force_authenticate(self.user)
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'][0] if 'results' in response.data else response.data
+
+    def test_fields_trim_list_and_detail_in_serializer_order(self):
+        self.assertEqual(list(self.get('/api/tasks/', fields='title,id')), ['id', 'title'])
+        detail = self.get(f'/api/tasks/{self.task.id}/', fields='status, category_name')
+        self.assertEqual(detail, {'category_name': 'Work', 'status': 'pending'})
+        self.assertEqual(
+            self.get('/api/categories/', fields='name,task_count'), {'name': 'Work', 'task_count': 1}
+        )
+
+    def test_expand_nests_related_objects(self):
+        self.assertEqual(self.get('/api/tasks/', fields='custom_category')['custom_category'], self.category.id)
+
+        for path in ('/api/tasks/', f'/api/tasks/{self.task.id}/'):
+            task = self.get(path, fields='id', expand='custom_category,attachments')
+            self.assertEqual(list(task), ['id', 'custom_category', 'attachments'])
+            self.assertEqual(
+                task['custom_category'],
+                {'id': self.category.id, 'name': 'Work', 'color': '#00ff00', 'icon': 'fa-folder'}
+            )
+            self.assertEqual(task['attachments'][0]['file_name'], 'notes.txt')
+        # Expansion alone keeps every other field
+        task = self.get(f'/api/tasks/{self.task.id}/', expand='custom_category')
+        self.assertEqual(task['custom_category']['name'], 'Work')
+        self.assertIn('updated_at', task)
+
+    def test_unknown_names_are_ignored(self):
+        self.assertEqual(list(self.get('/api/tasks/', fields='id,bogus', expand='bogus')), ['id'])
+        for path in ('/api/tasks/', f'/api/tasks/{self.task.id}/', '/api/categories/'):
+            # Naming no known field is the same as not trimming at all
+            self.assertEqual(self.get(path, fields='bogus'), self.get(path))
+        # Writes are never trimmed
+        response = self.client.patch(f'/api/tasks/{self.task.id}/?fields=id', {'title': 'Renamed'})
+        self.assertEqual(response.data['title'], 'Renamed')
+
+
+class AttachmentGarbageCollectorTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('collector', password='CollectorPassword123!')
+        self.task = Task.objects.create(user=self.user, title='Files', date=date(2025, 1, 1))
+
+    def test_unreferenced_queued_files_are_deleted(self):
+        attachment = self.upload(self.task, b'only copy')
+        name = attachment.file.name
+        attachment.delete()
+        self.assertTrue(PendingFileDeletion.objects.filter(name=name).exists())
+
+        result = AttachmentGarbageCollector().run()
+        self.assertEqual(result['deleted'], 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(PendingFileDeletion.objects.exists())
+
+    def test_reupload_before_collection_keeps_the_file(self):
+        attachment = self.upload(self.task, b'same content')
+        name = attachment.file.name
+        attachment.delete()
+
+        again = self.upload(self.task, b'same content')
+        self.assertEqual(again.file.name, name)
+        # Reusing the file cancels its queued deletion
+        self.assertFalse(PendingFileDeletion.objects.filter(name=name).exists())
+
+        AttachmentGarbageCollector().run()
+        self.assertTrue(default_storage.exists(name))
+        with default_storage.open(name) as handle:
+            self.assertEqual(handle.read(), b'same content')
+
+    def test_sweep_only_deletes_old_orphans(self):
+        kept = self.upload(self.task, b'referenced')
+        orphan = default_storage.save('task_attachments/orphan.txt', SimpleUploadedFile('orphan.txt', b'x'))
+
+        AttachmentGarbageCollector().run()
+        self.assertTrue(default_storage.exists(orphan))
+
+        dry_run = AttachmentGarbageCollector(grace=timedelta(0), dry_run=True).run()
+        self.assertEqual(dry_run['deleted'], 1)
+        self.assertTrue(default_storage.exists(orphan))
+
+        AttachmentGarbageCollector(grace=timedelta(0)).run()
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(kept.file.name))
+
+
+class AttachmentBlobTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('blobs', password='BlobsPassword123!')
+        self.task = Task.objects.create(user=self.user, title='Files', date=date(2025, 1, 1))
+        self.client.force_authenticate(self.user)
+
+    def test_same_content_is_stored_once(self):
+        first = self.upload(self.task, b'%PDF shared', 'report.pdf', 'application/pdf')
+        other_task = Task.objects.create(user=self.user, title='Other', date=date(2025, 1, 1))
+        second = self.upload(other_task, b'%PDF shared', 'copy.pdf', 'application/pdf')
+        different = self.upload(self.task, b'%PDF different', 'report.pdf', 'application/pdf')
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.blob_id, different.blob_id)
+        self.assertEqual(AttachmentBlob.objects.get(pk=first.blob_id).ref_count, 2)
+        # Each attachment keeps its own name for downloads
+        self.assertEqual((first.file_name, second.file_name), ('report.pdf', 'copy.pdf'))
+
+    def test_blob_names_keep_a_type_bearing_extension(self):
+        pdf = self.upload(self.task, b'%PDF', 'Report.PDF', 'application/pdf')
+        image = self.upload(self.task, b'\x89PNG', 'screenshot', 'image/png')
+        self.assertTrue(pdf.file.name.endswith('.pdf'))
+        self.assertEqual(mimetypes.guess_type(pdf.file.name)[0], 'application/pdf')
+        self.assertEqual(mimetypes.guess_type(image.file.name)[0], 'image/png')
+
+        response = self.client.post(
+            f'/api/tasks/{self.task.id}/upload_attachment/',
+            {'file': SimpleUploadedFile('notes.txt', b'plain text', 'text/plain')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['file_url'].endswith('.txt'))
+
+    def test_deleting_attachments_releases_the_blob(self):
+        first = self.upload(self.task, b'released', 'a.txt')
+        second = self.upload(self.task, b'released', 'b.txt')
+        name = first.file.name
+
+        first.delete()
+        blob = AttachmentBlob.objects.get(pk=second.blob_id)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertFalse(PendingFileDeletion.objects.filter(name=name).exists())
+
+        # The last reference goes with its task
+        self.task.delete()
+        self.assertFalse(AttachmentBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(PendingFileDeletion.objects.filter(name=name).exists())
+
+
+class ChunkedUploadTests(MediaTestCase):
+    content = b'0123456789abcdef' * 64
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('chunks', password='ChunksPassword123!')
+        self.task = Task.objects.create(user=self.user, title='Files', date=date(2025, 1, 1))
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            f'/api/tasks/{self.task.id}/uploads/',
+            {'file_name': 'notes.txt', 'file_size': len(self.content), 'file_type': 'text/plain'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.upload_id = response.data['id']
+        self.url = f'/api/tasks/{self.task.id}/uploads/{self.upload_id}/'
+
+    def put_chunk(self, offset, data, checksum=None):
+        return self.client.put(
+            f'{self.url}?offset={offset}',
+            data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest()
+        )
+
+    def finalize(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'{self.url}finalize/')
+
+    def test_chunks_are_assembled_into_an_attachment(self):
+        self.assertEqual(self.put_chunk(0, self.content[:600]).data['received'], 600)
+        self.assertEqual(self.put_chunk(600, self.content[600:]).status_code, 200)
+        self.assertEqual(self.client.get(self.url).data['received'], len(self.content))
+
+        response = self.finalize()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['file_name'], 'notes.txt')
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(blob.sha256, hashlib.sha256(self.content).hexdigest())
+        with blob.file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertFalse(AttachmentUpload.objects.exists())
+
+    def test_digest_catches_up_on_chunks_written_elsewhere(self):
+        self.put_chunk(0, self.content[:600])
+        # As if the next chunk and the finalize land on another worker
+        forget_digest(uuid.UUID(self.upload_id))
+        self.put_chunk(600, self.content[600:1000])
+        forget_digest(uuid.UUID(self.upload_id))
+        self.put_chunk(1000, self.content[1000:])
+
+        self.assertEqual(self.finalize().status_code, 201)
+        self.assertEqual(AttachmentBlob.objects.get().sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_bad_checksum_leaves_the_upload_at_its_offset(self):
+        self.put_chunk(0, self.content[:600])
+        response = self.put_chunk(600, self.content[600:], checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['received'], 600)
+        upload = AttachmentUpload.objects.get()
+        self.assertEqual(os.path.getsize(part_path(upload)), 600)
+
+        # The retry resumes from the same offset
+        self.assertEqual(self.put_chunk(600, self.content[600:]).status_code, 200)
+        self.assertEqual(self.finalize().status_code, 201)
+        self.assertEqual(AttachmentBlob.objects.get().sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_chunk_at_the_wrong_offset_conflicts(self):
+        self.put_chunk(0, self.content[:600])
+        response = self.put_chunk(0, self.content[:600])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 600)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        self.put_chunk(0, self.content[:600])
+        response = self.finalize()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AttachmentBlob.objects.exists())
+        # The failed attempt does not keep the upload locked
+        self.assertEqual(self.put_chunk(600, self.content[600:]).status_code, 200)
+
+    def test_uploads_of_other_users_are_not_found(self):
+        other = User.objects.create_user('intruder', password='IntruderPassword123!')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.put_chunk(0, self.content[:600]).status_code, 404)
+
+
+class ConditionalRequestTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('conditional', password='ConditionalPassword123!')
+        cls.category = TaskCategory.objects.create(user=cls.user, name='Work')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title='Draft', date=date(2025, 1, 1))
+
+    def test_unchanged_data_is_answered_with_304(self):
+        response = self.client.get('/api/tasks/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Only the data version is read
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(
+            '/api/tasks/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        # The version covers every task and category endpoint of the user
+        self.assertEqual(
+            self.client.get(f'/api/categories/{self.category.id}/', HTTP_IF_NONE_MATCH=etag).status_code,
+            304
+        )
+
+    def test_any_write_changes_the_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        TaskCategory.objects.create(user=self.user, name='Home')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_match_rejects_writes_based_on_stale_data(self):
+        etag = self.client.get(f'/api/tasks/{self.task.id}/')['ETag']
+        response = self.client.patch(
+            f'/api/tasks/{self.task.id}/', {'title': 'Edited'}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        # The write hands back the validators of the new version
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+
+        response = self.client.patch(
+            f'/api/tasks/{self.task.id}/', {'title': 'Lost update'}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 412)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Edited')
+
+        response = self.client.delete(f'/api/categories/{self.category.id}/', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(TaskCategory.objects.filter(pk=self.category.pk).exists())
+
+    def test_date_dependent_actions_expire_with_the_day(self):
+        list_etag = self.client.get('/api/tasks/')['ETag']
+        today_etag = self.client.get('/api/tasks/today/')['ETag']
+        self.assertIn(f'{date.today():%Y%m%d}', today_etag)
+        self.assertNotEqual(today_etag, list_etag)
+        self.assertEqual(
+            self.client.get('/api/tasks/today/', HTTP_IF_NONE_MATCH=today_etag).status_code, 304
+        )
+
+    def test_if_modified_since_from_before_midnight_is_not_answered_with_304(self):
+        # The last write happened yesterday; the client fetched shortly after it
+        self.client.get('/api/tasks/')
+        yesterday = timezone.now() - timedelta(days=1)
+        TaskDataVersion.objects.filter(user=self.user).update(modified_at=yesterday - timedelta(hours=1))
+        since = http_date(yesterday.timestamp())
+
+        for url in ('/api/tasks/today/', '/api/tasks/statistics/'):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+                304, url
+            )
+        # Lists that do not depend on the date still validate against the last write
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+
+class ResponseCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', password='CachedPassword123!')
+        cls.other = User.objects.create_user('uncached', password='UncachedPassword123!')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title='Cached', date=date(2025, 1, 1), priority='high')
+
+    def counted(self, path):
+        before = cache_counters()
+        response = self.client.get(path)
+        after = cache_counters()
+        self.assertEqual(response.status_code, 200)
+        return response, (after['hits'] - before['hits'], after['misses'] - before['misses'])
+
+    def total(self):
+        return self.client.get('/api/tasks/statistics/').data['total']
+
+    def test_second_read_is_served_from_the_cache(self):
+        first, outcome = self.counted('/api/tasks/by_priority/?priority=high')
+        self.assertEqual(outcome, (0, 1))
+        # A hit only reads the data version
+        with self.assertNumQueries(1):
+            second, outcome = self.counted('/api/tasks/by_priority/?priority=high')
+        self.assertEqual(outcome, (1, 0))
+        self.assertEqual(second.data, first.data)
+        # Query params are part of the key
+        self.assertEqual(self.counted('/api/tasks/by_priority/?priority=low')[1], (0, 1))
+
+    def test_task_writes_invalidate_cached_responses(self):
+        self.assertEqual(self.total(), 1)
+        self.client.post('/api/tasks/', {'title': 'New', 'date': '2025-01-02'})
+        self.assertEqual(self.total(), 2)
+
+        self.client.patch(f'/api/tasks/{self.task.id}/', {'priority': 'low'})
+        response = self.client.get('/api/tasks/by_priority/?priority=low')
+        self.assertEqual([task['id'] for task in response.data['results']], [self.task.id])
+
+        self.client.delete(f'/api/tasks/{self.task.id}/')
+        self.assertEqual(self.total(), 1)
+
+    def test_bulk_writes_invalidate_cached_responses(self):
+        self.assertEqual(self.total(), 1)
+        self.client.post('/api/tasks/bulk/', [
+            {'title': f'Bulk {n}', 'date': '2025-01-02'} for n in range(2)
+        ], format='json')
+        self.assertEqual(self.total(), 3)
+
+        self.assertEqual(self.client.get('/api/tasks/by_priority/?priority=urgent').data['results'], [])
+        self.client.patch('/api/tasks/bulk/', [{'id': self.task.id, 'priority': 'urgent'}], format='json')
+        self.assertEqual(len(self.client.get('/api/tasks/by_priority/?priority=urgent').data['results']), 1)
+
+        self.client.delete('/api/tasks/bulk/', [self.task.id], format='json')
+        self.assertEqual(self.total(), 2)
+
+    def test_users_do_not_share_entries(self):
+        self.assertEqual(self.total(), 1)
+        self.client.force_authenticate(self.other)
+        response, outcome = self.counted('/api/tasks/statistics/')
+        self.assertEqual(outcome, (0, 1))
+        self.assertEqual(response.data['total'], 0)
+
+    def test_stats_are_only_shown_to_staff(self):
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user('staff', password='StaffPassword123!', is_staff=True))
+        self.counted('/api/tasks/statistics/')
+        self.counted('/api/tasks/statistics/')
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'hits', 'misses', 'hit_rate', 'alias'})
+        self.assertGreaterEqual(response.data['hits'], 1)
+        self.assertEqual(
+            response.data['hit_rate'],
+            round(response.data['hits'] / (response.data['hits'] + response.data['misses']), 4)
+        )
+
+
+class SyncTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('syncer', password='SyncerPassword123!')
+        cls.other = User.objects.create_user('bystander', password='BystanderPassword123!')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.category = TaskCategory.objects.create(user=self.user, name='Work')
+        self.kept = Task.objects.create(user=self.user, title='Kept', date=date(2025, 1, 1))
+        self.edited = Task.objects.create(user=self.user, title='Edited', date=date(2025, 1, 1))
+        self.filed = Task.objects.create(
+            user=self.user, title='Filed', date=date(2025, 1, 1), custom_category=self.category
+        )
+        self.removed = Task.objects.create(user=self.user, title='Removed', date=date(2025, 1, 1))
+        # Written well before the first sync, outside its overlap window
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(user=self.user).update(updated_at=an_hour_ago)
+        TaskCategory.objects.filter(user=self.user).update(updated_at=an_hour_ago)
+
+    def sync(self, token=None):
+        response = self.client.get('/api/sync/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, items):
+        return sorted(item['id'] for item in items)
+
+    def test_first_sync_returns_everything(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertFalse(data['reset'])
+        self.assertEqual(
+            self.ids(data['tasks']),
+            sorted([self.kept.id, self.edited.id, self.filed.id, self.removed.id])
+        )
+        self.assertEqual(self.ids(data['categories']), [self.category.id])
+        self.assertEqual(data['deleted'], {'tasks': [], 'categories': [], 'attachments': []})
+
+    def test_delta_returns_changes_and_deletions_since_the_token(self):
+        token = self.sync()['token']
+        self.client.patch(f'/api/tasks/{self.edited.id}/', {'title': 'Edited again'})
+        self.client.delete(f'/api/tasks/{self.removed.id}/')
+        created = Task.objects.create(user=self.user, title='New', date=date(2025, 1, 2))
+        # Other users' changes never show up
+        Task.objects.create(user=self.other, title='Not mine', date=date(2025, 1, 2)).delete()
+
+        data = self.sync(token)
+        self.assertFalse(data['full'])
+        self.assertEqual(self.ids(data['tasks']), sorted([self.edited.id, created.id]))
+        self.assertEqual(data['categories'], [])
+        self.assertEqual(data['deleted']['tasks'], [self.removed.id])
+
+    def test_deleted_category_is_tombstoned_and_its_tasks_resent(self):
+        token = self.sync()['token']
+        self.assertEqual(self.client.delete(f'/api/categories/{self.category.id}/').status_code, 204)
+
+        data = self.sync(token)
+        self.assertEqual(data['deleted']['categories'], [self.category.id])
+        # SET_NULL changed the task, so it comes back without the category
+        self.assertEqual(self.ids(data['tasks']), [self.filed.id])
+
+    def test_bulk_deletions_are_tombstoned(self):
+        token = self.sync()['token']
+        response = self.client.delete(
+            '/api/tasks/bulk/', [self.kept.id, self.edited.id], format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(self.sync(token)['deleted']['tasks']), sorted([self.kept.id, self.edited.id])
+        )
+
+    def test_invalid_token_is_rejected(self):
+        response = self.client.get('/api/sync/', {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_older_than_tombstone_retention_forces_a_full_sync(self):
+        data = self.sync(encode_token(timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)))
+        self.assertTrue(data['full'])
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['tasks']), 4)
+
+
+class RecordingReminderBackend(BaseReminderBackend):
+    """Records each delivered batch; raises for batches containing a task in `failing`"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.batches = []
+        self.failing = set()
+        self.atomic_depths = []
+
+    def send_reminders(self, tasks):
+        self.atomic_depths.append(len(connection.atomic_blocks))
+        if self.failing & {task.id for task in tasks}:
+            raise ConnectionError('SMTP server went away')
+        self.batches.append([task.id for task in tasks])
+
+
+class ReminderDispatcherTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'reminded', email='reminded@example.com', password='RemindedPassword123!'
+        )
+
+    def setUp(self):
+        now = timezone.now()
+        self.backend = RecordingReminderBackend()
+        self.due = [
+            Task.objects.create(
+                user=self.user, title=f'Due {n}', date=date(2025, 1, 1),
+                reminder_datetime=now - timedelta(minutes=10 - n)
+            )
+            for n in range(3)
+        ]
+        self.later = Task.objects.create(
+            user=self.user, title='Later', date=date(2025, 1, 1), reminder_datetime=now + timedelta(hours=1)
+        )
+        Task.objects.create(
+            user=self.user, title='Already sent', date=date(2025, 1, 1),
+            reminder_datetime=now - timedelta(hours=1), reminder_sent=True
+        )
+
+    def dispatcher(self, **options):
+        return ReminderDispatcher(self.backend, **options)
+
+    def sent_ids(self):
+        return set(Task.objects.filter(reminder_sent=True).values_list('id', flat=True))
+
+    def test_due_reminders_are_sent_once_in_order(self):
+        dispatcher = self.dispatcher(batch_size=2)
+        self.assertEqual(dispatcher.dispatch_due(), 3)
+        self.assertEqual(self.backend.batches, [[self.due[0].id, self.due[1].id], [self.due[2].id]])
+        self.assertFalse(Task.objects.get(pk=self.later.pk).reminder_sent)
+
+        self.assertEqual(dispatcher.dispatch_due(), 0)
+        self.assertEqual(len(self.backend.batches), 2)
+
+    def test_claim_is_committed_before_delivery(self):
+        depth = len(connection.atomic_blocks)
+        self.dispatcher().dispatch_due()
+        # Delivery ran outside the claim's transaction
+        self.assertEqual(self.backend.atomic_depths, [depth])
+
+    def test_failed_batch_is_released_without_blocking_later_reminders(self):
+        self.backend.failing = {self.due[0].id}
+        dispatcher = self.dispatcher(batch_size=1)
+        with self.assertLogs('taskflow.reminders', 'ERROR'):
+            self.assertEqual(dispatcher.dispatch_due(), 2)
+        self.assertEqual(self.backend.batches, [[self.due[1].id], [self.due[2].id]])
+        self.assertNotIn(self.due[0].id, self.sent_ids())
+
+        # Backing off: the failed reminder is not retried straight away
+        self.backend.failing = set()
+        self.assertEqual(dispatcher.dispatch_due(), 0)
+        dispatcher.backoff[self.due[0].id] = (1, 0)
+        self.assertEqual(dispatcher.dispatch_due(), 1)
+        self.assertIn(self.due[0].id, self.sent_ids())
+        self.assertEqual(dispatcher.backoff, {})
+
+    def test_reminder_is_dropped_after_max_attempts(self):
+        self.backend.failing = {self.due[0].id}
+        dispatcher = self.dispatcher(batch_size=1, retry_delay=0, max_attempts=2)
+        with self.assertLogs('taskflow.reminders', 'ERROR') as logs:
+            dispatcher.dispatch_due()
+            dispatcher.dispatch_due()
+        self.assertEqual(len(self.backend.atomic_depths), 4)
+        self.assertIn(self.due[0].id, self.sent_ids())
+        self.assertEqual(dispatcher.backoff, {})
+        self.assertTrue(any('Dropping' in line for line in logs.output))
+
+    def test_run_survives_delivery_and_database_errors(self):
+        self.backend.failing = {task.id for task in self.due}
+        dispatcher = self.dispatcher()
+        with self.assertLogs('taskflow.reminders', 'ERROR'):
+            dispatcher.run(once=True)
+
+        def locked(*args, **kwargs):
+            raise OperationalError('database is locked')
+
+        dispatcher.schedule_upcoming = locked
+        with self.assertLogs('taskflow.reminders', 'ERROR') as logs:
+            dispatcher.run(once=True)
+        self.assertIn('database is locked', '\n'.join(logs.output))
+
+    def test_email_backend_sends_to_task_owners(self):
+        ReminderDispatcher(EmailReminderBackend()).dispatch_due()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['reminded@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'Reminder: Due 0')
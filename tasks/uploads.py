@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .attachments import create_attachment
+from .models import AttachmentUpload
+
+UPLOAD_TTL = timedelta(hours=settings.TASK_UPLOAD_TTL_HOURS)
+MAX_UPLOAD_SIZE = settings.TASK_UPLOAD_MAX_SIZE
+MAX_CHUNK_SIZE = settings.TASK_UPLOAD_MAX_CHUNK_SIZE
+
+# How long a chunk write may hold the upload before another request can take over
+LOCK_TIMEOUT = timedelta(minutes=5)
+BLOCK_SIZE = 64 * 1024
+
+# Running whole-file SHA-256 per upload, so finalizing does not read the part
+# file again: {upload pk: (bytes hashed, hasher)}. Per process and bounded;
+# a process that missed chunks catches up from the part file.
+DIGEST_CACHE_SIZE = 256
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+class UploadConflict(Exception):
+    """The upload is not at the requested offset, or another request holds it"""
+
+
+class ChunkRejected(Exception):
+    pass
+
+
+class PartFile(File):
+    """A finished part file; temporary_file_path() lets the storage move it instead of copying"""
+
+    def __init__(self, path, name, content_type):
+        super().__init__(open(path, 'rb'), name)
+        self.path = path
+        self.content_type = content_type
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def part_path(upload):
+    return os.path.join(settings.TASK_UPLOAD_TEMP_DIR, f'{upload.pk}.part')
+
+
+def start_upload(task, file_name, file_size, file_type=''):
+    return AttachmentUpload.objects.create(
+        task=task,
+        file_name=file_name,
+        file_size=file_size,
+        file_type=file_type or 'application/octet-stream',
+        expires_at=timezone.now() + UPLOAD_TTL
+    )
+
+
+def _running_digest(upload, path, position):
+    """A hasher over the first `position` bytes of the part file"""
+    with _digests_lock:
+        hashed, hasher = _digests.get(upload.pk, (0, None))
+    if hasher is None or hashed > position:
+        hashed, hasher = 0, hashlib.sha256()
+    else:
+        hasher = hasher.copy()
+    if hashed < position:
+        try:
+            with open(path, 'rb') as handle:
+                handle.seek(hashed)
+                while hashed < position:
+                    data = handle.read(min(BLOCK_SIZE, position - hashed))
+                    if not data:
+                        break
+                    hasher.update(data)
+                    hashed += len(data)
+        except FileNotFoundError:
+            pass
+        if hashed != position:
+            raise ChunkRejected('Part file is missing bytes already received')
+    return hasher
+
+
+def _remember_digest(upload, position, hasher):
+    with _digests_lock:
+        _digests[upload.pk] = (position, hasher)
+        _digests.move_to_end(upload.pk)
+        while len(_digests) > DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+
+
+def forget_digest(upload_pk):
+    with _digests_lock:
+        _digests.pop(upload_pk, None)
+
+
+def _claim(upload, **filters):
+    """Take the upload's write lease; False when another request holds it"""
+    now = timezone.now()
+    return bool(
+        AttachmentUpload.objects.filter(pk=upload.pk, **filters)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        .update(locked_until=now + LOCK_TIMEOUT)
+    )
+
+
+def _truncate(path, size):
+    if os.path.exists(path):
+        os.truncate(path, size)
+
+
+def write_chunk(upload, offset, stream, length, checksum):
+    """
+    Append `length` bytes read from `stream` at `offset`.
+
+    The body is copied block by block, so memory use does not depend on the
+    chunk size. A chunk whose SHA-256 does not match `checksum` is cut off
+    again and the upload stays at `offset`, ready for a retry.
+    """
+    if offset != upload.received:
+        raise UploadConflict()
+    if offset + length > upload.file_size:
+        raise ChunkRejected('Chunk extends past the declared file size')
+    if not _claim(upload, received=offset):
+        raise UploadConflict()
+
+    path = part_path(upload)
+    hasher = hashlib.sha256()
+    written = 0
+    try:
+        file_hasher = _running_digest(upload, path, offset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'wb') as handle:
+            # Drop whatever an interrupted earlier attempt left past the offset
+            handle.truncate(offset)
+            handle.seek(offset)
+            while written < length:
+                data = stream.read(min(BLOCK_SIZE, length - written))
+                if not data:
+                    break
+                hasher.update(data)
+                file_hasher.update(data)
+                handle.write(data)
+                written += len(data)
+        if written != length:
+            raise ChunkRejected('Chunk body ended before Content-Length bytes')
+        if hasher.hexdigest() != checksum.lower():
+            raise ChunkRejected('Chunk checksum does not match')
+    except BaseException:
+        _truncate(path, offset)
+        AttachmentUpload.objects.filter(pk=upload.pk).update(locked_until=None)
+        raise
+
+    upload.received = offset + written
+    upload.expires_at = timezone.now() + UPLOAD_TTL
+    AttachmentUpload.objects.filter(pk=upload.pk).update(
+        received=upload.received,
+        expires_at=upload.expires_at,
+        locked_until=None
+    )
+    _remember_digest(upload, upload.received, file_hasher)
+    return upload
+
+
+def finalize_upload(upload):
+    """Turn a complete upload into a TaskAttachment and drop the session"""
+    if upload.received != upload.file_size:
+        raise ChunkRejected('Upload is incomplete')
+    if not _claim(upload):
+        raise UploadConflict()
+
+    path = part_path(upload)
+    file = PartFile(path, upload.file_name, upload.file_type)
+    try:
+        file.sha256 = _running_digest(upload, path, upload.file_size).hexdigest()
+        with transaction.atomic():
+            attachment = create_attachment(upload.task, file)
+            upload.delete()
+    except BaseException:
+        AttachmentUpload.objects.filter(pk=upload.pk).update(locked_until=None)
+        raise
+    finally:
+        file.close()
+    return attachment
+
+
+def remove_part_file(path):
+    # Gone already when the storage moved it into place
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def expire_uploads(now=None):
+    """Delete uploads past their TTL; their part files go with them"""
+    expired = AttachmentUpload.objects.filter(expires_at__lt=now or timezone.now())
+    return expired.delete()[1].get(AttachmentUpload._meta.label, 0)
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import TaskDataVersion
+
+# User ids collected while a deferred_versions() block is active
+_pending_users = ContextVar('pending_version_users', default=None)
+
+
+def bump_versions(user_ids):
+    """
+    Advance the data version of every given user with a single UPDATE.
+
+    Users without a version row are skipped: the row is created on first read,
+    and no client can hold a version for a user that has never been read.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    pending = _pending_users.get()
+    if pending is not None:
+        pending.update(user_ids)
+        return
+    TaskDataVersion.objects.filter(user_id__in=user_ids).update(
+        version=F('version') + 1,
+        modified_at=timezone.now()
+    )
+
+
+@contextmanager
+def deferred_versions():
+    """Collect every bump made inside the block into one UPDATE at the end"""
+    if _pending_users.get() is not None:
+        yield
+        return
+    user_ids = set()
+    token = _pending_users.set(user_ids)
+    try:
+        yield
+    finally:
+        _pending_users.reset(token)
+    bump_versions(user_ids)
+
+
+def get_data_version(user, for_update=False):
+    """
+    Return the user's version row, creating it on first access.
+
+    With for_update the row stays locked until the surrounding transaction
+    ends, so no other write can advance the version in between.
+    """
+    versions = TaskDataVersion.objects.select_for_update() if for_update else TaskDataVersion.objects
+    try:
+        return versions.get(user=user)
+    except TaskDataVersion.DoesNotExist:
+        try:
+            with transaction.atomic():
+                return TaskDataVersion.objects.create(user=user)
+        except IntegrityError:
+            return versions.get(user=user)
@@ -1,43 +1,126 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.settings import api_settings
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from datetime import date, datetime, timedelta
-from .models import Task, TaskCategory, TaskAttachment
+import csv
+import uuid
+from taskflow_api.metrics import UPLOAD_BYTES
+from .models import Task, TaskCategory, TaskAttachment, AttachmentUpload, SyncTombstone
 from .serializers import (
-    TaskSerializer, TaskCreateSerializer, 
-    TaskCategorySerializer, TaskAttachmentSerializer
+    TaskSerializer, TaskCreateSerializer, TaskBulkSerializer,
+    TaskCategorySerializer, TaskAttachmentSerializer, AttachmentUploadSerializer
 )
+from .caching import cached_response, cache_counters, CACHE_ALIAS
+from .conditional import ConditionalRequestMixin
+from .exports import (
+    CSVExportRenderer, NDJSONExportRenderer,
+    export_rows, stream_csv, stream_ndjson
+)
+from .attachments import create_attachment
+from .downloads import serve_attachment
+from .fieldsets import SparseFieldsMixin
+from .fast_serializers import serialize_tasks, task_rows
+from .imports import TaskImporter, detect_format, read_rows
+from .search import TaskSearchFilter
+from .streaming import (
+    StreamingJSONRenderer, StreamingJSONResponse, batched, compress_streaming_response, task_batches
+)
+from .statistics import (
+    get_user_statistics, date_buckets,
+    add_task_delta, apply_deltas, new_deltas, deferred_statistics
+)
+from .sync import (
+    InvalidSyncToken, decode_token, encode_token, needs_reset,
+    deferred_tombstones, SYNC_OVERLAP
+)
+from .uploads import (
+    ChunkRejected, UploadConflict, MAX_CHUNK_SIZE,
+    start_upload, write_chunk, finalize_upload
+)
+from .versioning import bump_versions, deferred_versions
+
+# Maximum number of items accepted by a single bulk request
+BULK_MAX_ITEMS = 500
 
-class TaskCategoryViewSet(viewsets.ModelViewSet):
+# Task fields backed by a column of their own, for .only() on sparse requests
+SPARSE_COLUMNS = {
+    'title', 'description', 'custom_category', 'default_category', 'status', 'priority',
+    'date', 'time', 'reminder_datetime', 'reminder_sent', 'created_at', 'updated_at'
+}
+
+class TaskCategoryViewSet(SparseFieldsMixin, ConditionalRequestMixin, viewsets.ModelViewSet):
     """ViewSet for managing custom task categories"""
     serializer_class = TaskCategorySerializer
     permission_classes = [IsAuthenticated]
+    # Reads only need the owner's id, which the access token carries
+    trust_token_claims = True
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name', 'created_at']
+    ordering_fields = ['name', 'created_at', 'task_count']
     
     def get_queryset(self):
-        return TaskCategory.objects.filter(user=self.request.user)
+        queryset = TaskCategory.objects.filter(user=self.request.user)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            queryset = queryset.only('user', *[name for name in fields if name != 'task_count'])
+            if 'task_count' not in fields and 'task_count' not in self.request.query_params.get('ordering', ''):
+                return queryset
+        # Count tasks in the same query instead of once per category
+        return queryset.annotate(task_count=Count('tasks'))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(SparseFieldsMixin, ConditionalRequestMixin, viewsets.ModelViewSet):
     """ViewSet for managing tasks with all features"""
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Reads only need the owner's id, which the access token carries
+    trust_token_claims = True
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'default_category', 'custom_category', 'date']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'date', 'time', 'priority']
     parser_classes = [MultiPartParser, FormParser]
+    # ?format=json-stream streams list-style responses instead of paginating them
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, StreamingJSONRenderer]
+    date_dependent_actions = ('today', 'upcoming', 'overdue', 'statistics')
+    unversioned_actions = ('download_attachment', 'chunked_upload')
+    expandable_fields = ('attachments', 'custom_category')
+    sparse_actions = ('list', 'retrieve', 'today', 'upcoming', 'overdue', 'by_priority')
     
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user).prefetch_related(
-            'attachments', 'custom_category'
-        )
+        queryset = Task.objects.filter(user=self.request.user)
+        if not self.is_sparse():
+            return queryset.prefetch_related('attachments', 'custom_category')
+        
+        # Load only the columns and relations the requested fields read
+        fields = self.get_sparse_fields() or TaskSerializer.Meta.fields
+        if 'attachments' in fields:
+            queryset = queryset.prefetch_related('attachments')
+        if {'custom_category_name', 'category_name'} & set(fields) \
+                or ('custom_category' in fields and 'custom_category' in self.get_expansions()):
+            queryset = queryset.select_related('custom_category')
+        columns = {'user'} | {name for name in fields if name in SPARSE_COLUMNS}
+        if {'custom_category_name', 'category_name'} & set(fields):
+            columns |= {'custom_category', 'default_category'}
+        return queryset.only(*columns)
+    
+    def perform_content_negotiation(self, request, force=False):
+        # Downloads answer whatever the client accepts; their errors fall back to JSON
+        if self.action == 'download_attachment':
+            force = True
+        return super().perform_content_negotiation(request, force)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -47,42 +130,62 @@ class TaskViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+    
+    def list_response(self, queryset):
+        """Serialize a queryset as a paginated response, like the list action"""
+        # Read-only lists skip TaskSerializer; the output is identical
+        fields, expand = self.get_sparse_fields(), self.get_expansions()
+        rows = task_rows(queryset, fields, expand)
+        if self.request.accepted_renderer.format == StreamingJSONRenderer.format:
+            # The whole filtered list, serialized and sent one batch at a time
+            response = StreamingJSONResponse(
+                task_batches(rows, self.request, fields, expand),
+                renderer=self.request.accepted_renderer
+            )
+            return compress_streaming_response(self.request, response)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_tasks(page, self.request, fields, expand))
+        return Response(serialize_tasks(rows, self.request, fields, expand))
+    
     @action(detail=False, methods=['get'])
+    @cached_response
     def today(self, request):
         """Get tasks for today"""
         today_tasks = self.get_queryset().filter(date=date.today())
-        serializer = self.get_serializer(today_tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(today_tasks)
     
     @action(detail=False, methods=['get'])
+    @cached_response
     def upcoming(self, request):
-        """Get upcoming tasks (next 7 days)"""
+        """Get upcoming tasks (next 7 days), soonest first"""
         end_date = date.today() + timedelta(days=7)
         upcoming_tasks = self.get_queryset().filter(
             date__gte=date.today(),
             date__lte=end_date,
             status='pending'
-        )
-        serializer = self.get_serializer(upcoming_tasks, many=True)
-        return Response(serializer.data)
+        ).order_by('date', 'created_at')
+        return self.list_response(upcoming_tasks)
     
     @action(detail=False, methods=['get'])
+    @cached_response
     def overdue(self, request):
-        """Get overdue tasks"""
+        """Get overdue tasks, most overdue first"""
         overdue_tasks = self.get_queryset().filter(
             date__lt=date.today(),
             status__in=['pending', 'in_progress']
-        )
-        serializer = self.get_serializer(overdue_tasks, many=True)
-        return Response(serializer.data)
+        ).order_by('date', 'created_at')
+        return self.list_response(overdue_tasks)
     
     @action(detail=False, methods=['get'])
+    @cached_response
     def by_priority(self, request):
         """Get tasks grouped by priority"""
         priority = request.query_params.get('priority', 'high')
         tasks = self.get_queryset().filter(priority=priority)
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(tasks)
     
     @action(detail=True, methods=['patch'])
     def toggle_status(self, request, pk=None):
@@ -115,13 +218,8 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        attachment = TaskAttachment.objects.create(
-            task=task,
-            file=file,
-            file_name=file.name,
-            file_size=file.size,
-            file_type=file.content_type
-        )
+        attachment = create_attachment(task, file)
+        UPLOAD_BYTES.inc(file.size, kind='attachment')
         
         serializer = TaskAttachmentSerializer(attachment, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -150,27 +248,459 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path=r'attachments/(?P<attachment_id>\d+)/download'
+    )
+    def download_attachment(self, request, pk=None, attachment_id=None):
+        """Download an attachment of one of the user's tasks"""
+        attachment = TaskAttachment.objects.filter(
+            id=attachment_id,
+            task_id=pk,
+            task__user=request.user
+        ).first()
+        response = serve_attachment(request, attachment) if attachment else None
+        if response is None:
+            return Response(
+                {'error': 'Attachment not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return response
+    
+    def _get_upload(self, request, pk, upload_id):
+        try:
+            upload_id = uuid.UUID(upload_id)
+        except ValueError:
+            return None
+        return AttachmentUpload.objects.select_related('task').filter(
+            id=upload_id,
+            task_id=pk,
+            task__user=request.user,
+            expires_at__gt=timezone.now()
+        ).first()
+    
+    @action(detail=True, methods=['post'], url_path='uploads', parser_classes=[JSONParser])
+    def start_chunked_upload(self, request, pk=None):
+        """Start a resumable upload; chunks are then PUT to the returned upload"""
+        task = self.get_object()
+        serializer = AttachmentUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = start_upload(task, **serializer.validated_data)
+        return Response(AttachmentUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+    
+    @action(
+        detail=True,
+        methods=['get', 'put', 'delete'],
+        url_path=r'uploads/(?P<upload_id>[0-9a-f-]+)',
+        parser_classes=[]
+    )
+    def chunked_upload(self, request, pk=None, upload_id=None):
+        """
+        GET reports how many bytes were received, DELETE abandons the upload
+        and PUT appends the raw request body at ?offset=
+        """
+        upload = self._get_upload(request, pk, upload_id)
+        if upload is None:
+            return Response(
+                {'error': 'Upload not found or expired'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if request.method == 'GET':
+            return Response(AttachmentUploadSerializer(upload).data)
+        if request.method == 'DELETE':
+            upload.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response(
+                {'error': 'offset is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if not length:
+            return Response(
+                {'error': 'Chunks need a Content-Length'},
+                status=status.HTTP_411_LENGTH_REQUIRED
+            )
+        if length > MAX_CHUNK_SIZE:
+            return Response(
+                {'error': f'Chunks must be at most {MAX_CHUNK_SIZE // (1024 * 1024)}MB'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        checksum = request.META.get('HTTP_X_CHUNK_SHA256')
+        if not checksum:
+            return Response(
+                {'error': 'X-Chunk-SHA256 header is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            write_chunk(upload, offset, request.stream, length, checksum)
+        except UploadConflict:
+            upload.refresh_from_db()
+            return Response(
+                {'error': 'Upload is not at this offset', 'received': upload.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ChunkRejected as exc:
+            return Response(
+                {'error': str(exc), 'received': upload.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        UPLOAD_BYTES.inc(length, kind='chunk')
+        return Response(AttachmentUploadSerializer(upload).data)
+    
+    @action(detail=True, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]+)/finalize')
+    def finalize_chunked_upload(self, request, pk=None, upload_id=None):
+        """Create the attachment once every byte of the upload has arrived"""
+        upload = self._get_upload(request, pk, upload_id)
+        if upload is None:
+            return Response(
+                {'error': 'Upload not found or expired'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            attachment = finalize_upload(upload)
+        except UploadConflict:
+            return Response(
+                {'error': 'A chunk is still being written'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ChunkRejected as exc:
+            return Response(
+                {'error': str(exc), 'received': upload.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = TaskAttachmentSerializer(attachment, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    def _bulk_items(self, request):
+        """Return the list payload of a bulk request, or an error response"""
+        items = request.data
+        if not isinstance(items, list):
+            return None, Response(
+                {'error': 'Expected a list of items'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not items or len(items) > BULK_MAX_ITEMS:
+            return None, Response(
+                {'error': f'Between 1 and {BULK_MAX_ITEMS} items are allowed per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return items, None
+    
+    def _bulk_id(self, value):
+        """A task id from a bulk payload, or None unless it is an integer the database can hold"""
+        if isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return None
+    
+    def _bulk_context(self, items):
+        """Serializer context with every referenced category loaded in one query"""
+        category_ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    category_id = int(item.get('custom_category'))
+                except (TypeError, ValueError):
+                    continue
+                # Out-of-range ids cannot match a category; the field reports them
+                if -2 ** 63 <= category_id < 2 ** 63:
+                    category_ids.add(category_id)
+        context = self.get_serializer_context()
+        context['categories'] = TaskCategory.objects.in_bulk(category_ids) if category_ids else {}
+        return context
+    
+    def _bulk_response(self, results, success_status=status.HTTP_200_OK):
+        failed = sum(1 for result in results if 'errors' in result)
+        if not failed:
+            response_status = success_status
+        elif failed == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({'results': results}, status=response_status)
+    
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser])
+    def bulk_create(self, request):
+        """Create many tasks in one transaction"""
+        items, error = self._bulk_items(request)
+        if error:
+            return error
+        context = self._bulk_context(items)
+        
+        results = []
+        tasks = []
+        for index, item in enumerate(items):
+            serializer = TaskBulkSerializer(data=item, context=context)
+            if serializer.is_valid():
+                tasks.append(Task(user=request.user, **serializer.validated_data))
+                results.append({'index': index})
+            else:
+                results.append({'index': index, 'errors': serializer.errors})
+        
+        with transaction.atomic():
+            created = Task.objects.bulk_create(tasks)
+            deltas = new_deltas()
+            for task in created:
+                add_task_delta(deltas, task.user_id, task.status, task.priority)
+            apply_deltas(deltas)
+            if created:
+                bump_versions([request.user.id])
+        
+        created = iter(created)
+        for result in results:
+            if 'errors' not in result:
+                result['id'] = next(created).id
+        return self._bulk_response(results, status.HTTP_201_CREATED)
+    
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """Partially update many tasks in one transaction"""
+        items, error = self._bulk_items(request)
+        if error:
+            return error
+        context = self._bulk_context(items)
+        
+        ids = [self._bulk_id(item.get('id')) if isinstance(item, dict) else None for item in items]
+        
+        # Lock the rows so the deltas are computed from what is being overwritten
+        with transaction.atomic():
+            existing = Task.objects.select_for_update().filter(
+                user=request.user,
+                id__in=[pk for pk in ids if pk is not None]
+            ).in_bulk()
+            
+            results = []
+            tasks = {}
+            fields = set()
+            deltas = new_deltas()
+            for index, (item, task_id) in enumerate(zip(items, ids)):
+                if task_id is None:
+                    results.append({'index': index, 'errors': {'id': ['Invalid id.']}})
+                    continue
+                task = existing.get(task_id)
+                if task is None:
+                    results.append({'index': index, 'errors': {'id': ['Task not found.']}})
+                    continue
+                if task_id in tasks:
+                    results.append({'index': index, 'errors': {'id': ['Duplicate task in request.']}})
+                    continue
+                
+                serializer = TaskBulkSerializer(task, data=item, partial=True, context=context)
+                if not serializer.is_valid():
+                    results.append({'index': index, 'id': task_id, 'errors': serializer.errors})
+                    continue
+                
+                validated_data = serializer.validated_data
+                if 'reminder_datetime' in validated_data \
+                        and validated_data['reminder_datetime'] != task.reminder_datetime:
+                    validated_data['reminder_sent'] = False
+                
+                add_task_delta(deltas, task.user_id, task.status, task.priority, sign=-1)
+                for attr, value in validated_data.items():
+                    setattr(task, attr, value)
+                add_task_delta(deltas, task.user_id, task.status, task.priority)
+                fields.update(validated_data)
+                tasks[task_id] = task
+                results.append({'index': index, 'id': task_id})
+            
+            if tasks:
+                now = timezone.now()
+                for task in tasks.values():
+                    task.updated_at = now
+                Task.objects.bulk_update(tasks.values(), sorted(fields | {'updated_at'}))
+                apply_deltas(deltas)
+                bump_versions([request.user.id])
+        return self._bulk_response(results)
+    
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete many tasks in one transaction"""
+        items, error = self._bulk_items(request)
+        if error:
+            return error
+        
+        # Items are task ids or {"id": ...} objects
+        ids = [self._bulk_id(item.get('id') if isinstance(item, dict) else item) for item in items]
+        existing = set(Task.objects.filter(
+            user=request.user,
+            id__in=[pk for pk in ids if pk is not None]
+        ).values_list('id', flat=True))
+        
+        results = []
+        for index, task_id in enumerate(ids):
+            if task_id is None:
+                results.append({'index': index, 'errors': {'id': ['Invalid id.']}})
+            elif task_id in existing:
+                results.append({'index': index, 'id': task_id})
+            else:
+                results.append({'index': index, 'errors': {'id': ['Task not found.']}})
+        
+        if existing:
+            with transaction.atomic(), deferred_statistics(), deferred_versions(), \
+                    deferred_tombstones():
+                Task.objects.filter(user=request.user, id__in=existing).delete()
+        return self._bulk_response(results)
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer, StreamingJSONRenderer]
+    )
+    def export(self, request):
+        """Stream the filtered task list as CSV, NDJSON or a JSON array"""
+        queryset = self.filter_queryset(Task.objects.filter(user=request.user))
+        category_names = dict(
+            TaskCategory.objects.filter(user=request.user).values_list('id', 'name')
+        )
+        records = export_rows(queryset, category_names)
+        
+        if request.accepted_renderer.format == 'ndjson':
+            response = StreamingHttpResponse(
+                stream_ndjson(records), content_type='application/x-ndjson'
+            )
+            extension = 'ndjson'
+        elif request.accepted_renderer.format == StreamingJSONRenderer.format:
+            response = StreamingJSONResponse(
+                batched(records), renderer=request.accepted_renderer
+            )
+            extension = 'json'
+        else:
+            response = StreamingHttpResponse(stream_csv(records), content_type='text/csv')
+            extension = 'csv'
+        response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+        return compress_streaming_response(request, response)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_tasks(self, request):
+        """Import tasks from an uploaded CSV or NDJSON file"""
+        max_size = settings.TASK_IMPORT_MAX_UPLOAD_SIZE
+        if int(request.META.get('CONTENT_LENGTH') or 0) > max_size:
+            return Response(
+                {'error': f'Import files must be smaller than {max_size // (1024 * 1024)}MB'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        # Spool the upload to disk whatever its size so rows can be streamed from it
+        request._request.upload_handlers = [TemporaryFileUploadHandler(request._request)]
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'No file provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = detect_format(upload, request.data.get('format'))
+        if file_format is None:
+            return Response(
+                {'error': 'Unsupported format; upload a .csv or .ndjson file'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        UPLOAD_BYTES.inc(upload.size, kind='import')
+        importer = TaskImporter(request.user)
+        try:
+            report = importer.run(read_rows(upload, file_format))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            report = importer.report()
+            report['error'] = f'Could not read the file: {exc}'
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+    
     @action(detail=False, methods=['get'])
+    @cached_response
     def statistics(self, request):
         """Get task statistics"""
-        queryset = self.get_queryset()
+        rollup = get_user_statistics(request.user)
+        buckets = date_buckets(self.get_queryset())
         
         stats = {
-            'total': queryset.count(),
-            'completed': queryset.filter(status='completed').count(),
-            'pending': queryset.filter(status='pending').count(),
-            'in_progress': queryset.filter(status='in_progress').count(),
-            'overdue': queryset.filter(
-                date__lt=date.today(), 
-                status__in=['pending', 'in_progress']
-            ).count(),
-            'today': queryset.filter(date=date.today()).count(),
+            'total': rollup.total,
+            'completed': rollup.completed,
+            'pending': rollup.pending,
+            'in_progress': rollup.in_progress,
+            'overdue': buckets['overdue'],
+            'today': buckets['today'],
             'by_priority': {
-                'urgent': queryset.filter(priority='urgent').count(),
-                'high': queryset.filter(priority='high').count(),
-                'medium': queryset.filter(priority='medium').count(),
-                'low': queryset.filter(priority='low').count(),
+                'urgent': rollup.urgent,
+                'high': rollup.high,
+                'medium': rollup.medium,
+                'low': rollup.low,
             }
         }
         
-        return Response(stats)
\ No newline at end of file
+        return Response(stats)
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss counters of the task response cache in this worker"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        stats = cache_counters()
+        stats['alias'] = CACHE_ALIAS
+        return Response(stats)
+
+class SyncView(APIView):
+    """Delta sync: everything created, modified or deleted since a token"""
+    permission_classes = [IsAuthenticated]
+    trust_token_claims = True
+    
+    def get(self, request):
+        user = request.user
+        now = timezone.now()
+        since = None
+        
+        token = request.query_params.get('since')
+        if token:
+            try:
+                since = decode_token(token)
+            except InvalidSyncToken:
+                return Response(
+                    {'error': 'Invalid sync token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # Tombstones older than the retention window are gone; start over
+        reset = since is not None and needs_reset(since)
+        if reset:
+            since = None
+        
+        tasks = Task.objects.filter(user=user).select_related('custom_category').prefetch_related('attachments')
+        categories = TaskCategory.objects.filter(user=user)
+        attachments = TaskAttachment.objects.filter(task__user=user)
+        deleted = {'tasks': [], 'categories': [], 'attachments': []}
+        
+        if since is not None:
+            window = since - SYNC_OVERLAP
+            tasks = tasks.filter(updated_at__gte=window)
+            categories = categories.filter(updated_at__gte=window)
+            attachments = attachments.filter(uploaded_at__gte=window)
+            
+            kinds = {'task': 'tasks', 'category': 'categories', 'attachment': 'attachments'}
+            tombstones = SyncTombstone.objects.filter(
+                user=user, deleted_at__gte=window
+            ).values_list('kind', 'object_id')
+            for kind, object_id in tombstones:
+                deleted[kinds[kind]].append(object_id)
+        
+        context = {'request': request}
+        return Response({
+            'token': encode_token(now),
+            'full': since is None,
+            'reset': reset,
+            'tasks': TaskSerializer(tasks.order_by('id'), many=True, context=context).data,
+            'categories': TaskCategorySerializer(
+                categories.annotate(task_count=Count('tasks')).order_by('id'),
+                many=True, context=context
+            ).data,
+            'attachments': TaskAttachmentSerializer(
+                attachments.order_by('id'), many=True, context=context
+            ).data,
+            'deleted': deleted,
+        })
@@ -0,0 +1,158 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class _LocalUserCache:
+    """A bounded, thread-safe LRU of users whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = _LocalUserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_LOCAL_TTL)
+
+
+def user_cache_key(user_id):
+    return f'users:auth:{user_id}'
+
+
+def shared_user_cache():
+    """
+    The cache every worker reads users from, or None when it is per-process.
+
+    A LocMemCache would hold a copy per worker that invalidation in another
+    worker cannot reach, so only the process LRU is used with it.
+    """
+    cache = caches[settings.JWT_USER_CACHE_ALIAS]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def invalidate_cached_user(user_id):
+    """Drop a user from both caches; runs whenever a User is saved or deleted"""
+    local_users.delete(str(user_id))
+    cache = shared_user_cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+def claims_user(user_id):
+    """
+    A User carrying only the primary key from the token.
+
+    Good for filtering querysets by owner; every other field is blank, so
+    views that read the profile itself must not trust claims.
+    """
+    User = get_user_model()
+    user = User(**{api_settings.USER_ID_FIELD: user_id})
+    user._state.adding = False
+    user._state.db = router.db_for_read(User)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query.
+
+    Resolved users are kept in a small per-process LRU and, unless it is a
+    per-process LocMemCache, in the Django cache, both for at most
+    JWT_USER_CACHE_LOCAL_TTL seconds. Saving or deleting a User clears the
+    shared entry and this process's LRU; other workers can serve the old
+    user until their LRU entry expires. Writes that skip User.save(), such
+    as queryset.update(), are picked up within two TTLs.
+
+    With JWT_TRUST_TOKEN_CLAIMS on, safe requests to views that set
+    `trust_token_claims = True` skip both caches and get a claims_user().
+    Deactivating a user then only takes effect on those views once their
+    access tokens expire.
+    """
+
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def trusts_claims(self):
+        if not settings.JWT_TRUST_TOKEN_CLAIMS or self.request.method not in SAFE_METHODS:
+            return False
+        view = (self.request.parser_context or {}).get('view')
+        return getattr(view, 'trust_token_claims', False)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        if self.trusts_claims():
+            return claims_user(user_id)
+
+        key = str(user_id)
+        user = local_users.get(key)
+        if user is None:
+            cache = shared_user_cache()
+            user = cache.get(user_cache_key(user_id)) if cache is not None else None
+            if user is None:
+                user = super().get_user(validated_token)
+                timeout = min(
+                    validated_token.get('exp', 0) - time.time(), settings.JWT_USER_CACHE_LOCAL_TTL
+                )
+                if cache is not None and timeout > 0:
+                    cache.set(user_cache_key(user_id), user, timeout)
+            local_users.set(key, user)
+
+        self.check_user(user, validated_token)
+        # Views may modify request.user; keep the cached instance untouched
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        # The checks JWTAuthentication.get_user() makes after its query
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_on_change(sender, instance, **kwargs):
+    # Admin edits, changepassword and profile updates all end in User.save()
+    invalidate_cached_user(instance.pk)
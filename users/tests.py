@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import local_users, user_cache_key
+from .throttling import (
+    CacheCounterStore, SQLiteCounterStore, UsernameSlidingWindowThrottle
+)
+
+CACHE_DIR = tempfile.mkdtemp(prefix='taskflow-user-cache-')
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', password='CachedPassword123!')
+
+    def setUp(self):
+        local_users.clear()
+        caches['default'].clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def user_queries(self, url='/api/auth/profile/'):
+        """Status of a GET to `url` and the number of auth_user queries it ran"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response.status_code, sum('"auth_user"' in query['sql'] for query in queries)
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(self.user_queries(), (200, 1))
+        self.assertEqual(self.user_queries(), (200, 0))
+
+    def test_locmem_cache_is_not_used_as_the_shared_tier(self):
+        self.user_queries()
+        self.assertIsNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    }})
+    def test_shared_tier_serves_other_workers_and_is_invalidated(self):
+        caches['default'].clear()
+        self.user_queries()
+        self.assertIsNotNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+        # Another worker: empty process LRU, same shared cache
+        local_users.clear()
+        self.assertEqual(self.user_queries(), (200, 0))
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertIsNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+    def test_profile_update_is_seen_on_the_next_request(self):
+        self.user_queries()
+        response = self.client.patch('/api/auth/profile/update/', {'first_name': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/profile/').data['first_name'], 'Updated')
+
+    def test_deactivation_outside_the_api_takes_effect(self):
+        self.assertEqual(self.user_queries()[0], 200)
+        # As the admin would
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.user_queries()[0], 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.user_queries()
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(self.user_queries()[0], 401)
+
+    @override_settings(JWT_TRUST_TOKEN_CLAIMS=True)
+    def test_trusted_views_skip_the_user_lookup_on_safe_methods(self):
+        self.assertEqual(self.user_queries('/api/tasks/'), (200, 0))
+        # Views that read the profile still load the user
+        self.assertEqual(self.user_queries('/api/auth/profile/'), (200, 1))
+
+
+def frozen_clock(now):
+    """Freeze the time the throttles see, so no window boundary passes mid-test"""
+    return mock.patch('users.throttling.time', mock.Mock(time=mock.Mock(return_value=now)))
+
+
+@override_settings(AUTH_THROTTLE_STORE='cache')
+class LoginThrottleTests(APITestCase):
+    # DEFAULT_THROTTLE_RATES: login_ip 20/min, login_username 5/min
+
+    def setUp(self):
+        caches['default'].clear()
+        clock = frozen_clock(6000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def login(self, username, address='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/',
+            {'username': username, 'password': 'wrong'},
+            format='json',
+            REMOTE_ADDR=address
+        )
+
+    def test_attempts_are_limited_per_username(self):
+        for _ in range(5):
+            self.assertEqual(self.login('alice').status_code, 401)
+        response = self.login('Alice ', address='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Other accounts are unaffected
+        self.assertEqual(self.login('bob').status_code, 401)
+
+    def test_spoofed_forwarded_for_values_share_one_bucket(self):
+        # The proxy appends the real address; everything before it is client input
+        for n in range(20):
+            response = self.client.post(
+                '/api/auth/login/',
+                {'username': f'user{n}', 'password': 'wrong'},
+                format='json',
+                HTTP_X_FORWARDED_FOR=f'198.51.100.{n}, 203.0.113.7'
+            )
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            '/api/auth/login/',
+            {'username': 'someone', 'password': 'wrong'},
+            format='json',
+            HTTP_X_FORWARDED_FOR='198.51.100.99, 203.0.113.7'
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_attempts_are_limited_per_address(self):
+        for n in range(20):
+            self.assertEqual(self.login(f'user{n}').status_code, 401)
+        self.assertEqual(self.login('someone').status_code, 429)
+        self.assertEqual(self.login('someone', address='10.0.0.2').status_code, 401)
+
+
+class SlidingWindowThrottleTests(APITestCase):
+    """The login username throttle (5/min) against each counter store"""
+
+    def setUp(self):
+        caches['default'].clear()
+        directory = tempfile.mkdtemp(prefix='taskflow-throttle-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.stores = {
+            'cache': CacheCounterStore('default'),
+            'sqlite': SQLiteCounterStore(os.path.join(directory, 'throttle.sqlite3')),
+        }
+
+    @contextmanager
+    def clock(self, store, now=6000.0):
+        """Throttle against `store` with time frozen at `now`"""
+        with mock.patch('users.throttling.get_counter_store', return_value=store), \
+                frozen_clock(now):
+            yield
+
+    def allow(self, username='alice'):
+        request = mock.Mock(data={'username': username})
+        view = mock.Mock(throttle_scope='login')
+        return UsernameSlidingWindowThrottle().allow_request(request, view)
+
+    def test_rejected_requests_are_not_counted(self):
+        for kind, store in self.stores.items():
+            with self.subTest(store=kind):
+                # The window starts at 6000s: five allowed, then rejections
+                with self.clock(store, now=6000.0):
+                    self.assertEqual([self.allow() for _ in range(8)], [True] * 5 + [False] * 3)
+                # Halfway into the next window the five count 2.5: three more fit
+                with self.clock(store, now=6090.0):
+                    self.assertEqual([self.allow() for _ in range(4)], [True, True, True, False])
+
+    def test_parallel_burst_cannot_exceed_the_limit(self):
+        for kind, store in self.stores.items():
+            with self.subTest(store=kind):
+                barrier = threading.Barrier(20)
+                results = []
+
+                def attempt():
+                    barrier.wait()
+                    results.append(self.allow(username=f'burst-{kind}'))
+
+                threads = [threading.Thread(target=attempt) for _ in range(20)]
+                with self.clock(store):
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                self.assertEqual(results.count(True), 5)
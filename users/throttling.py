@@ -0,0 +1,202 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class CacheCounterStore:
+    """Window counters in a Django cache shared by every worker"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def incr(self, key, timeout):
+        if self.cache.add(key, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def decr(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+
+class SQLiteCounterStore:
+    """
+    Window counters in a local SQLite file.
+
+    Used when the only cache is per-process (LocMemCache), which would give
+    every gunicorn worker its own budget. All workers on the host share the
+    file; WAL mode keeps readers and the single writer from blocking each other.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_counters '
+                '(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            self.local.connection = connection
+        return connection
+
+    def get_many(self, keys):
+        placeholders = ','.join('?' * len(keys))
+        rows = self.connection.execute(
+            f'SELECT key, count FROM throttle_counters WHERE key IN ({placeholders}) AND expires > ?',
+            [*keys, time.time()]
+        )
+        return dict(rows)
+
+    def incr(self, key, timeout):
+        now = time.time()
+        count, = self.connection.execute(
+            'INSERT INTO throttle_counters (key, count, expires) VALUES (?, 1, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'count = CASE WHEN expires > ? THEN count + 1 ELSE 1 END, expires = excluded.expires '
+            'RETURNING count',
+            [key, now + timeout, now]
+        ).fetchone()
+        self.writes += 1
+        if self.writes % 1000 == 0:
+            self.connection.execute('DELETE FROM throttle_counters WHERE expires <= ?', [now])
+        return count
+
+    def decr(self, key):
+        self.connection.execute(
+            'UPDATE throttle_counters SET count = count - 1 WHERE key = ? AND count > 0', [key]
+        )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_counter_store():
+    """The store named by AUTH_THROTTLE_STORE: 'cache', 'sqlite' or 'auto'"""
+    kind = settings.AUTH_THROTTLE_STORE
+    if kind == 'auto':
+        cache = caches[settings.AUTH_THROTTLE_CACHE_ALIAS]
+        kind = 'sqlite' if isinstance(cache, (LocMemCache, DummyCache)) else 'cache'
+    with _stores_lock:
+        if kind not in _stores:
+            if kind == 'sqlite':
+                _stores[kind] = SQLiteCounterStore(settings.AUTH_THROTTLE_SQLITE_PATH)
+            else:
+                _stores[kind] = CacheCounterStore(settings.AUTH_THROTTLE_CACHE_ALIAS)
+        return _stores[kind]
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60), as DRF's SimpleRateThrottle reads rates"""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window counter limit for one identity per request.
+
+    The current and previous fixed windows are counted separately and the
+    previous one is weighted by how much of it still overlaps the sliding
+    window, so each check costs one counter read and one increment whatever
+    the rate. The decision is made on the value the increment returns, so
+    parallel requests cannot all pass a check made before any of them was
+    counted. Rejected requests take their increment back and are not counted.
+
+    The rate comes from DEFAULT_THROTTLE_RATES under
+    `<view.throttle_scope>_<kind>`; views without a scope are not limited.
+    """
+    kind = None
+
+    def get_identity(self, request):
+        raise NotImplementedError('.get_identity() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        limit, duration = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{self.kind}'))
+        identity = self.get_identity(request)
+        if limit is None or identity is None:
+            return True
+
+        now = time.time()
+        window = int(now // duration)
+        elapsed = now - window * duration
+        prefix = f'throttle:{scope}:{self.kind}:{identity}'
+        current_key, previous_key = f'{prefix}:{window}', f'{prefix}:{window - 1}'
+        store = get_counter_store()
+
+        previous = store.get_many([previous_key]).get(previous_key, 0)
+        # Requests counted before this one
+        current = store.incr(current_key, 2 * duration) - 1
+        overlap = 1 - elapsed / duration
+        if previous * overlap + current >= limit:
+            store.decr(current_key)
+            self.wait_seconds = self.compute_wait(limit, duration, elapsed, current, previous)
+            return False
+        return True
+
+    def compute_wait(self, limit, duration, elapsed, current, previous):
+        if current >= limit or not previous:
+            # Only the next window starts from zero
+            return duration - elapsed
+        # When the previous window's share has decayed enough for one more request
+        free_at = duration * (1 - (limit - current) / previous)
+        return max(free_at - elapsed, 1)
+
+    def wait(self):
+        if self.wait_seconds is None:
+            return None
+        return math.ceil(self.wait_seconds)
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    """Limits each client address; honours NUM_PROXIES like DRF's throttles"""
+    kind = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class UsernameSlidingWindowThrottle(SlidingWindowThrottle):
+    """Limits attempts against one account, whichever addresses they come from"""
+    kind = 'username'
+
+    def get_identity(self, request):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username.strip():
+            return None
+        # Hashed so any username makes a valid cache key
+        return hashlib.sha1(username.strip().lower().encode('utf-8')).hexdigest()
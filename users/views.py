@@ -4,12 +4,22 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import UserRegistrationSerializer, UserSerializer
+from .throttling import IPSlidingWindowThrottle, UsernameSlidingWindowThrottle
 
 class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = UserRegistrationSerializer
+    # Each registration hashes a password; see DEFAULT_THROTTLE_RATES
+    throttle_classes = [IPSlidingWindowThrottle]
+    throttle_scope = 'register'
+
+class LoginView(TokenObtainPairView):
+    """Token login, limited per client address and per username before any password is hashed"""
+    throttle_classes = [IPSlidingWindowThrottle, UsernameSlidingWindowThrottle]
+    throttle_scope = 'login'
 
 class UserProfileView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]